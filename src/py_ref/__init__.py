@@ -2,6 +2,7 @@
 
 __version__ = "0.1.0"
 
+from .cache import LRUCache
 from .core import add, greet
 from .logger import (
     console,
@@ -15,6 +16,15 @@ from .logger import (
     print_warning,
     setup_logger,
 )
+from .repository import (
+    DuplicateEmailError,
+    InMemoryUserRepository,
+    RepositoryError,
+    UserRecord,
+    UserRepository,
+)
+from .singleflight import SingleFlight
+from .sqlite_repository import SQLiteUserRepository
 
 # API 模块作为可选导入（需要安装 fastapi）
 try:
@@ -37,4 +47,12 @@ __all__ = [
     "print_header",
     "print_section",
     "api_app",
+    "UserRecord",
+    "UserRepository",
+    "InMemoryUserRepository",
+    "RepositoryError",
+    "DuplicateEmailError",
+    "SQLiteUserRepository",
+    "LRUCache",
+    "SingleFlight",
 ]
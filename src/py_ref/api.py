@@ -9,32 +9,131 @@
 - API 文档
 """
 
+import base64
+import binascii
+import gc
+import json
+import os
 from contextlib import asynccontextmanager
 from datetime import datetime
 from enum import Enum
-from typing import Any, Optional
+from typing import Any, AsyncIterator, Optional
 
-from fastapi import FastAPI, HTTPException, Request, status
-from fastapi.responses import JSONResponse
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response, status
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, ConfigDict, Field
 
-from py_ref.logger import get_logger
+from py_ref.cache import LRUCache
+from py_ref.logger import flush_logging, get_logger
+from py_ref.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE
+from py_ref.metrics import MetricsRegistry
+from py_ref.middleware import (
+    ConcurrencyLimitMiddleware,
+    RequestTimingMiddleware,
+    parse_route_limits,
+)
+from py_ref.ratelimit import RateLimitMiddleware, parse_rate_limits
+from py_ref.repository import (
+    DuplicateEmailError,
+    InMemoryUserRepository,
+    UserRecord,
+    UserRepository,
+)
+from py_ref.responses import FastJSONResponse, json_dumps
+from py_ref.singleflight import SingleFlight
+from py_ref.sqlite_repository import SQLiteUserRepository
 
 # 获取日志记录器
 logger = get_logger(__name__)
 
 
+class ApiConfig:
+    """API 运行配置，默认值可通过环境变量覆盖"""
+
+    # 设置后使用 SQLite 持久化存储（须为数据库文件，不支持 :memory:），否则使用内存仓储
+    SQLITE_PATH = os.getenv("PY_REF_SQLITE_PATH")
+    SQLITE_POOL_SIZE = int(os.getenv("PY_REF_SQLITE_POOL_SIZE", "8"))
+    # 列表接口单页返回的最大记录数
+    MAX_PAGE_SIZE = int(os.getenv("PY_REF_MAX_PAGE_SIZE", "100"))
+    # 导出接口每次从仓储读取并发送的记录数
+    EXPORT_BATCH_SIZE = int(os.getenv("PY_REF_EXPORT_BATCH_SIZE", "500"))
+    # 批量接口单次请求允许的最大条目数
+    MAX_BATCH_SIZE = int(os.getenv("PY_REF_MAX_BATCH_SIZE", "1000"))
+    # get_user 响应缓存的容量与存活秒数（0 表示关闭缓存）；多进程部署时 TTL 即
+    # 跨进程的最大陈旧时间，py_ref.server 启动多个 worker 时默认改为 1 秒
+    USER_CACHE_SIZE = int(os.getenv("PY_REF_USER_CACHE_SIZE", "10000"))
+    USER_CACHE_TTL = float(os.getenv("PY_REF_USER_CACHE_TTL", "60"))
+    # 高性能响应模式：处理函数直接一次性编码统一响应（优先使用 orjson），
+    # 跳过 ApiResponse 构建与 response_model 的二次校验
+    FAST_RESPONSES = os.getenv("PY_REF_FAST_RESPONSES", "0") == "1"
+    # 访问日志抽样比例（5xx 与慢请求总是记录）及慢请求阈值（毫秒）
+    ACCESS_LOG_SAMPLE_RATE = float(os.getenv("PY_REF_ACCESS_LOG_SAMPLE_RATE", "1.0"))
+    ACCESS_LOG_SLOW_MS = float(os.getenv("PY_REF_ACCESS_LOG_SLOW_MS", "1000"))
+    # 准入控制：全局并发上限（0 表示不限制）、排队上限与排队超时（秒），
+    # 以及按路由前缀的并发上限，如 "/api/v1/users:export=4,/api/v1/users=128"
+    MAX_CONCURRENCY = int(os.getenv("PY_REF_MAX_CONCURRENCY", "0"))
+    MAX_QUEUE = int(os.getenv("PY_REF_MAX_QUEUE", "0"))
+    QUEUE_TIMEOUT = float(os.getenv("PY_REF_QUEUE_TIMEOUT", "1.0"))
+    ROUTE_CONCURRENCY = parse_route_limits(os.getenv("PY_REF_ROUTE_CONCURRENCY", ""))
+    # 按客户端的令牌桶限流：路由前缀到速率的映射，如 "/api/v1/users=20/s:40"；
+    # 客户端身份取自 RATE_LIMIT_KEY_HEADER 请求头，但只认 RATE_LIMIT_KEYS
+    # 中的已知 Key（逗号分隔），其他请求使用远端地址
+    RATE_LIMITS = parse_rate_limits(os.getenv("PY_REF_RATE_LIMITS", ""))
+    RATE_LIMIT_KEY_HEADER = os.getenv("PY_REF_RATE_LIMIT_KEY_HEADER", "x-api-key")
+    RATE_LIMIT_KEYS = frozenset(
+        key.strip()
+        for key in os.getenv("PY_REF_RATE_LIMIT_KEYS", "").split(",")
+        if key.strip()
+    )
+    # 启动预热：生成 OpenAPI 文档、走一遍模型校验与编码路径，避免首个请求变慢
+    WARMUP = os.getenv("PY_REF_WARMUP", "1") == "1"
+    # 预热时预先载入 get_user 缓存的用户数（按 ID 升序），0 表示不预载
+    PRIME_USER_CACHE = int(os.getenv("PY_REF_PRIME_USER_CACHE", "0"))
+    # 预热后调用 gc.freeze()，启动期创建的长期对象不再参与垃圾回收扫描
+    GC_FREEZE = os.getenv("PY_REF_GC_FREEZE", "1") == "1"
+
+
 # ==================== 生命周期管理 ====================
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """应用生命周期管理。"""
+    """应用生命周期管理。
+
+    启动时按配置选择并打开用户仓储，随后预热并冻结 GC；
+    关闭时（包括预热失败时）解除 GC 冻结并释放仓储资源（如连接池）。
+    """
     # 启动时执行
     logger.info("FastAPI 应用启动")
-    yield
-    # 关闭时执行
-    logger.info("FastAPI 应用关闭")
+    if ApiConfig.SQLITE_PATH:
+        app.state.user_repository = SQLiteUserRepository(
+            ApiConfig.SQLITE_PATH, pool_size=ApiConfig.SQLITE_POOL_SIZE
+        )
+    repository: UserRepository = app.state.user_repository
+    await repository.open()
+    frozen = False
+    try:
+        if ApiConfig.WARMUP:
+            warm_up(app)
+            if ApiConfig.PRIME_USER_CACHE > 0:
+                await prime_user_cache(
+                    repository, app.state.user_cache, ApiConfig.PRIME_USER_CACHE
+                )
+        if ApiConfig.GC_FREEZE:
+            # 先回收启动期的临时对象，再把存活对象移入永久代
+            gc.collect()
+            gc.freeze()
+            frozen = True
+        yield
+    finally:
+        # 关闭时执行
+        if frozen:
+            # 移回普通代，同一进程内重复启动应用（如测试）时旧对象仍可被回收
+            gc.unfreeze()
+        await repository.close()
+        logger.info("FastAPI 应用关闭")
+        # 异步日志模式下等待队列中的日志全部写出
+        flush_logging()
 
 
 # 创建 FastAPI 应用
@@ -45,8 +144,48 @@ app = FastAPI(
     docs_url="/api/v1/docs",
     redoc_url="/api/v1/redoc",
     lifespan=lifespan,
+    default_response_class=(
+        FastJSONResponse if ApiConfig.FAST_RESPONSES else JSONResponse
+    ),
 )
 
+# 默认使用内存仓储，可在启动时替换为其他后端
+app.state.user_repository = InMemoryUserRepository()
+
+
+# get_user 的响应缓存：user_id -> (ETag, 已编码的完整响应体)
+app.state.user_cache = LRUCache(
+    maxsize=ApiConfig.USER_CACHE_SIZE, ttl=ApiConfig.USER_CACHE_TTL
+)
+
+# get_user 缓存未命中时的请求合并：同一 user_id 的并发读取只访问一次仓储
+app.state.user_reads = SingleFlight()
+
+
+# 进程内指标：请求耗时直方图、进行中请求数、缓存与请求合并统计
+app.state.metrics = MetricsRegistry()
+app.state.metrics.register_cache("user", app.state.user_cache)
+app.state.metrics.register_singleflight("user", app.state.user_reads)
+
+
+# 依赖均为 async def：普通 def 依赖会被 FastAPI 放到线程池中执行，
+# 每个请求多出一次线程切换，对缓存命中这类微秒级路径代价远大于依赖本身
+
+
+async def get_user_repository(request: Request) -> UserRepository:
+    """获取当前应用使用的用户仓储（FastAPI 依赖）。"""
+    return request.app.state.user_repository
+
+
+async def get_user_cache(request: Request) -> LRUCache:
+    """获取用户响应缓存（FastAPI 依赖）。"""
+    return request.app.state.user_cache
+
+
+async def get_user_reads(request: Request) -> SingleFlight:
+    """获取 get_user 的请求合并器（FastAPI 依赖）。"""
+    return request.app.state.user_reads
+
 
 # ==================== 响应模型 ====================
 
@@ -57,7 +196,10 @@ class ResponseCode(int, Enum):
     SUCCESS = 0  # 成功
     INVALID_PARAMS = 400  # 参数错误
     NOT_FOUND = 404  # 资源不存在
+    CONFLICT = 409  # 资源冲突
+    TOO_MANY_REQUESTS = 429  # 请求过于频繁
     SERVER_ERROR = 500  # 服务器错误
+    SERVICE_UNAVAILABLE = 503  # 服务繁忙
 
 
 class ApiResponse(BaseModel):
@@ -116,6 +258,11 @@ class UserResponse(BaseModel):
     age: Optional[int] = Field(None, description="年龄")
     created_at: datetime = Field(..., description="创建时间")
 
+    @classmethod
+    def from_record(cls, record: UserRecord) -> "UserResponse":
+        """从存储层记录构建响应模型。"""
+        return cls(**record.to_dict())
+
 
 class UserUpdate(BaseModel):
     """更新用户请求模型。"""
@@ -129,47 +276,258 @@ class UserUpdate(BaseModel):
     age: Optional[int] = Field(None, ge=0, le=150, description="年龄")
 
 
+class UserBatchUpdateItem(UserUpdate):
+    """批量更新中的单个条目。"""
+
+    id: int = Field(..., description="用户 ID")
+
+
+class UserBatchCreateRequest(BaseModel):
+    """批量创建用户请求模型。"""
+
+    items: list[UserCreate] = Field(
+        ..., min_length=1, max_length=ApiConfig.MAX_BATCH_SIZE, description="用户列表"
+    )
+
+
+class UserBatchUpdateRequest(BaseModel):
+    """批量更新用户请求模型。"""
+
+    items: list[UserBatchUpdateItem] = Field(
+        ..., min_length=1, max_length=ApiConfig.MAX_BATCH_SIZE, description="更新列表"
+    )
+
+
+class UserBatchGetRequest(BaseModel):
+    """批量获取用户请求模型。"""
+
+    ids: list[int] = Field(
+        ...,
+        min_length=1,
+        max_length=ApiConfig.MAX_BATCH_SIZE,
+        description="用户 ID 列表",
+    )
+
+
+class UserBatchDeleteRequest(BaseModel):
+    """批量删除用户请求模型。"""
+
+    ids: list[int] = Field(
+        ...,
+        min_length=1,
+        max_length=ApiConfig.MAX_BATCH_SIZE,
+        description="用户 ID 列表",
+    )
+
+
+# ==================== 响应构建 ====================
+
+
+def respond(
+    data: Any = None, message: str = "成功", status_code: int = status.HTTP_200_OK
+) -> Any:
+    """构建统一格式的成功响应。
+
+    默认返回 ``ApiResponse``，由 FastAPI 按路由的 ``response_model`` 与
+    ``status_code`` 处理；启用 ``ApiConfig.FAST_RESPONSES`` 时直接返回一次性编码的
+    ``FastJSONResponse``，此时使用本函数的 ``status_code`` 参数。
+
+    Args:
+        data: 响应数据，需由 JSON 兼容类型（及 datetime）组成
+        message: 响应消息
+        status_code: HTTP 状态码，应与路由声明的一致
+
+    Returns:
+        ``ApiResponse`` 或 ``FastJSONResponse``
+    """
+    if ApiConfig.FAST_RESPONSES:
+        return FastJSONResponse(
+            {"code": int(ResponseCode.SUCCESS), "data": data, "message": message},
+            status_code=status_code,
+        )
+    return ApiResponse(data=data, message=message)
+
+
+def error_response(
+    status_code: int, code: int, message: Any, headers: Optional[dict] = None
+) -> JSONResponse:
+    """构建统一格式的错误响应。"""
+    response_class = FastJSONResponse if ApiConfig.FAST_RESPONSES else JSONResponse
+    return response_class(
+        status_code=status_code,
+        content={"code": int(code), "data": None, "message": message},
+        headers=headers,
+    )
+
+
+# ==================== ETag 与预编码响应 ====================
+
+
+def encode_user_body(record: UserRecord) -> bytes:
+    """将用户记录编码为完整的 ``ApiResponse`` JSON 响应体。
+
+    输出与 FastAPI 按 ``response_model=ApiResponse`` 序列化的结果一致，
+    每个记录版本只需编码一次。
+    """
+    user = UserResponse.from_record(record)
+    return ApiResponse(data=user.model_dump()).model_dump_json().encode()
+
+
+def make_etag(record: UserRecord) -> str:
+    """根据记录 ID 与版本号生成强 ETag。"""
+    return f'"{record.id}-{record.version}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """判断 ``If-None-Match`` 请求头是否命中当前 ETag。
+
+    按 RFC 9110 §13.1.2 使用弱比较：忽略 ``W/`` 前缀，只比较引号内的标签，
+    因此代理或客户端回传的 ``W/"1-1"`` 同样命中 ``"1-1"``。
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    etag = etag.removeprefix("W/")
+    return any(
+        tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(",")
+    )
+
+
+def invalidate_user(cache: LRUCache, reads: SingleFlight, user_id: int) -> None:
+    """用户被修改后使其缓存响应失效，并让后续读取不再加入修改前开始的读取。"""
+    cache.invalidate(user_id)
+    reads.forget(user_id)
+
+
+# ==================== 分页游标 ====================
+
+
+def encode_cursor(user_id: int) -> str:
+    """将最后一条记录的 ID 编码为不透明游标。"""
+    return base64.urlsafe_b64encode(str(user_id).encode()).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> int:
+    """解码分页游标。
+
+    Raises:
+        HTTPException: 游标格式无效时抛出 400 错误
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return int(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="无效的分页游标"
+        ) from exc
+
+
+# ==================== 启动预热 ====================
+
+
+def warm_up(application: FastAPI) -> None:
+    """预热应用：生成 OpenAPI 文档，并让请求/响应模型的校验与编码路径各执行一次。
+
+    由 ``lifespan`` 在每个 worker 启动时调用；使用预先 fork 的进程管理器
+    （如 gunicorn ``--preload``）时也可以在 fork 之前调用，使预热结果由各 worker 共享。
+
+    Args:
+        application: 需要预热的 FastAPI 应用
+    """
+    application.openapi()
+
+    sample = {"name": "预热", "email": "warmup@example.com", "age": 20}
+    UserCreate.model_validate(sample)
+    UserUpdate.model_validate(sample)
+    UserBatchCreateRequest.model_validate({"items": [sample]})
+    UserBatchUpdateRequest.model_validate({"items": [{"id": 1, **sample}]})
+    UserBatchGetRequest.model_validate({"ids": [1]})
+    UserBatchDeleteRequest.model_validate({"ids": [1]})
+
+    record = UserRecord(id=1, created_at=datetime.now(), **sample)
+    encode_user_body(record)
+    user = UserResponse.from_record(record).model_dump()
+    ApiResponse.model_validate(ApiResponse(data=user)).model_dump(mode="json")
+    json_dumps({"code": int(ResponseCode.SUCCESS), "data": user, "message": "成功"})
+    logger.info("预热完成")
+
+
+async def prime_user_cache(
+    repository: UserRepository, cache: LRUCache, limit: int
+) -> int:
+    """按 ID 升序预先载入 ``limit`` 个用户的 get_user 响应缓存。
+
+    Args:
+        repository: 用户仓储
+        cache: 用户响应缓存
+        limit: 最多载入的用户数，不超过缓存容量
+
+    Returns:
+        实际载入的用户数
+    """
+    records = await repository.list_after(0, min(limit, cache.maxsize))
+    for record in records:
+        cache.set(record.id, (make_etag(record), encode_user_body(record)))
+    logger.info("预载用户缓存: %s 条", len(records))
+    return len(records)
+
+
 # ==================== 全局异常处理 ====================
 
 
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
     """处理 HTTP 异常。"""
-    logger.error(f"HTTP 异常: {exc.status_code} - {exc.detail}")
-    return JSONResponse(
-        status_code=exc.status_code,
-        content={
-            "code": exc.status_code,
-            "data": None,
-            "message": exc.detail,
-        },
+    logger.error("HTTP 异常: %s - %s", exc.status_code, exc.detail)
+    return error_response(
+        exc.status_code, exc.status_code, exc.detail, headers=exc.headers
     )
 
 
 @app.exception_handler(Exception)
 async def general_exception_handler(request: Request, exc: Exception):
     """处理一般异常。"""
-    logger.error(f"服务器错误: {str(exc)}", exc_info=True)
-    return JSONResponse(
-        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-        content={
-            "code": ResponseCode.SERVER_ERROR,
-            "data": None,
-            "message": "服务器内部错误",
-        },
+    logger.error("服务器错误: %s", exc, exc_info=True)
+    return error_response(
+        status.HTTP_500_INTERNAL_SERVER_ERROR,
+        ResponseCode.SERVER_ERROR,
+        "服务器内部错误",
     )
 
 
 # ==================== 中间件 ====================
 
 
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    """记录所有请求。"""
-    logger.info(f"请求: {request.method} {request.url.path}")
-    response = await call_next(request)
-    logger.info(f"响应: {response.status_code}")
-    return response
+# 准入控制：超出并发上限时快速返回 503，健康检查与指标端点不受限制
+if ApiConfig.MAX_CONCURRENCY > 0 or ApiConfig.ROUTE_CONCURRENCY:
+    app.add_middleware(
+        ConcurrencyLimitMiddleware,
+        limit=ApiConfig.MAX_CONCURRENCY or None,
+        max_waiting=ApiConfig.MAX_QUEUE,
+        queue_timeout=ApiConfig.QUEUE_TIMEOUT,
+        route_limits=ApiConfig.ROUTE_CONCURRENCY,
+        exempt_paths=("/api/v1/health", "/api/v1/metrics"),
+    )
+
+# 限流：位于准入控制之外，超出速率的请求在占用并发名额之前即被拒绝
+if ApiConfig.RATE_LIMITS:
+    app.add_middleware(
+        RateLimitMiddleware,
+        limits=ApiConfig.RATE_LIMITS,
+        key_header=ApiConfig.RATE_LIMIT_KEY_HEADER,
+        api_keys=ApiConfig.RATE_LIMIT_KEYS,
+        exempt_paths=("/api/v1/health", "/api/v1/metrics"),
+    )
+
+# 访问日志：纯 ASGI 实现，记录方法、路由模板、状态码与耗时
+# （最后添加的中间件位于最外层，被拒绝的请求同样计入访问日志与指标）
+app.add_middleware(
+    RequestTimingMiddleware,
+    sample_rate=ApiConfig.ACCESS_LOG_SAMPLE_RATE,
+    slow_threshold_ms=ApiConfig.ACCESS_LOG_SLOW_MS,
+    metrics=app.state.metrics,
+)
 
 
 # ==================== API 端点 ====================
@@ -183,7 +541,7 @@ async def log_requests(request: Request, call_next):
 )
 async def root():
     """根路径端点。"""
-    return ApiResponse(data={"message": "欢迎使用 py_ref API"})
+    return respond({"message": "欢迎使用 py_ref API"})
 
 
 @app.get(
@@ -196,14 +554,28 @@ async def root():
 async def health_check():
     """健康检查端点。"""
     logger.info("执行健康检查")
-    return ApiResponse(
-        data={
+    return respond(
+        {
             "status": "healthy",
             "timestamp": datetime.now().isoformat(),
         }
     )
 
 
+@app.get(
+    "/api/v1/metrics",
+    summary="运行指标",
+    description="以 Prometheus 文本格式导出请求耗时直方图、进行中请求数与缓存统计",
+    tags=["系统"],
+    response_class=PlainTextResponse,
+)
+async def metrics(request: Request):
+    """导出进程内运行指标。"""
+    return PlainTextResponse(
+        request.app.state.metrics.render(), media_type=METRICS_CONTENT_TYPE
+    )
+
+
 @app.get(
     "/api/v1/users/{user_id}",
     response_model=ApiResponse,
@@ -211,41 +583,69 @@ async def health_check():
     description="根据用户 ID 获取用户信息",
     tags=["用户管理"],
 )
-async def get_user(user_id: int):
+async def get_user(
+    user_id: int,
+    request: Request,
+    repository: UserRepository = Depends(get_user_repository),
+    cache: LRUCache = Depends(get_user_cache),
+    reads: SingleFlight = Depends(get_user_reads),
+):
     """获取单个用户信息。
 
+    缓存中保存的是每个记录版本编码后的完整 JSON 响应体，命中时直接返回原始字节，
+    跳过模型构建与 ``response_model`` 校验/序列化。缓存未命中时，同一用户的
+    并发请求合并为一次仓储读取。响应携带基于记录版本的 ETag，
+    请求头 ``If-None-Match`` 命中时返回不带响应体的 304。
+
     Args:
         user_id: 用户 ID
+        request: 当前请求
+        repository: 用户仓储
+        cache: 用户响应缓存
+        reads: 用户读取的请求合并器
 
     Returns:
         包含用户信息的响应
 
     Raises:
-        HTTPException: 用户不存在时抛出 404 错误
+        HTTPException: 用户 ID 无效时抛出 400 错误，用户不存在时抛出 404 错误
     """
-    logger.info(f"获取用户信息: user_id={user_id}")
+    logger.info("获取用户信息: user_id=%s", user_id)
 
-    # 模拟数据库查询
     if user_id <= 0:
-        logger.warning(f"无效的用户 ID: {user_id}")
+        logger.warning("无效的用户 ID: %s", user_id)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="无效的用户 ID"
         )
 
-    if user_id > 100:
-        logger.warning(f"用户不存在: user_id={user_id}")
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="用户不存在")
-
-    user = UserResponse(
-        id=user_id,
-        name=f"用户{user_id}",
-        email=f"user{user_id}@example.com",
-        age=20 + user_id,
-        created_at=datetime.now(),
-    )
+    cached = cache.get(user_id)
+    if cached is None:
+
+        async def load() -> Optional[tuple[str, bytes]]:
+            # 读取期间若有写入使该用户失效，结果只返回给本次等待者，不回填缓存
+            since = cache.epoch
+            record = await repository.get(user_id)
+            if record is None:
+                return None
+            entry = (make_etag(record), encode_user_body(record))
+            cache.set(user_id, entry, since=since)
+            return entry
+
+        cached = await reads.do(user_id, load)
+        if cached is None:
+            logger.warning("用户不存在: user_id=%s", user_id)
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="用户不存在"
+            )
+    etag, body = cached
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+        )
 
-    logger.info(f"成功获取用户: {user.name}")
-    return ApiResponse(data=user.model_dump())
+    logger.info("成功获取用户: user_id=%s", user_id)
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
 
 
 @app.post(
@@ -256,28 +656,39 @@ async def get_user(user_id: int):
     description="创建新用户",
     tags=["用户管理"],
 )
-async def create_user(user: UserCreate):
+async def create_user(
+    user: UserCreate, repository: UserRepository = Depends(get_user_repository)
+):
     """创建新用户。
 
     Args:
         user: 用户创建请求数据
+        repository: 用户仓储
 
     Returns:
         包含新创建用户信息的响应
+
+    Raises:
+        HTTPException: 邮箱已存在时抛出 409 错误
     """
-    logger.info(f"创建用户: name={user.name}, email={user.email}")
-
-    # 模拟创建用户
-    new_user = UserResponse(
-        id=1,
-        name=user.name,
-        email=user.email,
-        age=user.age,
-        created_at=datetime.now(),
-    )
+    logger.info("创建用户: name=%s, email=%s", user.name, user.email)
+
+    try:
+        record = await repository.create(name=user.name, email=user.email, age=user.age)
+    except DuplicateEmailError as exc:
+        logger.warning("邮箱已存在: email=%s", exc.email)
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="邮箱已存在"
+        ) from exc
 
-    logger.info(f"成功创建用户: id={new_user.id}, name={new_user.name}")
-    return ApiResponse(data=new_user.model_dump(), message="用户创建成功")
+    new_user = UserResponse.from_record(record)
+
+    logger.info("成功创建用户: id=%s, name=%s", new_user.id, new_user.name)
+    return respond(
+        new_user.model_dump(),
+        message="用户创建成功",
+        status_code=status.HTTP_201_CREATED,
+    )
 
 
 @app.put(
@@ -287,37 +698,50 @@ async def create_user(user: UserCreate):
     description="更新用户信息",
     tags=["用户管理"],
 )
-async def update_user(user_id: int, user: UserUpdate):
+async def update_user(
+    user_id: int,
+    user: UserUpdate,
+    repository: UserRepository = Depends(get_user_repository),
+    cache: LRUCache = Depends(get_user_cache),
+    reads: SingleFlight = Depends(get_user_reads),
+):
     """更新用户信息。
 
     Args:
         user_id: 用户 ID
         user: 用户更新请求数据
+        repository: 用户仓储
+        cache: 用户响应缓存，更新后失效对应条目
+        reads: 用户读取的请求合并器，更新后移除对应的进行中读取
 
     Returns:
         包含更新后用户信息的响应
 
     Raises:
-        HTTPException: 用户不存在时抛出 404 错误
+        HTTPException: 用户不存在时抛出 404 错误，邮箱冲突时抛出 409 错误
     """
-    logger.info(f"更新用户: user_id={user_id}")
+    logger.info("更新用户: user_id=%s", user_id)
+
+    # 只应用客户端显式提供的字段
+    changes = user.model_dump(exclude_unset=True, exclude_none=True)
+    try:
+        record = await repository.update(user_id, changes)
+    except DuplicateEmailError as exc:
+        logger.warning("邮箱已存在: email=%s", exc.email)
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="邮箱已存在"
+        ) from exc
+    finally:
+        invalidate_user(cache, reads, user_id)
 
-    # 模拟检查用户是否存在
-    if user_id > 100:
-        logger.warning(f"用户不存在: user_id={user_id}")
+    if record is None:
+        logger.warning("用户不存在: user_id=%s", user_id)
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="用户不存在")
 
-    # 模拟更新用户
-    updated_user = UserResponse(
-        id=user_id,
-        name=user.name or f"用户{user_id}",
-        email=user.email or f"user{user_id}@example.com",
-        age=user.age or 25,
-        created_at=datetime.now(),
-    )
+    updated_user = UserResponse.from_record(record)
 
-    logger.info(f"成功更新用户: id={updated_user.id}, name={updated_user.name}")
-    return ApiResponse(data=updated_user.model_dump(), message="用户更新成功")
+    logger.info("成功更新用户: id=%s, name=%s", updated_user.id, updated_user.name)
+    return respond(updated_user.model_dump(), message="用户更新成功")
 
 
 @app.delete(
@@ -327,11 +751,19 @@ async def update_user(user_id: int, user: UserUpdate):
     description="删除指定用户",
     tags=["用户管理"],
 )
-async def delete_user(user_id: int):
+async def delete_user(
+    user_id: int,
+    repository: UserRepository = Depends(get_user_repository),
+    cache: LRUCache = Depends(get_user_cache),
+    reads: SingleFlight = Depends(get_user_reads),
+):
     """删除用户。
 
     Args:
         user_id: 用户 ID
+        repository: 用户仓储
+        cache: 用户响应缓存，删除后失效对应条目
+        reads: 用户读取的请求合并器，删除后移除对应的进行中读取
 
     Returns:
         删除成功的响应
@@ -339,58 +771,381 @@ async def delete_user(user_id: int):
     Raises:
         HTTPException: 用户不存在时抛出 404 错误
     """
-    logger.info(f"删除用户: user_id={user_id}")
+    logger.info("删除用户: user_id=%s", user_id)
 
-    # 模拟检查用户是否存在
-    if user_id > 100:
-        logger.warning(f"用户不存在: user_id={user_id}")
+    deleted = await repository.delete(user_id)
+    invalidate_user(cache, reads, user_id)
+    if not deleted:
+        logger.warning("用户不存在: user_id=%s", user_id)
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="用户不存在")
 
-    # 模拟删除用户
-    logger.info(f"成功删除用户: user_id={user_id}")
-    return ApiResponse(message="用户删除成功")
+    logger.info("成功删除用户: user_id=%s", user_id)
+    return respond(message="用户删除成功")
 
 
 @app.get(
     "/api/v1/users",
     response_model=ApiResponse,
     summary="获取用户列表",
-    description="获取所有用户列表（支持分页）",
+    description="获取用户列表（基于游标的键集分页，兼容偏移分页）",
     tags=["用户管理"],
 )
-async def list_users(skip: int = 0, limit: int = 10):
+async def list_users(
+    after: Optional[str] = Query(None, description="上一页返回的 next_cursor"),
+    limit: int = Query(
+        10, ge=1, le=ApiConfig.MAX_PAGE_SIZE, description="返回的最大记录数"
+    ),
+    skip: int = Query(
+        0, ge=0, deprecated=True, description="跳过的记录数（偏移分页，已弃用）"
+    ),
+    ids: Optional[str] = Query(
+        None, description="逗号分隔的用户 ID，指定后按 ID 批量获取而不是分页"
+    ),
+    include_total: Optional[bool] = Query(
+        None, description="是否统计用户总数，默认只在首页与偏移分页时统计"
+    ),
+    repository: UserRepository = Depends(get_user_repository),
+):
     """获取用户列表。
 
+    推荐使用 ``after`` 游标翻页：按 ID 索引定位，翻到多深延迟都保持不变。
+    ``skip`` 偏移分页的代价随偏移量线性增长，仅为兼容旧客户端保留。
+    指定 ``ids`` 时改为批量获取，见 ``batch_get_users``。
+
+    ``total`` 需要统计全表（SQLite 上为 ``COUNT(*)``），代价随数据量增长，
+    因此游标翻页（指定 ``after``）时默认不统计、返回 None，
+    需要时通过 ``include_total=true`` 显式请求。
+
     Args:
-        skip: 跳过的记录数
-        limit: 返回的最大记录数
+        after: 分页游标，为空时从第一条记录开始
+        limit: 返回的最大记录数，上限为 ``ApiConfig.MAX_PAGE_SIZE``
+        skip: 跳过的记录数（与 ``after`` 互斥）
+        ids: 逗号分隔的用户 ID 列表
+        include_total: 是否统计总数，为 None 时只在未指定 ``after`` 时统计
+        repository: 用户仓储
 
     Returns:
-        包含用户列表的响应
+        包含用户列表和 ``next_cursor`` 的响应，没有下一页时 ``next_cursor`` 为 None
+
+    Raises:
+        HTTPException: 游标或 ID 列表无效、同时指定 ``after`` 与 ``skip`` 时抛出 400 错误
+    """
+    if ids is not None:
+        return await _get_many(_parse_ids(ids), repository)
+
+    logger.info("获取用户列表: after=%s, skip=%s, limit=%s", after, skip, limit)
+
+    # 多取一条用于判断是否还有下一页
+    if after is not None:
+        if skip:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="after 与 skip 不能同时使用",
+            )
+        records = await repository.list_after(decode_cursor(after), limit + 1)
+    elif skip:
+        records = await repository.list_users(skip=skip, limit=limit + 1)
+    else:
+        records = await repository.list_after(0, limit + 1)
+
+    has_more = len(records) > limit
+    records = records[:limit]
+    users = [UserResponse.from_record(record) for record in records]
+
+    if include_total is None:
+        include_total = after is None
+
+    logger.info("成功获取 %s 个用户", len(users))
+    return respond(
+        {
+            "total": await repository.count() if include_total else None,
+            "skip": skip,
+            "limit": limit,
+            "users": [user.model_dump() for user in users],
+            "next_cursor": encode_cursor(records[-1].id) if has_more else None,
+        }
+    )
+
+
+async def _export_ndjson(
+    request: Request, repository: UserRepository, batch_size: int
+) -> AsyncIterator[bytes]:
+    """逐批读取用户并编码为 NDJSON 字节块。
+
+    每批数据在发送完成（即客户端读走）之后才会读取下一批，
+    因此内存占用与总数据量无关；客户端断开后立即停止读取。
     """
-    logger.info(f"获取用户列表: skip={skip}, limit={limit}")
+    exported = 0
+    async for batch in repository.iter_batches(batch_size):
+        if await request.is_disconnected():
+            logger.info("客户端已断开，导出中止: 已导出 %s 个用户", exported)
+            return
+        lines = [
+            json.dumps(record.to_dict(), ensure_ascii=False, default=_json_default)
+            for record in batch
+        ]
+        exported += len(lines)
+        yield ("\n".join(lines) + "\n").encode()
+    logger.info("成功导出 %s 个用户", exported)
+
+
+def _json_default(value: Any) -> Any:
+    """NDJSON 编码时处理 json 模块不支持的类型。"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"无法序列化的类型: {type(value).__name__}")
+
 
-    # 模拟分页查询
+@app.get(
+    "/api/v1/users:export",
+    summary="导出用户",
+    description="以 NDJSON 流式导出全部用户，每行一个 JSON 对象",
+    tags=["用户管理"],
+    response_class=StreamingResponse,
+)
+async def export_users(
+    request: Request, repository: UserRepository = Depends(get_user_repository)
+):
+    """流式导出全部用户。
+
+    响应使用分块传输编码，按 ID 升序逐批发送，内存占用恒定。
+
+    Args:
+        request: 当前请求，用于检测客户端断开
+        repository: 用户仓储
+
+    Returns:
+        ``application/x-ndjson`` 流式响应
+    """
+    logger.info("导出用户")
+    return StreamingResponse(
+        _export_ndjson(request, repository, ApiConfig.EXPORT_BATCH_SIZE),
+        media_type="application/x-ndjson",
+    )
+
+
+# ==================== 批量操作 ====================
+
+
+def _parse_ids(raw: str) -> list[int]:
+    """解析逗号分隔的用户 ID 列表。
+
+    Raises:
+        HTTPException: 格式无效或数量超出上限时抛出 400 错误
+    """
+    try:
+        user_ids = [int(part) for part in raw.split(",") if part.strip()]
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="无效的用户 ID 列表"
+        ) from exc
+    if not user_ids or len(user_ids) > ApiConfig.MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"用户 ID 数量必须在 1 到 {ApiConfig.MAX_BATCH_SIZE} 之间",
+        )
+    return user_ids
+
+
+async def _get_many(user_ids: list[int], repository: UserRepository) -> Any:
+    """一次仓储查询获取多个用户，按请求顺序返回找到的用户与缺失的 ID。"""
+    logger.info("批量获取用户: count=%s", len(user_ids))
+
+    # 去重并保持请求顺序
+    unique_ids = list(dict.fromkeys(user_ids))
+    found = await repository.get_many(unique_ids)
     users = [
-        UserResponse(
-            id=i,
-            name=f"用户{i}",
-            email=f"user{i}@example.com",
-            age=20 + i,
-            created_at=datetime.now(),
+        UserResponse.from_record(found[user_id]).model_dump()
+        for user_id in unique_ids
+        if user_id in found
+    ]
+    missing = [user_id for user_id in unique_ids if user_id not in found]
+
+    logger.info("批量获取完成: 找到 %s, 缺失 %s", len(users), len(missing))
+    return respond({"users": users, "missing": missing})
+
+
+@app.post(
+    "/api/v1/users:batchGet",
+    response_model=ApiResponse,
+    summary="批量获取用户",
+    description="按 ID 列表一次获取多个用户，适合 ID 较多、不便放入查询字符串的场景",
+    tags=["用户管理"],
+)
+async def batch_get_users(
+    request: UserBatchGetRequest,
+    repository: UserRepository = Depends(get_user_repository),
+):
+    """批量获取用户。
+
+    与 ``GET /api/v1/users?ids=1,2,3`` 等价，所有 ID 在一次仓储查询中解析。
+
+    Args:
+        request: 批量获取请求数据
+        repository: 用户仓储
+
+    Returns:
+        包含找到的用户列表 ``users`` 与缺失 ID 列表 ``missing`` 的响应
+    """
+    return await _get_many(request.ids, repository)
+
+
+def _item_result(
+    code: int, data: Optional[dict[str, Any]] = None, message: str = "成功"
+) -> dict[str, Any]:
+    """构建批量操作中单个条目的结果，格式与 ApiResponse 一致。"""
+    return {"code": code, "data": data, "message": message}
+
+
+def _batch_response(results: list[dict[str, Any]], message: str) -> Any:
+    """汇总批量操作结果并记录日志。"""
+    succeeded = sum(1 for result in results if result["code"] == ResponseCode.SUCCESS)
+    failed = len(results) - succeeded
+    logger.info("%s: 成功 %s, 失败 %s", message, succeeded, failed)
+    return respond(
+        {"succeeded": succeeded, "failed": failed, "results": results},
+        message=message,
+    )
+
+
+_NOT_FOUND_RESULT = _item_result(ResponseCode.NOT_FOUND, message="用户不存在")
+_CONFLICT_RESULT = _item_result(ResponseCode.CONFLICT, message="邮箱已存在")
+
+
+@app.post(
+    "/api/v1/users:batchCreate",
+    response_model=ApiResponse,
+    summary="批量创建用户",
+    description="在一次请求中创建多个用户，逐条返回结果",
+    tags=["用户管理"],
+)
+async def batch_create_users(
+    request: UserBatchCreateRequest,
+    repository: UserRepository = Depends(get_user_repository),
+):
+    """批量创建用户。
+
+    全部条目在一次请求中完成校验，并以一次批量操作写入仓储。
+    单条失败（如邮箱冲突）不影响其他条目。
+
+    Args:
+        request: 批量创建请求数据
+        repository: 用户仓储
+
+    Returns:
+        与请求条目一一对应的结果列表及成功/失败计数
+    """
+    logger.info("批量创建用户: count=%s", len(request.items))
+
+    outcomes = await repository.create_many(
+        [item.model_dump() for item in request.items]
+    )
+    results = [
+        (
+            _CONFLICT_RESULT
+            if isinstance(outcome, DuplicateEmailError)
+            else _item_result(
+                ResponseCode.SUCCESS, UserResponse.from_record(outcome).model_dump()
+            )
         )
-        for i in range(skip + 1, skip + limit + 1)
+        for outcome in outcomes
     ]
 
-    logger.info(f"成功获取 {len(users)} 个用户")
-    return ApiResponse(
-        data={
-            "total": 100,
-            "skip": skip,
-            "limit": limit,
-            "users": [user.model_dump() for user in users],
-        }
+    return _batch_response(results, "批量创建完成")
+
+
+@app.post(
+    "/api/v1/users:batchUpdate",
+    response_model=ApiResponse,
+    summary="批量更新用户",
+    description="在一次请求中更新多个用户，逐条返回结果",
+    tags=["用户管理"],
+)
+async def batch_update_users(
+    request: UserBatchUpdateRequest,
+    repository: UserRepository = Depends(get_user_repository),
+    cache: LRUCache = Depends(get_user_cache),
+    reads: SingleFlight = Depends(get_user_reads),
+):
+    """批量更新用户。
+
+    Args:
+        request: 批量更新请求数据
+        repository: 用户仓储
+        cache: 用户响应缓存，更新后失效对应条目
+        reads: 用户读取的请求合并器，更新后移除对应的进行中读取
+
+    Returns:
+        与请求条目一一对应的结果列表及成功/失败计数
+    """
+    logger.info("批量更新用户: count=%s", len(request.items))
+
+    outcomes = await repository.update_many(
+        [
+            (
+                item.id,
+                item.model_dump(exclude={"id"}, exclude_unset=True, exclude_none=True),
+            )
+            for item in request.items
+        ]
     )
+    for item in request.items:
+        invalidate_user(cache, reads, item.id)
+    results = []
+    for outcome in outcomes:
+        if outcome is None:
+            results.append(_NOT_FOUND_RESULT)
+        elif isinstance(outcome, DuplicateEmailError):
+            results.append(_CONFLICT_RESULT)
+        else:
+            results.append(
+                _item_result(
+                    ResponseCode.SUCCESS, UserResponse.from_record(outcome).model_dump()
+                )
+            )
+
+    return _batch_response(results, "批量更新完成")
+
+
+@app.post(
+    "/api/v1/users:batchDelete",
+    response_model=ApiResponse,
+    summary="批量删除用户",
+    description="在一次请求中删除多个用户，逐条返回结果",
+    tags=["用户管理"],
+)
+async def batch_delete_users(
+    request: UserBatchDeleteRequest,
+    repository: UserRepository = Depends(get_user_repository),
+    cache: LRUCache = Depends(get_user_cache),
+    reads: SingleFlight = Depends(get_user_reads),
+):
+    """批量删除用户。
+
+    Args:
+        request: 批量删除请求数据
+        repository: 用户仓储
+        cache: 用户响应缓存，删除后失效对应条目
+        reads: 用户读取的请求合并器，删除后移除对应的进行中读取
+
+    Returns:
+        与请求 ID 一一对应的结果列表及成功/失败计数
+    """
+    logger.info("批量删除用户: count=%s", len(request.ids))
+
+    deleted = await repository.delete_many(request.ids)
+    for user_id in request.ids:
+        invalidate_user(cache, reads, user_id)
+    results = [
+        (
+            _item_result(ResponseCode.SUCCESS, {"id": user_id})
+            if ok
+            else _NOT_FOUND_RESULT
+        )
+        for user_id, ok in zip(request.ids, deleted, strict=True)
+    ]
+
+    return _batch_response(results, "批量删除完成")
 
 
 # ==================== 主函数 ====================
@@ -399,12 +1154,13 @@ async def list_users(skip: int = 0, limit: int = 10):
 def main():
     """运行 FastAPI 应用。
 
-    使用 uvicorn 启动服务器。
+    通过 ``py_ref.server`` 以导入字符串方式启动 uvicorn 服务（配置了
+    ``PY_REF_SQLITE_PATH`` 时默认多 worker），参数见 ``python -m py_ref.server --help``。
     """
-    import uvicorn
+    from py_ref.server import serve
 
     logger.info("启动 FastAPI 服务器...")
-    uvicorn.run(app, host="0.0.0.0", port=8000, log_level="info")
+    serve()
 
 
 if __name__ == "__main__":
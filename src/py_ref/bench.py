@@ -0,0 +1,683 @@
+"""HTTP 负载基准测试 - 按端点测量吞吐量与延迟分位数。
+
+默认在进程内通过 ASGI 直接驱动应用（不经过网络栈），也可以启动本地 uvicorn
+或指向已运行的服务。结果可写入 JSON，并与基线比较：吞吐量下降或 p99 上升
+超过阈值时以非零状态码退出，可用作 CI 中的性能回归门禁。
+
+依赖 httpx，请先安装 bench 附加依赖：``uv pip install -e ".[bench]"``。
+
+用法:
+    python -m py_ref.bench --requests 2000 --concurrency 32 --output bench.json
+    python -m py_ref.bench --uvicorn --workers 4
+    python -m py_ref.bench --baseline bench.json --threshold 0.1
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import math
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Iterator,
+    NamedTuple,
+    Optional,
+    Sequence,
+)
+
+from rich.table import Table
+
+from py_ref.logger import console, print_error, print_header, print_success
+from py_ref.responses import JSON_BACKEND
+from py_ref.server import shared_storage
+
+try:
+    import httpx
+except ImportError as exc:  # pragma: no cover - 取决于运行环境
+    raise ImportError(
+        'py_ref.bench 需要 httpx，请安装 bench 附加依赖: pip install "py_ref[bench]"'
+    ) from exc
+
+# ==================== 场景定义 ====================
+
+
+class RequestSpec(NamedTuple):
+    """一次基准请求。"""
+
+    method: str
+    url: str
+    json: Any = None
+    headers: Optional[dict[str, str]] = None
+
+
+@dataclass
+class BenchContext:
+    """一次基准运行共享的数据。"""
+
+    # 本次运行的唯一标识，用于生成不冲突的邮箱
+    token: str = field(default_factory=lambda: uuid.uuid4().hex[:8])
+    # 预置用户的 ID，读类场景循环使用
+    user_ids: list[int] = field(default_factory=list)
+    # 各场景在准备阶段保存的数据
+    data: dict[str, Any] = field(default_factory=dict)
+
+    def user_id(self, i: int) -> int:
+        """按序号循环取一个预置用户 ID。"""
+        return self.user_ids[i % len(self.user_ids)]
+
+    def email(self, scenario: str, i: int) -> str:
+        """生成本次运行内唯一的邮箱。"""
+        return f"bench-{self.token}-{scenario}-{i}@example.com"
+
+
+Prepare = Callable[[httpx.AsyncClient, BenchContext, int], Awaitable[None]]
+
+
+@dataclass
+class Endpoint:
+    """一个基准场景：如何构造第 i 个请求、期望的状态码及可选的准备步骤。"""
+
+    name: str
+    build: Callable[[int, BenchContext], RequestSpec]
+    expected: tuple[int, ...] = (200,)
+    # 准备步骤不计时，参数为 (客户端, 上下文, 将要发送的请求总数)
+    prepare: Optional[Prepare] = None
+
+
+async def create_users(
+    client: httpx.AsyncClient, context: BenchContext, prefix: str, count: int
+) -> list[int]:
+    """通过批量接口创建 ``count`` 个用户并返回其 ID。"""
+    ids: list[int] = []
+    for start in range(0, count, 500):
+        items = [
+            {"name": f"压测用户{i}", "email": context.email(prefix, i), "age": 30}
+            for i in range(start, min(start + 500, count))
+        ]
+        response = await client.post("/api/v1/users:batchCreate", json={"items": items})
+        response.raise_for_status()
+        ids.extend(
+            result["data"]["id"]
+            for result in response.json()["data"]["results"]
+            if result["code"] == 0
+        )
+    return ids
+
+
+async def _prepare_not_modified(
+    client: httpx.AsyncClient, context: BenchContext, count: int
+) -> None:
+    user_id = context.user_id(0)
+    response = await client.get(f"/api/v1/users/{user_id}")
+    context.data["etag"] = (user_id, response.headers["etag"])
+
+
+async def _prepare_delete(
+    client: httpx.AsyncClient, context: BenchContext, count: int
+) -> None:
+    context.data["delete_ids"] = await create_users(client, context, "delete", count)
+
+
+async def _prepare_batch_delete(
+    client: httpx.AsyncClient, context: BenchContext, count: int
+) -> None:
+    context.data["batch_delete_ids"] = await create_users(
+        client, context, "batch-delete", count * BATCH_SIZE
+    )
+
+
+def _not_modified(i: int, context: BenchContext) -> RequestSpec:
+    user_id, etag = context.data["etag"]
+    return RequestSpec("GET", f"/api/v1/users/{user_id}", None, {"If-None-Match": etag})
+
+
+def _batch_ids(i: int, context: BenchContext) -> list[int]:
+    return [context.user_id(i * BATCH_SIZE + k) for k in range(BATCH_SIZE)]
+
+
+# 批量类场景每个请求包含的条目数
+BATCH_SIZE = 10
+
+# 读类场景在前、写类场景在后，保证条件请求使用的 ETag 在测量期间不变
+ENDPOINTS: dict[str, Endpoint] = {
+    endpoint.name: endpoint
+    for endpoint in (
+        Endpoint("root", lambda i, c: RequestSpec("GET", "/")),
+        Endpoint("health", lambda i, c: RequestSpec("GET", "/api/v1/health")),
+        Endpoint(
+            "get_user",
+            lambda i, c: RequestSpec("GET", f"/api/v1/users/{c.user_id(i)}"),
+        ),
+        Endpoint(
+            "get_user_not_modified",
+            _not_modified,
+            expected=(304,),
+            prepare=_prepare_not_modified,
+        ),
+        Endpoint(
+            "list_users", lambda i, c: RequestSpec("GET", "/api/v1/users?limit=20")
+        ),
+        Endpoint(
+            "list_users_ids",
+            lambda i, c: RequestSpec(
+                "GET", "/api/v1/users?ids=" + ",".join(map(str, _batch_ids(i, c)))
+            ),
+        ),
+        Endpoint(
+            "batch_get",
+            lambda i, c: RequestSpec(
+                "POST", "/api/v1/users:batchGet", {"ids": _batch_ids(i, c)}
+            ),
+        ),
+        Endpoint("export", lambda i, c: RequestSpec("GET", "/api/v1/users:export")),
+        Endpoint("metrics", lambda i, c: RequestSpec("GET", "/api/v1/metrics")),
+        Endpoint(
+            "create_user",
+            lambda i, c: RequestSpec(
+                "POST",
+                "/api/v1/users",
+                {"name": "压测用户", "email": c.email("create", i), "age": 30},
+            ),
+            expected=(201,),
+        ),
+        Endpoint(
+            "update_user",
+            lambda i, c: RequestSpec(
+                "PUT", f"/api/v1/users/{c.user_id(i)}", {"age": i % 100}
+            ),
+        ),
+        Endpoint(
+            "batch_create",
+            lambda i, c: RequestSpec(
+                "POST",
+                "/api/v1/users:batchCreate",
+                {
+                    "items": [
+                        {
+                            "name": "压测用户",
+                            "email": c.email("batch", i * BATCH_SIZE + k),
+                        }
+                        for k in range(BATCH_SIZE)
+                    ]
+                },
+            ),
+        ),
+        Endpoint(
+            "batch_update",
+            lambda i, c: RequestSpec(
+                "POST",
+                "/api/v1/users:batchUpdate",
+                {"items": [{"id": user_id, "age": 40} for user_id in _batch_ids(i, c)]},
+            ),
+        ),
+        Endpoint(
+            "delete_user",
+            lambda i, c: RequestSpec(
+                "DELETE", f"/api/v1/users/{c.data['delete_ids'][i]}"
+            ),
+            prepare=_prepare_delete,
+        ),
+        Endpoint(
+            "batch_delete",
+            lambda i, c: RequestSpec(
+                "POST",
+                "/api/v1/users:batchDelete",
+                {
+                    "ids": c.data["batch_delete_ids"][
+                        i * BATCH_SIZE : (i + 1) * BATCH_SIZE
+                    ]
+                },
+            ),
+            prepare=_prepare_batch_delete,
+        ),
+    )
+}
+
+
+# ==================== 测量 ====================
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """返回已排序样本的 ``q`` 分位数（0 到 1，最近秩法）。"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values), max(1, math.ceil(q * len(sorted_values)))) - 1
+    return sorted_values[index]
+
+
+async def run_endpoint(
+    client: httpx.AsyncClient,
+    endpoint: Endpoint,
+    context: BenchContext,
+    requests: int,
+    concurrency: int,
+    warmup: int = 0,
+) -> dict[str, Any]:
+    """以固定并发对单个场景发送请求并统计结果。
+
+    参数:
+        client: HTTP 客户端
+        endpoint: 基准场景
+        context: 共享数据
+        requests: 计时的请求数
+        concurrency: 并发发送请求的协程数
+        warmup: 计时前先发送的请求数（不计入结果）
+
+    返回:
+        包含吞吐量、延迟分位数（毫秒）与错误数的字典
+    """
+    if endpoint.prepare is not None:
+        await endpoint.prepare(client, context, warmup + requests)
+
+    sequence = itertools.count()
+    latencies: list[float] = []
+    errors = 0
+
+    async def send(i: int, record: bool) -> None:
+        nonlocal errors
+        spec = endpoint.build(i, context)
+        start = time.perf_counter()
+        try:
+            response = await client.request(
+                spec.method, spec.url, json=spec.json, headers=spec.headers
+            )
+            await response.aread()
+        except httpx.TransportError:
+            # 超时、连接被拒绝等传输错误计入错误数，不中断整个基准
+            if record:
+                errors += 1
+            return
+        elapsed = time.perf_counter() - start
+        if record:
+            latencies.append(elapsed)
+            if response.status_code not in endpoint.expected:
+                errors += 1
+
+    async def worker(total: int, record: bool) -> None:
+        while (i := next(sequence)) < total:
+            await send(i, record)
+
+    await asyncio.gather(*(worker(warmup, False) for _ in range(concurrency)))
+    # 预热用掉的序号不再复用，写类场景的请求因此不会冲突
+    offset = warmup
+    sequence = itertools.count(offset)
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(offset + requests, True) for _ in range(concurrency)))
+    duration = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "duration_s": duration,
+        "rps": requests / duration if duration else 0.0,
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+async def run_suite(
+    client: httpx.AsyncClient,
+    names: Sequence[str],
+    requests: int,
+    concurrency: int,
+    endpoint_concurrency: Optional[dict[str, int]] = None,
+    warmup: int = 0,
+    seed_users: int = 1000,
+) -> dict[str, dict[str, Any]]:
+    """预置用户后依次运行选中的场景。
+
+    参数:
+        client: 指向被测服务的 HTTP 客户端
+        names: 场景名称，按 ``ENDPOINTS`` 中的顺序运行
+        requests: 每个场景计时的请求数
+        concurrency: 默认并发数
+        endpoint_concurrency: 按场景覆盖的并发数
+        warmup: 每个场景的预热请求数
+        seed_users: 预置用户数
+
+    返回:
+        场景名称到统计结果的映射
+    """
+    context = BenchContext()
+    context.user_ids = await create_users(client, context, "seed", seed_users)
+    overrides = endpoint_concurrency or {}
+    results = {}
+    for name in ENDPOINTS:
+        if name not in names:
+            continue
+        results[name] = await run_endpoint(
+            client,
+            ENDPOINTS[name],
+            context,
+            requests,
+            overrides.get(name, concurrency),
+            warmup,
+        )
+    return results
+
+
+# ==================== 运行模式 ====================
+
+
+@contextmanager
+def log_level(level: str) -> Iterator[None]:
+    """临时设置所有 ``py_ref`` 日志记录器的级别，退出时恢复。"""
+    loggers = [
+        logging.getLogger(name)
+        for name in list(logging.root.manager.loggerDict)
+        if name == "py_ref" or name.startswith("py_ref.")
+    ]
+    previous = [logger.level for logger in loggers]
+    for logger in loggers:
+        logger.setLevel(level.upper())
+    try:
+        yield
+    finally:
+        for logger, value in zip(loggers, previous, strict=True):
+            logger.setLevel(value)
+
+
+async def run_in_process(
+    log_level_name: str = "WARNING", **options: Any
+) -> dict[str, dict[str, Any]]:
+    """在进程内通过 ASGI 驱动应用（包括其生命周期）运行基准。
+
+    参数:
+        log_level_name: 运行期间 ``py_ref`` 日志记录器的级别
+        options: 传给 ``run_suite`` 的参数
+    """
+    from py_ref.api import app
+
+    with log_level(log_level_name):
+        return await _run_app(app, **options)
+
+
+async def _run_app(app: Any, **options: Any) -> dict[str, dict[str, Any]]:
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as client:
+            return await run_suite(client, **options)
+
+
+async def run_against(url: str, **options: Any) -> dict[str, dict[str, Any]]:
+    """对已运行的服务运行基准。"""
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        return await run_suite(client, **options)
+
+
+def _free_port() -> int:
+    """获取一个空闲的本地端口。"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def uvicorn_server(
+    workers: int, log_level_name: str = "WARNING", startup_timeout: float = 30.0
+) -> Iterator[str]:
+    """通过 ``py_ref.server`` 启动本地 uvicorn，等待健康检查通过，退出时终止。
+
+    子进程中 uvicorn 与 ``py_ref`` 日志记录器使用同一级别，与进程内模式一致。
+    多 worker 且未配置共享存储时使用临时 SQLite 数据库，使各 worker 看到同一份数据。
+
+    参数:
+        workers: worker 进程数
+        log_level_name: 子进程的日志级别
+        startup_timeout: 等待服务就绪的最长秒数
+
+    返回:
+        服务地址
+    """
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}"
+    env = dict(os.environ, PY_REF_LOG_LEVEL=log_level_name.upper())
+    with tempfile.TemporaryDirectory(prefix="py_ref-bench-") as directory:
+        if workers > 1 and not shared_storage():
+            env["PY_REF_SQLITE_PATH"] = str(Path(directory) / "users.db")
+        process = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "py_ref.server",
+                "--host",
+                "127.0.0.1",
+                "--port",
+                str(port),
+                "--workers",
+                str(workers),
+                "--log-level",
+                log_level_name.lower(),
+            ],
+            env=env,
+        )
+        try:
+            _wait_ready(process, url, startup_timeout)
+            yield url
+        finally:
+            process.terminate()
+            process.wait()
+
+
+def _wait_ready(process: subprocess.Popen, url: str, timeout: float) -> None:
+    """等待服务的健康检查通过。"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("uvicorn 启动失败")
+        try:
+            if httpx.get(f"{url}/api/v1/health", timeout=1).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError("等待 uvicorn 启动超时")
+
+
+# ==================== 基线比较 ====================
+
+
+class Regression(NamedTuple):
+    """一项超过阈值的性能回归。"""
+
+    endpoint: str
+    metric: str
+    baseline: float
+    current: float
+
+    @property
+    def change(self) -> float:
+        """相对变化比例。"""
+        return self.current / self.baseline - 1 if self.baseline else 0.0
+
+
+def compare(
+    current: dict[str, dict[str, Any]],
+    baseline: dict[str, dict[str, Any]],
+    threshold: float = 0.1,
+) -> list[Regression]:
+    """与基线比较，返回吞吐量下降或 p99 上升超过 ``threshold`` 的项。
+
+    只比较两份结果中都存在的场景。
+    """
+    regressions = []
+    for name, result in current.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result["rps"] < base["rps"] * (1 - threshold):
+            regressions.append(Regression(name, "rps", base["rps"], result["rps"]))
+        if result["p99_ms"] > base["p99_ms"] * (1 + threshold):
+            regressions.append(
+                Regression(name, "p99_ms", base["p99_ms"], result["p99_ms"])
+            )
+    return regressions
+
+
+# ==================== 命令行 ====================
+
+
+def _parse_concurrency(spec: str) -> dict[str, int]:
+    """解析 ``场景=并发数`` 形式、逗号分隔的并发覆盖配置。"""
+    overrides = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        name, _, value = item.partition("=")
+        if name.strip() not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"未知的场景: {name.strip()}")
+        overrides[name.strip()] = int(value)
+    return overrides
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """构建命令行参数解析器。"""
+    parser = argparse.ArgumentParser(
+        prog="python -m py_ref.bench", description="py_ref API 负载基准测试"
+    )
+    parser.add_argument(
+        "--endpoints",
+        default=",".join(ENDPOINTS),
+        help="逗号分隔的场景名称（默认全部）",
+    )
+    parser.add_argument("--requests", type=int, default=1000, help="每个场景的请求数")
+    parser.add_argument("--concurrency", type=int, default=32, help="默认并发数")
+    parser.add_argument(
+        "--endpoint-concurrency",
+        type=_parse_concurrency,
+        default={},
+        help="按场景覆盖并发数，如 export=4,get_user=128",
+    )
+    parser.add_argument("--warmup", type=int, default=100, help="每个场景的预热请求数")
+    parser.add_argument("--seed-users", type=int, default=1000, help="预置用户数")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", help="对已运行的服务压测，如 http://127.0.0.1:8000")
+    target.add_argument(
+        "--uvicorn", action="store_true", help="启动本地 uvicorn 后通过网络压测"
+    )
+    parser.add_argument("--workers", type=int, default=1, help="--uvicorn 的 worker 数")
+    parser.add_argument(
+        "--log-level",
+        default="WARNING",
+        help="py_ref 日志级别（进程内与 --uvicorn 模式，默认 WARNING，避免日志输出主导结果）",
+    )
+    parser.add_argument("--output", type=Path, help="将结果写入 JSON 文件")
+    parser.add_argument("--baseline", type=Path, help="用于比较的基线 JSON 文件")
+    parser.add_argument(
+        "--threshold", type=float, default=0.1, help="允许的回归比例（默认 0.1）"
+    )
+    return parser
+
+
+def print_results(results: dict[str, dict[str, Any]]) -> None:
+    """以表格形式打印结果。"""
+    table = Table()
+    table.add_column("场景", style="cyan")
+    table.add_column("并发", justify="right")
+    table.add_column("req/s", justify="right", style="green")
+    table.add_column("p50 (ms)", justify="right")
+    table.add_column("p95 (ms)", justify="right")
+    table.add_column("p99 (ms)", justify="right")
+    table.add_column("错误", justify="right", style="red")
+    for name, result in results.items():
+        table.add_row(
+            name,
+            str(result["concurrency"]),
+            f"{result['rps']:,.0f}",
+            f"{result['p50_ms']:.2f}",
+            f"{result['p95_ms']:.2f}",
+            f"{result['p99_ms']:.2f}",
+            str(result["errors"]),
+        )
+    console.print(table)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """运行基准测试，返回进程退出码（存在回归或错误时为 1）。"""
+    args = build_parser().parse_args(argv)
+    names = [name.strip() for name in args.endpoints.split(",") if name.strip()]
+    unknown = set(names) - set(ENDPOINTS)
+    if unknown:
+        print_error(f"未知的场景: {', '.join(sorted(unknown))}")
+        return 2
+
+    options = {
+        "names": names,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "endpoint_concurrency": args.endpoint_concurrency,
+        "warmup": args.warmup,
+        "seed_users": args.seed_users,
+    }
+    with ExitStack() as stack:
+        if args.uvicorn:
+            mode = f"uvicorn x{args.workers}"
+            url = stack.enter_context(uvicorn_server(args.workers, args.log_level))
+        elif args.url:
+            mode, url = args.url, args.url
+        else:
+            mode, url = "in-process", None
+
+        print_header(f"负载基准测试（{mode}，JSON 编码器: {JSON_BACKEND}）")
+        if url is None:
+            results = asyncio.run(run_in_process(args.log_level, **options))
+        else:
+            results = asyncio.run(run_against(url, **options))
+    print_results(results)
+
+    if args.output:
+        report = {
+            "meta": {
+                "mode": mode,
+                "json_backend": JSON_BACKEND,
+                "python": platform.python_version(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            },
+            "results": results,
+        }
+        args.output.write_text(json.dumps(report, ensure_ascii=False, indent=2))
+        print_success(f"结果已写入 {args.output}")
+
+    failed = sum(result["errors"] for result in results.values()) > 0
+    if failed:
+        print_error("存在非预期状态码的响应")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())["results"]
+        regressions = compare(results, baseline, args.threshold)
+        for item in regressions:
+            print_error(
+                f"{item.endpoint} {item.metric}: {item.baseline:.2f} -> "
+                f"{item.current:.2f} ({item.change:+.1%})"
+            )
+        if regressions:
+            failed = True
+        else:
+            print_success(f"未发现超过 {args.threshold:.0%} 的回归")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
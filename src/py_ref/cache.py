@@ -0,0 +1,149 @@
+"""进程内缓存模块 - 带 TTL 的有界 LRU 缓存。
+
+本模块提供：
+- LRU 淘汰 + TTL 过期的有界缓存
+- 失效纪元：防止失效之前开始的读取在失效之后回填旧值
+- 命中/未命中/淘汰/过期计数，便于接入监控
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Generic, Hashable, Optional, TypeVar
+
+V = TypeVar("V")
+
+
+class LRUCache(Generic[V]):
+    """带 TTL 的有界 LRU 缓存。
+
+    所有操作均为 O(1)。缓存不是线程安全的，应只在事件循环线程中使用。
+
+    回源读取与写入并发时，读取可能在写入使条目失效之后才回填旧值。读取开始前
+    记下 ``epoch``，回填时作为 ``since`` 传给 ``set``：该键在此之后被失效过时
+    不写入。最近失效的键最多记录 ``maxsize`` 个，更早的记录被遗忘后，早于
+    遗忘点开始的读取一律不回填（保守但不会写入旧值）。
+
+    示例:
+        >>> cache = LRUCache(maxsize=2, ttl=60)
+        >>> cache.set("a", 1)
+        >>> cache.get("a")
+        1
+        >>> since = cache.epoch
+        >>> cache.invalidate("a")
+        >>> cache.set("a", 0, since=since)  # 读取期间被失效，不回填
+        >>> cache.get("a") is None
+        True
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        参数:
+            maxsize: 最大条目数，为 0 时不缓存任何内容
+            ttl: 条目存活秒数，为 None 时永不过期
+            clock: 单调时钟，测试时可替换
+        """
+        if maxsize < 0:
+            raise ValueError("maxsize 不能为负数")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        # key -> (过期时间, 值)
+        self._data: OrderedDict[Hashable, tuple[float, V]] = OrderedDict()
+        # 失效纪元：每次失效加一；key -> 最近一次失效时的纪元
+        self._epoch = 0
+        self._invalidated: OrderedDict[Hashable, int] = OrderedDict()
+        # 早于该纪元开始的读取无法确认是否被失效过
+        self._forgotten = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Optional[V]:
+        """获取缓存值，不存在或已过期时返回 None。"""
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._data[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    @property
+    def epoch(self) -> int:
+        """当前失效纪元，在回源读取开始前记下，回填时传给 ``set(since=...)``。"""
+        return self._epoch
+
+    def _stale(self, key: Hashable, since: int) -> bool:
+        """判断 ``since`` 之后 ``key`` 是否被失效过。"""
+        invalidated = self._invalidated.get(key)
+        if invalidated is not None:
+            return invalidated > since
+        return self._forgotten > since
+
+    def set(self, key: Hashable, value: V, since: Optional[int] = None) -> None:
+        """写入缓存，超出容量时淘汰最久未使用的条目。
+
+        参数:
+            key: 缓存键
+            value: 缓存值
+            since: 读取 ``value`` 之前的 ``epoch``；该键在此之后被失效过时不写入
+        """
+        if self.maxsize == 0:
+            return
+        if since is not None and self._stale(key, since):
+            return
+        expires_at = float("inf") if self.ttl is None else self._clock() + self.ttl
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """移除指定条目（不存在时忽略），并使进行中的读取不再回填该键。"""
+        self._data.pop(key, None)
+        self._epoch += 1
+        self._invalidated[key] = self._epoch
+        self._invalidated.move_to_end(key)
+        while len(self._invalidated) > max(self.maxsize, 1):
+            _, self._forgotten = self._invalidated.popitem(last=False)
+
+    def clear(self) -> None:
+        """清空全部条目（保留统计计数），进行中的读取都不再回填。"""
+        self._data.clear()
+        self._epoch += 1
+        self._invalidated.clear()
+        self._forgotten = self._epoch
+
+    @property
+    def hit_ratio(self) -> float:
+        """命中率，尚无访问时为 0。"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict[str, Any]:
+        """返回缓存统计信息。"""
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": self.hit_ratio,
+        }
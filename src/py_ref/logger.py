@@ -6,16 +6,41 @@
 - 文件日志记录（支持自定义路径）
 - 多种日志级别
 - 结构化日志支持
+- 异步模式：处理器在后台线程中运行，调用方只需入队
+- JSON Lines 输出：每条记录一行 JSON，便于日志采集系统解析
+- 按大小/时间轮转日志文件，在后台线程中压缩旧文件并按数量保留
+- 批量写入：记录先写入内存缓冲区，按大小阈值或时间间隔一次性写出
+- 层级配置：``py_ref.*`` 模块日志记录器共享 ``py_ref`` 根记录器上的一组处理器
 """
 
+import atexit
+import gzip
+import json
 import logging
+import math
+import os
+import queue
+import re
+import shutil
+import sys
+import threading
+import time
+import traceback
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+from logging.handlers import BaseRotatingHandler, QueueHandler, QueueListener
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, NamedTuple, Optional
 
 from rich.console import Console
 from rich.logging import RichHandler
 from rich.traceback import install as install_rich_traceback
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 取决于运行环境
+    orjson = None
+
 # 安装 rich traceback 处理器以获得更好的错误显示
 install_rich_traceback(show_locals=True)
 
@@ -23,22 +48,764 @@ install_rich_traceback(show_locals=True)
 console = Console()
 
 
+# 包级根日志记录器名称，``py_ref.*`` 记录器都传播到它的处理器
+ROOT_LOGGER_NAME = "py_ref"
+
+
+def _in_hierarchy(name: str) -> bool:
+    """判断日志记录器是否属于 ``py_ref`` 层级。"""
+    return name == ROOT_LOGGER_NAME or name.startswith(ROOT_LOGGER_NAME + ".")
+
+
+# uvicorn 额外支持的级别名称
+_EXTRA_LEVELS = {"TRACE": 5}
+
+
+def parse_level(name: str) -> int:
+    """将级别名称（不区分大小写，含 uvicorn 的 ``trace``）或数字解析为日志级别。
+
+    无法识别的名称会抛出 ValueError，而不是在导入时以 KeyError 失败。
+
+    示例:
+        >>> parse_level("warning")
+        30
+        >>> parse_level("trace")
+        5
+    """
+    name = name.strip().upper()
+    if name.isdigit():
+        return int(name)
+    level = logging.getLevelNamesMapping().get(name, _EXTRA_LEVELS.get(name))
+    if level is None:
+        raise ValueError(f"无效的日志级别: {name}")
+    return level
+
+
 class LoggerConfig:
     """日志系统配置类"""
 
     DEFAULT_LOG_DIR = Path("logs")
     DEFAULT_LOG_FILE = "py_ref.log"
-    DEFAULT_LEVEL = logging.INFO
+    # 默认日志级别，与 py_ref.server 传给 uvicorn 的级别共用同一个环境变量
+    DEFAULT_LEVEL = parse_level(os.getenv("PY_REF_LOG_LEVEL", "INFO"))
     DEFAULT_FORMAT = "%(message)s"
     FILE_FORMAT = "%(asctime)s | %(levelname)-8s | %(name)s | %(message)s"
+    # 输出格式："rich" 为 Rich 控制台 + 文本文件，"json" 为控制台与文件都输出 JSON Lines
+    FORMAT = os.getenv("PY_REF_LOG_FORMAT", "rich")
+
+    # 日志抽样规则，如 "py_ref.access=1%,获取用户信息: user_id=%s=10/s"，
+    # 以及输出抑制统计摘要的间隔（秒）
+    SAMPLING = os.getenv("PY_REF_LOG_SAMPLING", "")
+    SAMPLING_SUMMARY_INTERVAL = float(os.getenv("PY_REF_LOG_SAMPLING_INTERVAL", "60"))
+
+    # 日志文件轮转：单个文件的最大字节数与最长秒数（0 表示不按该条件轮转），
+    # 保留的历史文件数，以及历史文件的压缩方式（"gzip" 或 "none"）
+    ROTATE_MAX_BYTES = int(os.getenv("PY_REF_LOG_MAX_BYTES", "0"))
+    ROTATE_INTERVAL = float(os.getenv("PY_REF_LOG_ROTATE_INTERVAL", "0"))
+    BACKUP_COUNT = int(os.getenv("PY_REF_LOG_BACKUP_COUNT", "7"))
+    COMPRESSION = os.getenv("PY_REF_LOG_COMPRESSION", "gzip")
+    # 轮转要求每个文件只有一个写入进程：启用后轮转的日志文件名带上进程号
+    # （如 py_ref.1234.log），保留数量按所有进程合计，已退出进程的文件被归档。
+    # 多 worker 启动时由 py_ref.server 自动设置
+    PER_PROCESS_FILE = os.getenv("PY_REF_LOG_PER_PROCESS", "0") == "1"
+
+    # 文件批量写入：缓冲区达到该字符数时写出（0 表示逐条写入），
+    # 以及缓冲区的最长驻留秒数；ERROR 及以上级别的记录总是立即写出
+    BUFFER_SIZE = int(os.getenv("PY_REF_LOG_BUFFER_SIZE", "0"))
+    FLUSH_INTERVAL = float(os.getenv("PY_REF_LOG_FLUSH_INTERVAL", "1.0"))
+
+    # 异步模式：处理器放在有界队列之后，由后台线程输出
+    ASYNC = os.getenv("PY_REF_LOG_ASYNC", "0") == "1"
+    QUEUE_SIZE = int(os.getenv("PY_REF_LOG_QUEUE_SIZE", "10000"))
+    # 队列已满时的策略："block" 等待、"drop_oldest" 丢弃最旧、"drop_new" 丢弃新记录
+    QUEUE_POLICY = os.getenv("PY_REF_LOG_QUEUE_POLICY", "block")
+
+
+# ==================== 延迟求值 ====================
+
+
+class Lazy:
+    """延迟求值的日志参数：只有记录真正被输出时才调用 ``func``，且最多调用一次。
+
+    用作 % 风格参数时在格式化消息时求值；用作 ``extra=`` 字段时由
+    ``JSONFormatter`` 求值。级别被过滤的记录完全不会调用 ``func``。
+
+    示例:
+        >>> logger.debug("缓存统计: %s", Lazy(cache.stats))
+        >>> logger.info("批量完成", extra={"summary": Lazy(lambda: summarize(results))})
+    """
+
+    __slots__ = ("func", "_value")
+
+    _UNSET = object()
+
+    def __init__(self, func: Callable[[], Any]):
+        self.func = func
+        self._value = Lazy._UNSET
+
+    def __call__(self) -> Any:
+        # 同一记录可能被多个处理器格式化，结果只计算一次
+        if self._value is Lazy._UNSET:
+            self._value = self.func()
+        return self._value
+
+    def __str__(self) -> str:
+        return str(self())
+
+    def __repr__(self) -> str:
+        return repr(self())
+
+
+# ==================== JSON 格式 ====================
+
+# LogRecord 的标准属性；不在其中的属性来自 ``extra=``，会作为额外字段输出
+_BASE_RECORD_ATTRS = frozenset(
+    logging.LogRecord("", logging.INFO, "", 0, "", None, None).__dict__
+)
+_RECORD_ATTRS = _BASE_RECORD_ATTRS | {"message", "asctime", "taskName", "_sampled"}
+
+
+class JSONFormatter(logging.Formatter):
+    """JSON Lines 格式化器：每条记录输出为一行 JSON。
+
+    固定字段依次为 ``ts``（UTC，ISO 8601，毫秒精度）、``level``、``logger``、
+    ``message``，随后是 ``extra=`` 传入的字段，有异常或堆栈时追加 ``exc_info`` /
+    ``stack_info``。时间戳的秒级部分按秒缓存，同一秒内的记录只拼接毫秒；
+    记录的属性数不多于标准属性数时跳过额外字段的扫描。
+
+    示例:
+        >>> logger.info("用户已创建", extra={"user_id": 1})
+        {"ts":"2024-01-01T12:00:00.123Z","level":"INFO","logger":"py_ref.api",
+         "message":"用户已创建","user_id":1}
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._second = -1
+        self._second_text = ""
+
+    def format_time(self, record: logging.LogRecord) -> str:
+        """格式化记录的时间戳。"""
+        second = int(record.created)
+        if second != self._second:
+            self._second_text = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+            self._second = second
+        return f"{self._second_text}.{int(record.msecs):03d}Z"
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": self.format_time(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        attrs = record.__dict__
+        if len(attrs) > len(_BASE_RECORD_ATTRS):
+            for key, value in attrs.items():
+                if key not in _RECORD_ATTRS:
+                    data[key] = value() if type(value) is Lazy else value
+        if record.exc_info:
+            data["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data["exc_info"] = record.exc_text
+        if record.stack_info:
+            data["stack_info"] = self.formatStack(record.stack_info)
+        return _dumps(data)
+
+
+def _dumps(data: dict) -> str:
+    """将一条日志编码为单行 JSON，无法序列化的值转为字符串。"""
+    if orjson is not None:
+        return orjson.dumps(data, default=str).decode()
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+# ==================== 抽样与限流 ====================
+
+
+class SamplingRule(NamedTuple):
+    """抽样规则：按比例保留（``ratio``）或每秒最多保留 ``per_second`` 条。"""
+
+    ratio: Optional[float] = None
+    per_second: Optional[int] = None
+
+    @classmethod
+    def parse(cls, spec: str) -> "SamplingRule":
+        """解析 ``0.01``、``1%`` 或 ``10/s`` 形式的规则。"""
+        spec = spec.strip()
+        if spec.endswith("/s"):
+            return cls(per_second=int(spec[:-2]))
+        ratio = float(spec[:-1]) / 100 if spec.endswith("%") else float(spec)
+        if not 0.0 <= ratio <= 1.0:
+            raise ValueError(f"无效的抽样比例: {spec}")
+        return cls(ratio=ratio)
+
+
+def parse_sampling_rules(spec: str) -> dict[str, SamplingRule]:
+    """解析 ``键=规则`` 形式、逗号分隔的抽样配置。
+
+    键可以是日志记录器名称（同时匹配其子记录器），也可以是 % 风格的消息模板；
+    规则写在最后一个 ``=`` 之后，因此模板中可以包含 ``=``。
+
+    示例:
+        >>> parse_sampling_rules("py_ref.access=1%, 获取用户信息: user_id=%s=10/s")
+        {'py_ref.access': SamplingRule(ratio=0.01, per_second=None),
+         '获取用户信息: user_id=%s': SamplingRule(ratio=None, per_second=10)}
+    """
+    rules = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        key, _, rule = item.strip().rpartition("=")
+        if not key:
+            raise ValueError(f"无效的抽样配置: {item.strip()}")
+        rules[key] = SamplingRule.parse(rule)
+    return rules
+
+
+class SamplingFilter(logging.Filter):
+    """按日志记录器或消息模板抽样、限流的过滤器。
+
+    WARNING 及以上级别总是放行。规则按消息模板（``record.msg``，因此需要使用
+    % 风格参数）优先、日志记录器名称其次匹配；未匹配的记录使用 ``default``，
+    为 None 时放行。比例抽样是确定性的：比例 1% 表示每 100 条保留第 1 条。
+
+    每隔 ``summary_interval`` 秒，下一条经过过滤器的记录会触发一条 INFO 摘要，
+    列出期间各规则抑制的记录数（``extra`` 字段 ``suppressed``），经由
+    ``summary_logger`` 输出。同一过滤器可以挂在多个处理器上，每条记录只判定一次。
+
+    示例:
+        >>> sampling = SamplingFilter({"py_ref.access": SamplingRule(ratio=0.01)})
+        >>> handler.addFilter(sampling)
+    """
+
+    def __init__(
+        self,
+        rules: Optional[dict[str, SamplingRule]] = None,
+        default: Optional[SamplingRule] = None,
+        summary_interval: float = 60.0,
+        summary_logger: Optional[logging.Logger] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        super().__init__()
+        rules = rules or {}
+        self.templates = {key: rule for key, rule in rules.items() if "%" in key}
+        # 日志记录器规则按名称长度降序，保证最具体的名称优先匹配
+        self.loggers = sorted(
+            ((key, rule) for key, rule in rules.items() if key not in self.templates),
+            key=lambda item: len(item[0]),
+            reverse=True,
+        )
+        self.default = default
+        self.summary_interval = summary_interval
+        self.summary_logger = summary_logger or logging.getLogger("py_ref")
+        self._clock = clock
+        self._lock = threading.Lock()
+        # 规则键 -> [已见记录数, 当前秒窗口起点, 窗口内已保留数]
+        self._state: dict[str, list[float]] = {}
+        self._suppressed: dict[str, int] = {}
+        self._last_summary = clock()
+        # (记录器名称, 模板) -> (规则键, 规则)，模板数量有限，缓存规则匹配结果
+        self._match_cache: dict[tuple[str, Any], tuple[str, Optional[SamplingRule]]] = (
+            {}
+        )
+
+    def _match(self, record: logging.LogRecord) -> tuple[str, Optional[SamplingRule]]:
+        """查找记录适用的规则。"""
+        # msg 可以是任意对象（如 dict），只有字符串模板参与匹配与缓存
+        cache_key = (record.name, record.msg if isinstance(record.msg, str) else None)
+        match = self._match_cache.get(cache_key)
+        if match is not None:
+            return match
+        if cache_key[1] is not None and cache_key[1] in self.templates:
+            match = (cache_key[1], self.templates[cache_key[1]])
+        else:
+            match = ("*", self.default)
+            for name, rule in self.loggers:
+                if record.name == name or record.name.startswith(name + "."):
+                    match = (name, rule)
+                    break
+        if len(self._match_cache) >= 10000:
+            self._match_cache.clear()
+        self._match_cache[cache_key] = match
+        return match
+
+    def _allow(self, key: str, rule: SamplingRule, now: float) -> bool:
+        """按规则判定是否保留，调用方持有锁。"""
+        state = self._state.get(key)
+        if state is None:
+            state = self._state[key] = [0, now, 0]
+        if rule.per_second is not None:
+            if now - state[1] >= 1.0:
+                state[1], state[2] = now, 0
+            if state[2] >= rule.per_second:
+                return False
+            state[2] += 1
+            return True
+        seen = state[0]
+        state[0] += 1
+        # 累加器：前 n 条中恰好保留 ceil(n * ratio) 条，且第一条总是保留
+        return math.ceil((seen + 1) * rule.ratio) > math.ceil(seen * rule.ratio)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        decision = getattr(record, "_sampled", None)
+        if decision is not None:
+            return decision
+        if record.levelno >= logging.WARNING:
+            decision = True
+        else:
+            key, rule = self._match(record)
+            if rule is None:
+                decision = True
+            else:
+                with self._lock:
+                    decision = self._allow(key, rule, self._clock())
+                    if not decision:
+                        self._suppressed[key] = self._suppressed.get(key, 0) + 1
+        record._sampled = decision
+        self._maybe_summarize()
+        return decision
+
+    def _maybe_summarize(self) -> None:
+        """间隔已到且有被抑制的记录时输出摘要。"""
+        now = self._clock()
+        if now - self._last_summary < self.summary_interval:
+            return
+        with self._lock:
+            if now - self._last_summary < self.summary_interval:
+                return
+            elapsed = now - self._last_summary
+            suppressed, self._suppressed = self._suppressed, {}
+            self._last_summary = now
+        if not suppressed:
+            return
+        summary = self.summary_logger.makeRecord(
+            self.summary_logger.name,
+            logging.INFO,
+            __file__,
+            0,
+            "日志抽样: 过去 %.0f 秒抑制 %d 条记录 (%s)",
+            (
+                elapsed,
+                sum(suppressed.values()),
+                ", ".join(f"{key}={count}" for key, count in suppressed.items()),
+            ),
+            None,
+            extra={"suppressed": suppressed},
+        )
+        summary._sampled = True
+        self.summary_logger.handle(summary)
+
+
+# ==================== 日志轮转 ====================
+
+# 压缩与清理历史文件的后台线程（所有轮转处理器共享，按提交顺序执行）
+_compress_executor: Optional[ThreadPoolExecutor] = None
+_compress_lock = threading.Lock()
+
+
+def _submit_background(func: Callable[..., Any], *args: Any) -> Future:
+    """在共享的后台线程中执行 ``func``。"""
+    global _compress_executor
+    with _compress_lock:
+        if _compress_executor is None:
+            _compress_executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="py_ref-log-rotate"
+            )
+        return _compress_executor.submit(func, *args)
+
+
+def _pid_alive(pid: int) -> bool:
+    """判断进程是否仍在运行（仅 POSIX；其他平台一律视为存活）。"""
+    if os.name != "posix":
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class RotatingFileHandler(BaseRotatingHandler):
+    """按大小和/或时间轮转的文件处理器，历史文件在后台线程中压缩。
+
+    当前文件写满 ``max_bytes`` 字节或打开超过 ``interval`` 秒时轮转：当前文件被
+    重命名为 ``<文件名>.<时间戳>.<序号>`` 并重新打开同名文件（不复制、不截断），
+    随后由后台线程将历史文件压缩为 ``.gz`` 并删除超出 ``backup_count`` 的最旧文件，
+    写日志的线程不会因压缩而阻塞。历史文件按文件名中的时间戳与序号排序，
+    与压缩完成的先后无关。
+
+    每个文件只能有一个写入进程。``per_process=True`` 时文件名带上进程号
+    （如 ``py_ref.1234.log``），保留数量按所有进程的历史文件合计；
+    启动时已退出进程遗留的日志文件会被当作历史文件归档。
+
+    示例:
+        >>> handler = RotatingFileHandler(
+        ...     "logs/py_ref.log", max_bytes=100 * 1024 * 1024, interval=86400
+        ... )
+    """
+
+    def __init__(
+        self,
+        filename: "str | os.PathLike[str]",
+        max_bytes: int = 0,
+        interval: float = 0,
+        backup_count: int = 7,
+        compression: str = "gzip",
+        encoding: Optional[str] = "utf-8",
+        clock: Callable[[], float] = time.time,
+        per_process: bool = False,
+    ):
+        if compression not in ("gzip", "none"):
+            raise ValueError(f"无效的压缩方式: {compression}")
+        path = Path(filename)
+        pid_pattern = r"\.(\d+)" if per_process else "()"
+        # 同一组日志的当前文件与历史文件：<stem>[.<pid>]<suffix>[.<时间戳>.<序号>[.gz]]
+        self._family = re.compile(
+            rf"^{re.escape(path.stem)}{pid_pattern}{re.escape(path.suffix)}"
+            r"(?:\.(\d{8}-\d{6})\.(\d{6})(?:\.gz)?)?$"
+        )
+        if per_process:
+            path = path.with_name(f"{path.stem}.{os.getpid()}{path.suffix}")
+        super().__init__(path, "a", encoding=encoding)
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.backup_count = backup_count
+        self.compression = compression
+        self.per_process = per_process
+        self._clock = clock
+        self._next_rollover = clock() + interval if interval > 0 else float("inf")
+        self._sequence = 0
+        self._pending: list[Future] = []
+        if per_process:
+            self._adopt_orphans()
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:  # noqa: N802
+        if self._clock() >= self._next_rollover:
+            return True
+        if self.max_bytes <= 0:
+            return False
+        if self.stream is None:
+            self.stream = self._open()
+        if self.stream.tell() == 0:
+            return False
+        size = len(self.format(record)) + len(self.terminator)
+        return self.stream.tell() + size > self.max_bytes
+
+    def doRollover(self) -> None:  # noqa: N802
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        now = self._clock()
+        if self.interval > 0:
+            self._next_rollover = now + self.interval
+        if os.path.exists(self.baseFilename) and os.path.getsize(self.baseFilename):
+            self._rotate(self.baseFilename, now)
+        self.stream = self._open()
+
+    def _rotate(self, source: str, now: float) -> None:
+        """将 ``source`` 重命名为历史文件，并提交后台压缩与清理。"""
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(now))
+        while True:
+            self._sequence += 1
+            rotated = f"{source}.{stamp}.{self._sequence % 1_000_000:06d}"
+            if not os.path.exists(rotated) and not os.path.exists(rotated + ".gz"):
+                break
+        os.rename(source, rotated)
+        self._pending = [f for f in self._pending if not f.done()]
+        self._pending.append(_submit_background(self._archive, rotated))
+
+    def _adopt_orphans(self) -> None:
+        """将已退出进程遗留的当前日志文件归档为历史文件。"""
+        directory = os.path.dirname(self.baseFilename)
+        for name in os.listdir(directory):
+            match = self._family.match(name)
+            if match is None or match.group(2) is not None:
+                continue
+            pid = int(match.group(1))
+            if pid == os.getpid() or _pid_alive(pid):
+                continue
+            path = os.path.join(directory, name)
+            try:
+                if os.path.getsize(path):
+                    self._rotate(path, os.path.getmtime(path))
+                else:
+                    os.remove(path)
+            except FileNotFoundError:
+                # 其他进程同时启动并已处理该文件
+                pass
+
+    def _archive(self, path: str) -> None:
+        """后台线程：压缩历史文件并清理超出保留数量的旧文件。
+
+        文件可能已被清理（轮转快于压缩时，或被其他进程清理），此时跳过压缩。
+        """
+        if self.compression == "gzip":
+            try:
+                with open(path, "rb") as source:
+                    with gzip.open(path + ".gz", "wb") as target:
+                        shutil.copyfileobj(source, target)
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self._prune()
+
+    def history(self) -> list[str]:
+        """返回历史文件路径，按轮转时间与序号从旧到新排列。"""
+        directory = os.path.dirname(self.baseFilename)
+        segments = []
+        for name in os.listdir(directory):
+            match = self._family.match(name)
+            if match is not None and match.group(2) is not None:
+                key = (match.group(2), int(match.group(3)), name)
+                segments.append((key, os.path.join(directory, name)))
+        return [path for _, path in sorted(segments)]
+
+    def _prune(self) -> None:
+        """删除超出 ``backup_count`` 的最旧历史文件。"""
+        if self.backup_count <= 0:
+            return
+        history = self.history()
+        for path in history[: max(0, len(history) - self.backup_count)]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def wait(self) -> None:
+        """等待已提交的压缩与清理任务完成。"""
+        for future in self._pending:
+            future.result()
+        self._pending = []
+
+    def close(self) -> None:
+        """等待后台任务完成后关闭文件。"""
+        self.wait()
+        super().close()
+
+
+# ==================== 批量写入 ====================
+
+# 所有批量写入处理器，供 flush_logging 与进程退出时排空缓冲区
+_buffered_handlers: "weakref.WeakSet[BufferedFileHandler]" = weakref.WeakSet()
+
+
+class BufferedFileHandler(logging.FileHandler):
+    """批量写入的文件处理器。
+
+    格式化后的记录先追加到内存缓冲区，满足以下任一条件时合并为一次 ``write``
+    写出并刷新：缓冲区达到 ``buffer_size`` 个字符；记录级别不低于 ``flush_level``
+    （默认 ERROR，保证错误日志及时落盘）；后台线程每隔 ``flush_interval`` 秒检查
+    一次。``flush()`` 与 ``close()`` 会写出缓冲区中剩余的记录。
+
+    示例:
+        >>> handler = BufferedFileHandler("logs/py_ref.log", buffer_size=64 * 1024)
+    """
+
+    def __init__(
+        self,
+        filename: "str | os.PathLike[str]",
+        buffer_size: int = 64 * 1024,
+        flush_interval: float = 1.0,
+        flush_level: int = logging.ERROR,
+        encoding: Optional[str] = "utf-8",
+    ):
+        super().__init__(filename, encoding=encoding)
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.flush_level = flush_level
+        self._buffer: list[str] = []
+        self._buffered = 0
+        self._stop = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        if flush_interval > 0:
+            self._flusher = threading.Thread(
+                target=self._run, name="py_ref-log-flush", daemon=True
+            )
+            self._flusher.start()
+        _buffered_handlers.add(self)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            msg = self.format(record) + self.terminator
+            self._buffer.append(msg)
+            self._buffered += len(msg)
+            if record.levelno >= self.flush_level or self._buffered >= self.buffer_size:
+                self._write_buffer()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+    def _write_buffer(self) -> None:
+        """将缓冲区合并为一次写入（调用方须持有处理器锁）。"""
+        if not self._buffer:
+            return
+        data = "".join(self._buffer)
+        self._buffer.clear()
+        self._buffered = 0
+        if self.stream is None:
+            self.stream = self._open()
+        self.stream.write(data)
+        self.stream.flush()
+
+    def flush(self) -> None:
+        """写出缓冲区中的全部记录。"""
+        with self.lock:
+            self._write_buffer()
+
+    def _run(self) -> None:
+        """后台线程：定期写出缓冲区。"""
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                if logging.raiseExceptions:
+                    traceback.print_exc(file=sys.stderr)
+
+    def close(self) -> None:
+        """停止后台线程，写出剩余记录后关闭文件。"""
+        self._stop.set()
+        if (
+            self._flusher is not None
+            and self._flusher is not threading.current_thread()
+        ):
+            self._flusher.join()
+        with self.lock:
+            if self._buffer and self.stream is not None:
+                self._write_buffer()
+        _buffered_handlers.discard(self)
+        super().close()
+
+
+# ==================== 异步日志 ====================
+
+QUEUE_POLICIES = ("block", "drop_oldest", "drop_new")
+
+
+class _BlockingQueueListener(QueueListener):
+    """停止时阻塞等待队列空位的 ``QueueListener``。
+
+    标准库用 ``put_nowait`` 放入停止标记，有界队列已满时会抛出 ``queue.Full``，
+    导致负载下的关闭失败、剩余记录无法输出。
+    """
+
+    def enqueue_sentinel(self) -> None:
+        self.queue.put(self._sentinel)
+
+
+class BoundedQueueHandler(QueueHandler):
+    """写入有界队列的处理器，由配套的 ``QueueListener`` 在后台线程中输出。
+
+    调用方线程只合并消息参数并入队，格式化与 Rich 渲染、文件写入都在后台线程中完成。
+    队列已满时按 ``policy`` 处理，被丢弃的记录数计入 ``dropped``。
+    """
+
+    def __init__(self, maxsize: int = 10000, policy: str = "block"):
+        if policy not in QUEUE_POLICIES:
+            raise ValueError(f"无效的队列策略: {policy}")
+        super().__init__(queue.Queue(maxsize))
+        self.policy = policy
+        self.dropped = 0
+        self.listener: Optional[_BlockingQueueListener] = None
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """合并消息参数，保留异常信息，格式化推迟到后台线程。"""
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """按队列策略入队。"""
+        if self.policy == "block":
+            self.queue.put(record)
+            return
+        while True:
+            try:
+                self.queue.put_nowait(record)
+                return
+            except queue.Full:
+                self.dropped += 1
+                if self.policy == "drop_new":
+                    return
+            # drop_oldest：丢弃队首记录后重试
+            try:
+                self.queue.get_nowait()
+                self.queue.task_done()
+            except queue.Empty:
+                pass
+
+    def start(self, *handlers: logging.Handler) -> None:
+        """启动后台线程，将队列中的记录交给 ``handlers`` 输出。"""
+        self.listener = _BlockingQueueListener(
+            self.queue, *handlers, respect_handler_level=True
+        )
+        self.listener.start()
+
+    def flush(self) -> None:
+        """等待后台线程处理完已入队的记录，并刷新下游处理器。"""
+        listener = self.listener
+        if listener is None:
+            return
+        self.queue.join()
+        for handler in listener.handlers:
+            handler.flush()
+
+    def close(self) -> None:
+        """停止后台线程（先处理完队列中的全部记录），再关闭下游处理器。"""
+        listener, self.listener = self.listener, None
+        if listener is not None:
+            listener.stop()
+            for handler in listener.handlers:
+                handler.close()
+        super().close()
+
+
+# 异步模式下各日志记录器的队列处理器：日志记录器名称 -> 处理器
+_queue_handlers: dict[str, BoundedQueueHandler] = {}
+_queue_lock = threading.Lock()
+
+
+def flush_logging() -> None:
+    """等待所有异步日志记录器的队列排空，并写出批量写入处理器的缓冲区。
+
+    在应用关闭（如 FastAPI ``lifespan`` 退出）时调用，保证关闭前的日志都已写出。
+    """
+    with _queue_lock:
+        handlers = list(_queue_handlers.values())
+    for handler in handlers:
+        handler.flush()
+    for buffered in list(_buffered_handlers):
+        buffered.flush()
+
+
+@atexit.register
+def _stop_queue_listeners() -> None:
+    """进程退出时停止后台线程，队列与缓冲区中剩余的记录在此之前全部输出。"""
+    with _queue_lock:
+        handlers = list(_queue_handlers.values())
+        _queue_handlers.clear()
+    for handler in handlers:
+        handler.close()
+    for buffered in list(_buffered_handlers):
+        buffered.flush()
 
 
 def setup_logger(
-    name: str = "py_ref",
+    name: str = ROOT_LOGGER_NAME,
     level: int = LoggerConfig.DEFAULT_LEVEL,
     log_to_file: bool = True,
     log_dir: Optional[Path] = None,
     log_file: Optional[str] = None,
+    async_mode: Optional[bool] = None,
+    queue_size: Optional[int] = None,
+    queue_policy: Optional[str] = None,
+    log_format: Optional[str] = None,
+    sampling: Optional[str] = None,
+    buffer_size: Optional[int] = None,
 ) -> logging.Logger:
     """
     设置带有 Rich 格式化和可选文件输出的日志记录器
@@ -49,6 +816,17 @@ def setup_logger(
         log_to_file: 是否记录到文件
         log_dir: 日志文件目录，默认为 'logs/'
         log_file: 日志文件名，默认为 'py_ref.log'
+        async_mode: 是否启用异步模式（处理器在后台线程中输出），
+            默认取 ``LoggerConfig.ASYNC``
+        queue_size: 异步模式的队列容量，默认取 ``LoggerConfig.QUEUE_SIZE``
+        queue_policy: 异步模式队列已满时的策略（block / drop_oldest / drop_new），
+            默认取 ``LoggerConfig.QUEUE_POLICY``
+        log_format: 输出格式（rich / json），默认取 ``LoggerConfig.FORMAT``；
+            json 格式下控制台与文件都输出 JSON Lines，不经过 Rich 渲染
+        sampling: 抽样规则（见 ``parse_sampling_rules``），默认取
+            ``LoggerConfig.SAMPLING``，为空时不抽样
+        buffer_size: 文件批量写入的缓冲区字符数，0 表示逐条写入，默认取
+            ``LoggerConfig.BUFFER_SIZE``；启用文件轮转时不生效
 
     返回:
         配置好的日志记录器实例
@@ -57,45 +835,128 @@ def setup_logger(
         >>> logger = setup_logger("my_module", level=logging.DEBUG)
         >>> logger.info("应用程序已启动")
         >>> logger.debug("调试信息")
+        >>> logger = setup_logger("api", async_mode=True, queue_policy="drop_new")
+        >>> logger = setup_logger("api", log_format="json")
+        >>> logger = setup_logger("api", sampling="py_ref.api=1%")
+        >>> logger = setup_logger("api", buffer_size=64 * 1024)
+
+    注意:
+        ``py_ref`` 的子记录器（如 ``py_ref.api``）通常不需要单独配置，
+        ``get_logger`` 返回的子记录器会传播到根记录器的共享处理器。
+        若显式为子记录器配置处理器，它将不再向上传播，以免重复输出。
     """
+    log_format = log_format or LoggerConfig.FORMAT
+    if log_format not in ("rich", "json"):
+        raise ValueError(f"无效的日志格式: {log_format}")
+
     logger = logging.getLogger(name)
     logger.setLevel(level)
 
-    # 移除现有处理器以避免重复
-    logger.handlers.clear()
+    # 移除并关闭现有处理器，避免重复输出，也不遗留文件描述符与后台线程
+    with _queue_lock:
+        _queue_handlers.pop(name, None)
+    for previous in list(logger.handlers):
+        logger.removeHandler(previous)
+        previous.close()
+    if name != ROOT_LOGGER_NAME and _in_hierarchy(name):
+        logger.propagate = False
+    handlers: list[logging.Handler] = []
 
-    # Rich 控制台处理器
-    console_handler = RichHandler(
-        console=console,
-        rich_tracebacks=True,
-        tracebacks_show_locals=True,
-        markup=True,
-    )
+    # 控制台处理器：Rich 格式化或 JSON Lines
+    if log_format == "json":
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setFormatter(JSONFormatter())
+    else:
+        console_handler = RichHandler(
+            console=console,
+            rich_tracebacks=True,
+            tracebacks_show_locals=True,
+            markup=True,
+        )
+        console_handler.setFormatter(logging.Formatter(LoggerConfig.DEFAULT_FORMAT))
     console_handler.setLevel(level)
-    console_handler.setFormatter(logging.Formatter(LoggerConfig.DEFAULT_FORMAT))
-    logger.addHandler(console_handler)
+    handlers.append(console_handler)
 
     # 文件处理器
     if log_to_file:
         log_dir = log_dir or LoggerConfig.DEFAULT_LOG_DIR
         log_file = log_file or LoggerConfig.DEFAULT_LOG_FILE
         log_path = log_dir / log_file
+        if buffer_size is None:
+            buffer_size = LoggerConfig.BUFFER_SIZE
 
         # 如果日志目录不存在则创建
         log_dir.mkdir(parents=True, exist_ok=True)
 
-        file_handler = logging.FileHandler(log_path, encoding="utf-8")
+        if LoggerConfig.ROTATE_MAX_BYTES > 0 or LoggerConfig.ROTATE_INTERVAL > 0:
+            file_handler: logging.FileHandler = RotatingFileHandler(
+                log_path,
+                max_bytes=LoggerConfig.ROTATE_MAX_BYTES,
+                interval=LoggerConfig.ROTATE_INTERVAL,
+                backup_count=LoggerConfig.BACKUP_COUNT,
+                compression=LoggerConfig.COMPRESSION,
+                per_process=LoggerConfig.PER_PROCESS_FILE,
+            )
+        elif buffer_size > 0:
+            file_handler = BufferedFileHandler(
+                log_path,
+                buffer_size=buffer_size,
+                flush_interval=LoggerConfig.FLUSH_INTERVAL,
+            )
+        else:
+            file_handler = logging.FileHandler(log_path, encoding="utf-8")
         file_handler.setLevel(level)
-        file_handler.setFormatter(logging.Formatter(LoggerConfig.FILE_FORMAT))
-        logger.addHandler(file_handler)
+        file_handler.setFormatter(
+            JSONFormatter()
+            if log_format == "json"
+            else logging.Formatter(LoggerConfig.FILE_FORMAT)
+        )
+        handlers.append(file_handler)
 
+    rules = parse_sampling_rules(
+        LoggerConfig.SAMPLING if sampling is None else sampling
+    )
+    sampling_filter = (
+        SamplingFilter(
+            rules,
+            summary_interval=LoggerConfig.SAMPLING_SUMMARY_INTERVAL,
+            summary_logger=logger,
+        )
+        if rules
+        else None
+    )
+
+    if async_mode is None:
+        async_mode = LoggerConfig.ASYNC
+    if not async_mode:
+        for handler in handlers:
+            if sampling_filter is not None:
+                handler.addFilter(sampling_filter)
+            logger.addHandler(handler)
+        return logger
+
+    queue_handler = BoundedQueueHandler(
+        maxsize=queue_size or LoggerConfig.QUEUE_SIZE,
+        policy=queue_policy or LoggerConfig.QUEUE_POLICY,
+    )
+    # 异步模式下在入队前抽样，被抑制的记录不占用队列
+    if sampling_filter is not None:
+        queue_handler.addFilter(sampling_filter)
+    queue_handler.start(*handlers)
+    logger.addHandler(queue_handler)
+    with _queue_lock:
+        _queue_handlers[name] = queue_handler
     return logger
 
 
-def get_logger(name: str = "py_ref") -> logging.Logger:
+def get_logger(name: str = ROOT_LOGGER_NAME) -> logging.Logger:
     """
     获取或创建日志记录器实例
 
+    ``py_ref`` 层级内的记录器（如 ``py_ref.api``）不创建自己的处理器，
+    记录传播到 ``py_ref`` 根记录器上唯一的一组处理器：无论多少模块调用，
+    日志文件只打开一次，每条记录只写一次。层级外的名称仍单独配置处理器。
+
     参数:
         name: 日志记录器名称
 
@@ -107,6 +968,10 @@ def get_logger(name: str = "py_ref") -> logging.Logger:
         >>> logger.info("模块已加载")
     """
     logger = logging.getLogger(name)
+    if _in_hierarchy(name):
+        if not logging.getLogger(ROOT_LOGGER_NAME).handlers:
+            setup_logger(ROOT_LOGGER_NAME)
+        return logger
     if not logger.handlers:
         return setup_logger(name)
     return logger
@@ -116,30 +981,36 @@ def get_logger(name: str = "py_ref") -> logging.Logger:
 logger = setup_logger()
 
 
-# 便捷的日志记录函数
-def debug(message: str, **kwargs) -> None:
+# 便捷的日志记录函数：消息使用 % 风格参数，级别被过滤时不做任何格式化；
+# 记录的调用位置为调用这些函数的代码，而不是本模块
+def debug(message: str, *args: Any, **kwargs: Any) -> None:
     """记录调试消息"""
-    logger.debug(message, **kwargs)
+    kwargs.setdefault("stacklevel", 2)
+    logger.debug(message, *args, **kwargs)
 
 
-def info(message: str, **kwargs) -> None:
+def info(message: str, *args: Any, **kwargs: Any) -> None:
     """记录信息消息"""
-    logger.info(message, **kwargs)
+    kwargs.setdefault("stacklevel", 2)
+    logger.info(message, *args, **kwargs)
 
 
-def warning(message: str, **kwargs) -> None:
+def warning(message: str, *args: Any, **kwargs: Any) -> None:
     """记录警告消息"""
-    logger.warning(message, **kwargs)
+    kwargs.setdefault("stacklevel", 2)
+    logger.warning(message, *args, **kwargs)
 
 
-def error(message: str, **kwargs) -> None:
+def error(message: str, *args: Any, **kwargs: Any) -> None:
     """记录错误消息"""
-    logger.error(message, **kwargs)
+    kwargs.setdefault("stacklevel", 2)
+    logger.error(message, *args, **kwargs)
 
 
-def critical(message: str, **kwargs) -> None:
+def critical(message: str, *args: Any, **kwargs: Any) -> None:
     """记录严重错误消息"""
-    logger.critical(message, **kwargs)
+    kwargs.setdefault("stacklevel", 2)
+    logger.critical(message, *args, **kwargs)
 
 
 # Rich 控制台函数，用于增强输出
@@ -76,7 +76,7 @@ def main() -> None:
         print_success("所有演示已完成！")
 
     except Exception as e:
-        logger.error(f"应用程序错误: {e}", exc_info=True)
+        logger.error("应用程序错误: %s", e, exc_info=True)
         raise
 
 
@@ -0,0 +1,225 @@
+"""进程内指标模块 - 仪表与固定桶直方图，输出 Prometheus 文本格式。
+
+所有指标只在事件循环线程中更新，更新操作是普通的整数/浮点运算，无需加锁。
+"""
+
+from bisect import bisect_left
+from typing import Optional, Protocol
+
+# 请求耗时直方图的默认桶上界（秒）
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 未匹配到路由的请求统一使用的标签值，避免任意路径导致标签基数膨胀
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class CacheStats(Protocol):
+    """可被指标注册表采集的缓存（如 ``LRUCache``）。"""
+
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+
+    def __len__(self) -> int: ...
+
+
+class CoalescingStats(Protocol):
+    """可被指标注册表采集的请求合并器（如 ``SingleFlight``）。"""
+
+    calls: int
+    executions: int
+    coalesced: int
+
+
+def _escape(value: str) -> str:
+    """转义 Prometheus 标签值。"""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: str) -> str:
+    """格式化标签集合。"""
+    return ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+
+
+def _format_float(value: float) -> str:
+    """按 Prometheus 约定格式化浮点数。"""
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class Histogram:
+    """固定桶直方图。
+
+    ``observe`` 为 O(log 桶数)：二分查找落入的桶并累加，导出时再计算累积计数。
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        if list(buckets) != sorted(buckets):
+            raise ValueError("桶上界必须递增")
+        self.buckets = tuple(buckets)
+        # 最后一个槽位对应 +Inf
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """记录一个观测值。"""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list[tuple[float, int]]:
+        """返回 ``(桶上界, 累积计数)`` 列表，最后一项上界为 +Inf。"""
+        result = []
+        total = 0
+        for bound, count in zip(
+            (*self.buckets, float("inf")), self.counts, strict=True
+        ):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def quantile(self, q: float) -> Optional[float]:
+        """按桶内线性插值估算分位数，没有观测值时返回 None。"""
+        if not 0.0 <= q <= 1.0:
+            raise ValueError("分位数必须在 0 到 1 之间")
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        lower = 0.0
+        previous = 0
+        for bound, total in self.cumulative():
+            if total >= rank and total > previous:
+                if bound == float("inf"):
+                    return lower
+                return lower + (bound - lower) * (rank - previous) / (total - previous)
+            lower = bound
+            previous = total
+        return lower  # pragma: no cover - 循环内必然返回
+
+
+class MetricsRegistry:
+    """HTTP 请求指标注册表。
+
+    示例:
+        >>> registry = MetricsRegistry()
+        >>> registry.observe_request("GET", "/api/v1/health", 200, 0.002)
+        >>> print(registry.render())
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        # (method, route, 状态类别) -> 耗时直方图
+        self.requests: dict[tuple[str, str, str], Histogram] = {}
+        self.in_flight = 0
+        self.caches: dict[str, CacheStats] = {}
+        self.flights: dict[str, CoalescingStats] = {}
+
+    def request_started(self) -> None:
+        """请求开始时调用，增加进行中请求数。"""
+        self.in_flight += 1
+
+    def request_finished(self) -> None:
+        """请求结束时调用，减少进行中请求数。"""
+        self.in_flight -= 1
+
+    def observe_request(
+        self, method: str, route: str, status_code: int, seconds: float
+    ) -> None:
+        """记录一次已完成请求的耗时。"""
+        key = (method, route, f"{status_code // 100}xx")
+        histogram = self.requests.get(key)
+        if histogram is None:
+            histogram = self.requests[key] = Histogram(self.buckets)
+        histogram.observe(seconds)
+
+    def register_cache(self, name: str, cache: CacheStats) -> None:
+        """注册需要导出命中率等统计的缓存。"""
+        self.caches[name] = cache
+
+    def register_singleflight(self, name: str, flight: CoalescingStats) -> None:
+        """注册需要导出合并次数的请求合并器。"""
+        self.flights[name] = flight
+
+    def render(self) -> str:
+        """以 Prometheus 文本格式导出全部指标。"""
+        lines = [
+            "# HELP py_ref_http_requests_in_flight 正在处理的 HTTP 请求数",
+            "# TYPE py_ref_http_requests_in_flight gauge",
+            f"py_ref_http_requests_in_flight {self.in_flight}",
+            "# HELP py_ref_http_request_duration_seconds HTTP 请求耗时",
+            "# TYPE py_ref_http_request_duration_seconds histogram",
+        ]
+        name = "py_ref_http_request_duration_seconds"
+        for (method, route, status_class), histogram in sorted(self.requests.items()):
+            labels = _labels(method=method, route=route, status=status_class)
+            for bound, total in histogram.cumulative():
+                lines.append(
+                    f'{name}_bucket{{{labels},le="{_format_float(bound)}"}} {total}'
+                )
+            lines.append(f"{name}_sum{{{labels}}} {_format_float(histogram.sum)}")
+            lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+        if self.caches:
+            for metric, kind, help_text in (
+                ("hits", "counter", "缓存命中次数"),
+                ("misses", "counter", "缓存未命中次数"),
+                ("evictions", "counter", "缓存容量淘汰次数"),
+                ("expirations", "counter", "缓存过期次数"),
+                ("size", "gauge", "缓存当前条目数"),
+                ("hit_ratio", "gauge", "缓存命中率"),
+            ):
+                suffix = "_total" if kind == "counter" else ""
+                metric_name = f"py_ref_cache_{metric}{suffix}"
+                lines.append(f"# HELP {metric_name} {help_text}")
+                lines.append(f"# TYPE {metric_name} {kind}")
+                for cache_name, cache in sorted(self.caches.items()):
+                    value = self._cache_value(cache, metric)
+                    lines.append(
+                        f"{metric_name}{{{_labels(cache=cache_name)}}} {value}"
+                    )
+
+        if self.flights:
+            for metric, help_text in (
+                ("calls", "请求合并器调用次数"),
+                ("executions", "实际执行的读取次数"),
+                ("coalesced", "被合并到进行中读取的调用次数"),
+            ):
+                metric_name = f"py_ref_singleflight_{metric}_total"
+                lines.append(f"# HELP {metric_name} {help_text}")
+                lines.append(f"# TYPE {metric_name} counter")
+                for flight_name, flight in sorted(self.flights.items()):
+                    lines.append(
+                        f"{metric_name}{{{_labels(name=flight_name)}}} "
+                        f"{getattr(flight, metric)}"
+                    )
+
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _cache_value(cache: CacheStats, metric: str) -> str:
+        """读取缓存的单项统计。"""
+        if metric == "size":
+            return str(len(cache))
+        if metric == "hit_ratio":
+            total = cache.hits + cache.misses
+            return _format_float(cache.hits / total if total else 0.0)
+        return str(getattr(cache, metric))
@@ -0,0 +1,330 @@
+"""微基准测试 - 测量单个请求热路径环节的 CPU 开销。
+
+覆盖请求模型校验、响应模型序列化、统一响应的构建与编码，以及经由不同日志
+处理器的 ``logger.info`` 调用。每个用例先预热，再重复多轮计时并给出统计量。
+
+用法:
+    python -m py_ref.microbench
+    python -m py_ref.microbench --filter logging --repeat 7 --output micro.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import timeit
+from datetime import datetime
+from functools import cache
+from pathlib import Path
+from typing import Callable, Optional, Sequence
+
+from fastapi.responses import JSONResponse
+from rich.console import Console
+from rich.logging import RichHandler
+from rich.table import Table
+
+from py_ref.api import ApiResponse, UserCreate, UserResponse, UserUpdate
+from py_ref.logger import (
+    BoundedQueueHandler,
+    BufferedFileHandler,
+    JSONFormatter,
+    Lazy,
+    LoggerConfig,
+    console,
+    print_header,
+    print_success,
+)
+from py_ref.responses import JSON_BACKEND, FastJSONResponse, json_dumps
+
+_USER = UserResponse(
+    id=1,
+    name="张三",
+    email="zhangsan@example.com",
+    age=25,
+    created_at=datetime(2024, 1, 1, 12, 0, 0),
+)
+
+
+_CREATE_PAYLOAD = {"name": "张三", "email": "zhangsan@example.com", "age": 25}
+_UPDATE_PAYLOAD = {"name": "李四", "age": 30}
+
+
+# ==================== 校验与序列化 ====================
+
+
+def validate_user_create() -> UserCreate:
+    """校验创建用户请求体（已解析的 dict）。"""
+    return UserCreate.model_validate(_CREATE_PAYLOAD)
+
+
+def validate_user_update() -> UserUpdate:
+    """校验更新用户请求体（已解析的 dict）。"""
+    return UserUpdate.model_validate(_UPDATE_PAYLOAD)
+
+
+def dump_user() -> dict:
+    """``UserResponse.model_dump()``，datetime 保持为对象。"""
+    return _USER.model_dump()
+
+
+def dump_user_json() -> dict:
+    """``UserResponse.model_dump(mode="json")``，datetime 转为字符串。"""
+    return _USER.model_dump(mode="json")
+
+
+def envelope_build() -> ApiResponse:
+    """只构建 ApiResponse，不编码。"""
+    return ApiResponse(data=_USER.model_dump())
+
+
+def envelope_encode() -> bytes:
+    """只编码已构建好的统一响应 dict。"""
+    return json_dumps(_ENVELOPE)
+
+
+_ENVELOPE = {"code": 0, "data": _USER.model_dump(), "message": "成功"}
+
+
+def envelope_standard() -> bytes:
+    """标准路径：构建 ApiResponse，再按 response_model 校验、转换并用 json 编码。"""
+    response = ApiResponse(data=_USER.model_dump())
+    validated = ApiResponse.model_validate(response)
+    return JSONResponse(validated.model_dump(mode="json")).body
+
+
+def envelope_fast() -> bytes:
+    """高性能路径：直接一次性编码统一响应。"""
+    return FastJSONResponse(
+        {"code": 0, "data": _USER.model_dump(), "message": "成功"}
+    ).body
+
+
+# ==================== 日志 ====================
+
+_LOG_USER_ID = 42
+
+
+@cache
+def _devnull():
+    """共享的 ``os.devnull`` 文件对象：测量格式化与写入调用的开销而不受磁盘影响。"""
+    return open(os.devnull, "w", encoding="utf-8")
+
+
+def _bench_logger(name: str, handler: Optional[logging.Handler]) -> logging.Logger:
+    """创建不向上传播的独立日志记录器，避免影响应用日志。"""
+    logger = logging.getLogger(f"py_ref.microbench.{name}")
+    logger.handlers.clear()
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    if handler is not None:
+        logger.addHandler(handler)
+    return logger
+
+
+@cache
+def rich_logger() -> logging.Logger:
+    """与 ``setup_logger`` 控制台处理器配置相同的 RichHandler。"""
+    handler = RichHandler(
+        console=Console(file=_devnull(), width=120),
+        rich_tracebacks=True,
+        tracebacks_show_locals=True,
+        markup=True,
+    )
+    handler.setFormatter(logging.Formatter(LoggerConfig.DEFAULT_FORMAT))
+    return _bench_logger("rich", handler)
+
+
+@cache
+def file_logger() -> logging.Logger:
+    """与 ``setup_logger`` 文件处理器格式相同的 StreamHandler（写入 devnull）。"""
+    handler = logging.StreamHandler(_devnull())
+    handler.setFormatter(logging.Formatter(LoggerConfig.FILE_FORMAT))
+    return _bench_logger("file", handler)
+
+
+@cache
+def buffered_logger() -> logging.Logger:
+    """``buffer_size`` 启用时的批量写入文件处理器（写入 devnull）。"""
+    handler = BufferedFileHandler(os.devnull, buffer_size=64 * 1024)
+    handler.setFormatter(logging.Formatter(LoggerConfig.FILE_FORMAT))
+    return _bench_logger("buffered", handler)
+
+
+@cache
+def json_logger() -> logging.Logger:
+    """``log_format="json"`` 时使用的 JSON Lines 处理器（写入 devnull）。"""
+    handler = logging.StreamHandler(_devnull())
+    handler.setFormatter(JSONFormatter())
+    return _bench_logger("json", handler)
+
+
+@cache
+def disabled_logger() -> logging.Logger:
+    """级别高于 INFO 的记录器：测量被过滤掉的日志调用的开销。"""
+    logger = _bench_logger("disabled", logging.NullHandler())
+    logger.setLevel(logging.WARNING)
+    return logger
+
+
+@cache
+def async_logger() -> logging.Logger:
+    """异步模式：RichHandler 放在有界队列之后，由后台线程输出。
+
+    队列策略为 ``drop_new``，测量的是调用方线程的入队开销，不受后台线程速度影响。
+    """
+    handler = BoundedQueueHandler(maxsize=LoggerConfig.QUEUE_SIZE, policy="drop_new")
+    handler.start(rich_logger().handlers[0])
+    return _bench_logger("async", handler)
+
+
+def log_rich() -> None:
+    """经由 RichHandler 输出一条 INFO 日志。"""
+    rich_logger().info(f"获取用户信息: user_id={_LOG_USER_ID}")
+
+
+def log_file() -> None:
+    """经由文件格式的处理器输出一条 INFO 日志。"""
+    file_logger().info(f"获取用户信息: user_id={_LOG_USER_ID}")
+
+
+def log_buffered() -> None:
+    """经由批量写入文件处理器输出一条 INFO 日志。"""
+    buffered_logger().info("获取用户信息: user_id=%s", _LOG_USER_ID)
+
+
+def log_json() -> None:
+    """经由 JSON Lines 处理器输出一条带额外字段的 INFO 日志。"""
+    json_logger().info("获取用户信息", extra={"user_id": _LOG_USER_ID})
+
+
+def log_async() -> None:
+    """异步模式下的 INFO 日志调用（只入队）。"""
+    async_logger().info(f"获取用户信息: user_id={_LOG_USER_ID}")
+
+
+def log_disabled() -> None:
+    """级别被禁用时的 INFO 日志调用（f-string 仍会被求值）。"""
+    disabled_logger().info(f"获取用户信息: user_id={_LOG_USER_ID}")
+
+
+_DISABLED_LOGGER = disabled_logger()
+
+
+def log_disabled_lazy() -> None:
+    """级别被禁用时的 % 风格 INFO 日志调用：只检查级别，不做格式化。"""
+    _DISABLED_LOGGER.info("获取用户信息: user_id=%s", _LOG_USER_ID)
+
+
+def log_disabled_lazy_fields() -> None:
+    """级别被禁用时带延迟求值字段的日志调用：字段函数不会被调用。"""
+    _DISABLED_LOGGER.info("用户详情", extra={"user": Lazy(dump_user)})
+
+
+# ==================== 运行 ====================
+
+
+CASES: dict[str, Callable[[], object]] = {
+    "validate.user_create": validate_user_create,
+    "validate.user_update": validate_user_update,
+    "dump.user": dump_user,
+    "dump.user_json": dump_user_json,
+    "envelope.build": envelope_build,
+    "envelope.encode": envelope_encode,
+    "envelope.standard": envelope_standard,
+    "envelope.fast": envelope_fast,
+    "logging.rich": log_rich,
+    "logging.file": log_file,
+    "logging.file_buffered": log_buffered,
+    "logging.json": log_json,
+    "logging.async": log_async,
+    "logging.disabled": log_disabled,
+    "logging.disabled_lazy": log_disabled_lazy,
+    "logging.disabled_lazy_fields": log_disabled_lazy_fields,
+}
+
+
+def run_case(
+    func: Callable[[], object],
+    number: Optional[int] = None,
+    repeat: int = 5,
+    warmup: int = 1000,
+) -> dict[str, float]:
+    """运行单个基准用例。
+
+    参数:
+        func: 被测函数
+        number: 每轮调用次数，为 None 时自动选择使每轮至少耗时 0.2 秒的次数
+        repeat: 轮数
+        warmup: 计时前的预热调用次数
+
+    返回:
+        包含每秒操作数（取最快一轮）与单次调用耗时统计（微秒）的字典：
+        最小值、中位数、平均值与标准差
+    """
+    for _ in range(warmup):
+        func()
+    timer = timeit.Timer(func)
+    if number is None:
+        number, _ = timer.autorange()
+    timings = timer.repeat(number=number, repeat=repeat)
+    per_call = [t / number * 1e6 for t in timings]
+    return {
+        "ops_per_sec": 1e6 / min(per_call),
+        "min_us": min(per_call),
+        "median_us": statistics.median(per_call),
+        "mean_us": statistics.mean(per_call),
+        "stdev_us": statistics.stdev(per_call) if len(per_call) > 1 else 0.0,
+        "number": number,
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """构建命令行参数解析器。"""
+    parser = argparse.ArgumentParser(
+        prog="python -m py_ref.microbench", description="py_ref 微基准测试"
+    )
+    parser.add_argument("--filter", default="", help="只运行名称包含该字符串的用例")
+    parser.add_argument(
+        "--number", type=int, default=None, help="每轮调用次数（默认自动选择）"
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="轮数")
+    parser.add_argument("--warmup", type=int, default=1000, help="预热调用次数")
+    parser.add_argument("--output", type=Path, help="将结果写入 JSON 文件")
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """运行选中的用例并打印结果表格。"""
+    args = build_parser().parse_args(argv)
+    print_header(f"微基准测试（JSON 编码器: {JSON_BACKEND}）")
+
+    table = Table()
+    table.add_column("用例", style="cyan")
+    table.add_column("ops/s", justify="right", style="green")
+    table.add_column("中位数 (µs)", justify="right")
+    table.add_column("最小值 (µs)", justify="right")
+    table.add_column("标准差 (µs)", justify="right")
+    results = {}
+    for name, func in CASES.items():
+        if args.filter not in name:
+            continue
+        result = results[name] = run_case(
+            func, number=args.number, repeat=args.repeat, warmup=args.warmup
+        )
+        table.add_row(
+            name,
+            f"{result['ops_per_sec']:,.0f}",
+            f"{result['median_us']:.2f}",
+            f"{result['min_us']:.2f}",
+            f"{result['stdev_us']:.2f}",
+        )
+    console.print(table)
+
+    if args.output:
+        args.output.write_text(json.dumps(results, ensure_ascii=False, indent=2))
+        print_success(f"结果已写入 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""ASGI 中间件模块。
+
+本模块中的中间件都是纯 ASGI 实现，不经过 Starlette 的 ``BaseHTTPMiddleware``，
+不会为每个请求额外创建任务或包装响应流。
+"""
+
+import asyncio
+import json
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Iterable, MutableMapping, Optional
+
+from py_ref.metrics import UNMATCHED_ROUTE, MetricsRegistry
+
+Scope = MutableMapping[str, Any]
+Message = MutableMapping[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+ASGIApp = Callable[[Scope, Receive, Send], Awaitable[None]]
+
+
+def route_template(scope: Scope, default: Optional[str] = None) -> str:
+    """返回请求匹配到的路由模板（如 ``/api/v1/users/{user_id}``）。
+
+    未匹配到路由时返回 ``default``，``default`` 为 None 时返回原始路径。
+    """
+    route = getattr(scope.get("route"), "path", None)
+    if route is not None:
+        return route
+    return scope.get("path", "") if default is None else default
+
+
+class RequestTimingMiddleware:
+    """记录请求方法、路由模板、状态码与耗时的访问日志中间件。
+
+    每个请求只读取一次单调时钟；日志按 ``sample_rate`` 抽样输出，
+    但 5xx 响应与超过 ``slow_threshold_ms`` 的慢请求总是记录。
+    传入 ``metrics`` 时同一次计时结果还会写入指标注册表（不受抽样影响）。
+
+    示例:
+        >>> app.add_middleware(RequestTimingMiddleware, sample_rate=0.01)
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        logger: Optional[logging.Logger] = None,
+        sample_rate: float = 1.0,
+        slow_threshold_ms: Optional[float] = None,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        """
+        参数:
+            app: 下游 ASGI 应用
+            logger: 访问日志记录器，默认为 ``py_ref.access``
+            sample_rate: 正常请求的日志抽样比例，取值 0 到 1
+            slow_threshold_ms: 慢请求阈值（毫秒），为 None 时不单独判断
+            metrics: 指标注册表，为 None 时不记录指标
+        """
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError("sample_rate 必须在 0 到 1 之间")
+        self.app = app
+        self.logger = logger or logging.getLogger("py_ref.access")
+        self.sample_rate = sample_rate
+        self.slow_threshold_ms = slow_threshold_ms
+        self.metrics = metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = self.metrics
+        if metrics is not None:
+            metrics.request_started()
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            if metrics is not None:
+                metrics.request_finished()
+                metrics.observe_request(
+                    scope["method"],
+                    route_template(scope, UNMATCHED_ROUTE),
+                    status_code,
+                    elapsed,
+                )
+            elapsed_ms = elapsed * 1000
+            if self._should_log(status_code, elapsed_ms):
+                self.logger.info(
+                    "%s %s %d %.2fms",
+                    scope["method"],
+                    route_template(scope),
+                    status_code,
+                    elapsed_ms,
+                )
+
+    def _should_log(self, status_code: int, elapsed_ms: float) -> bool:
+        """判断本次请求是否输出访问日志。"""
+        if not self.logger.isEnabledFor(logging.INFO):
+            return False
+        if status_code >= 500:
+            return True
+        if self.slow_threshold_ms is not None and elapsed_ms >= self.slow_threshold_ms:
+            return True
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+
+# ==================== 准入控制 ====================
+
+
+def parse_route_limits(spec: str) -> dict[str, int]:
+    """解析 ``前缀=上限`` 形式、逗号分隔的路由分组并发配置。
+
+    示例:
+        >>> parse_route_limits("/api/v1/users:export=2, /api/v1/users=64")
+        {'/api/v1/users:export': 2, '/api/v1/users': 64}
+    """
+    limits = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        prefix, _, limit = item.rpartition("=")
+        if not prefix.strip():
+            raise ValueError(f"无效的路由并发配置: {item.strip()}")
+        limits[prefix.strip()] = int(limit)
+    return limits
+
+
+class ConcurrencyLimiter:
+    """带有界等待队列与排队超时的并发限制器。
+
+    并发数未满时立即放行；已满时最多允许 ``max_waiting`` 个请求按 FIFO 排队，
+    排队超过 ``timeout`` 秒或队列已满的请求被拒绝。
+    """
+
+    def __init__(self, limit: int, max_waiting: int = 0, timeout: float = 1.0):
+        if limit < 1:
+            raise ValueError("并发上限必须大于 0")
+        self.limit = limit
+        self.max_waiting = max_waiting
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(limit)
+        self.waiting = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    async def acquire(self) -> bool:
+        """尝试获取一个并发名额，返回是否成功。"""
+        if not self._semaphore.locked():
+            await self._semaphore.acquire()
+            return True
+        if self.waiting >= self.max_waiting:
+            self.rejected += 1
+            return False
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.timeout)
+            return True
+        except TimeoutError:
+            self.timeouts += 1
+            return False
+        finally:
+            self.waiting -= 1
+
+    def release(self) -> None:
+        """归还并发名额。"""
+        self._semaphore.release()
+
+
+class ConcurrencyLimitMiddleware:
+    """准入控制中间件：超出并发上限时快速返回 503，而不是让请求无限排队。
+
+    请求先获取所属路由分组（按最长路径前缀匹配）的名额，再获取全局名额；
+    豁免路径（如健康检查）不受限制。被拒绝的请求返回统一格式的 503 响应
+    并携带 ``Retry-After`` 响应头。
+
+    示例:
+        >>> app.add_middleware(
+        ...     ConcurrencyLimitMiddleware,
+        ...     limit=256,
+        ...     max_waiting=512,
+        ...     queue_timeout=0.5,
+        ...     route_limits={"/api/v1/users:export": 4},
+        ... )
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        limit: Optional[int] = None,
+        max_waiting: int = 0,
+        queue_timeout: float = 1.0,
+        route_limits: Optional[dict[str, int]] = None,
+        exempt_paths: Iterable[str] = ("/api/v1/health",),
+        retry_after: int = 1,
+    ):
+        """
+        参数:
+            app: 下游 ASGI 应用
+            limit: 全局并发上限，为 None 时只限制路由分组
+            max_waiting: 每个限制器允许排队等待的最大请求数
+            queue_timeout: 排队等待的最长秒数
+            route_limits: 路由前缀到并发上限的映射
+            exempt_paths: 不受限制的路径
+            retry_after: 拒绝时 ``Retry-After`` 响应头的秒数
+        """
+        self.app = app
+        self.global_limiter = (
+            ConcurrencyLimiter(limit, max_waiting, queue_timeout) if limit else None
+        )
+        # 按前缀长度降序排列，保证最长前缀优先匹配
+        self.route_limiters = sorted(
+            (
+                (prefix, ConcurrencyLimiter(value, max_waiting, queue_timeout))
+                for prefix, value in (route_limits or {}).items()
+            ),
+            key=lambda item: len(item[0]),
+            reverse=True,
+        )
+        self.exempt_paths = frozenset(exempt_paths)
+        self._body = json.dumps(
+            {"code": 503, "data": None, "message": "服务繁忙，请稍后重试"},
+            ensure_ascii=False,
+            separators=(",", ":"),
+        ).encode()
+        self._headers = [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(self._body)).encode()),
+            (b"retry-after", str(retry_after).encode()),
+        ]
+
+    def _route_limiter(self, path: str) -> Optional[ConcurrencyLimiter]:
+        """查找路径所属路由分组的限制器。"""
+        for prefix, limiter in self.route_limiters:
+            if path.startswith(prefix):
+                return limiter
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        acquired: list[ConcurrencyLimiter] = []
+        try:
+            for limiter in (self._route_limiter(scope["path"]), self.global_limiter):
+                if limiter is None:
+                    continue
+                if not await limiter.acquire():
+                    await self._reject(send)
+                    return
+                acquired.append(limiter)
+            await self.app(scope, receive, send)
+        finally:
+            for limiter in acquired:
+                limiter.release()
+
+    async def _reject(self, send: Send) -> None:
+        """发送 503 响应。"""
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 503,
+                "headers": self._headers,
+            }
+        )
+        await send({"type": "http.response.body", "body": self._body})
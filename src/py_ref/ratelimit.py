@@ -0,0 +1,234 @@
+"""限流模块 - 按客户端身份的令牌桶限流。
+
+本模块提供：
+- ``TokenBucketStore``：O(1) 的内存令牌桶表，自动淘汰空闲条目，内存有界
+- ``RateLimitMiddleware``：按路由前缀配置速率的纯 ASGI 限流中间件
+"""
+
+import json
+import math
+import time
+from collections import OrderedDict
+from typing import Callable, Iterable, NamedTuple, Optional
+
+from py_ref.middleware import ASGIApp, Message, Receive, Scope, Send
+
+_UNITS = {"s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+class RateLimit(NamedTuple):
+    """令牌桶参数：每秒补充 ``rate`` 个令牌，桶容量为 ``burst``。"""
+
+    rate: float
+    burst: int
+
+    @classmethod
+    def parse(cls, spec: str) -> "RateLimit":
+        """解析 ``次数/单位[:突发容量]`` 形式的速率，单位为 s、m 或 h。
+
+        示例:
+            >>> RateLimit.parse("100/s")
+            RateLimit(rate=100.0, burst=100)
+            >>> RateLimit.parse("600/m:20")
+            RateLimit(rate=10.0, burst=20)
+        """
+        amount, _, rest = spec.strip().partition("/")
+        unit, _, burst = rest.partition(":")
+        if unit not in _UNITS:
+            raise ValueError(f"无效的速率配置: {spec}")
+        count = int(amount)
+        if count < 1:
+            raise ValueError(f"无效的速率配置: {spec}")
+        return cls(count / _UNITS[unit], int(burst) if burst else count)
+
+
+def parse_rate_limits(spec: str) -> dict[str, RateLimit]:
+    """解析 ``前缀=速率`` 形式、逗号分隔的路由限流配置。
+
+    示例:
+        >>> parse_rate_limits("/api/v1/users=20/s:40")
+        {'/api/v1/users': RateLimit(rate=20.0, burst=40)}
+    """
+    limits = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        prefix, _, rate = item.partition("=")
+        if not prefix.strip():
+            raise ValueError(f"无效的限流配置: {item.strip()}")
+        limits[prefix.strip()] = RateLimit.parse(rate)
+    return limits
+
+
+class TokenBucketStore:
+    """内存令牌桶表。
+
+    条目按最近访问顺序保存在 ``OrderedDict`` 中，每次访问 O(1)。
+    空闲到令牌补满的条目与新建的桶等价，可以无损淘汰：每次访问时顺带清理
+    队首的此类条目；条目数超过 ``max_entries`` 时再淘汰最久未访问的条目，
+    因此无论有多少不同客户端，内存占用都有上限。
+    """
+
+    def __init__(
+        self, max_entries: int = 100_000, clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_entries = max_entries
+        self._clock = clock
+        # key -> [剩余令牌, 上次更新时间, 补满时间]
+        self._buckets: OrderedDict[tuple[str, str], list[float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def consume(
+        self, key: tuple[str, str], limit: RateLimit
+    ) -> tuple[bool, float, float]:
+        """尝试从桶中取出一个令牌。
+
+        参数:
+            key: 桶标识，通常为 ``(客户端, 路由分组)``
+            limit: 令牌桶参数
+
+        返回:
+            ``(是否放行, 剩余令牌数, 距离下一个令牌的秒数)``
+        """
+        now = self._clock()
+        buckets = self._buckets
+        bucket = buckets.get(key)
+        if bucket is None:
+            tokens = float(limit.burst)
+        else:
+            tokens = min(limit.burst, bucket[0] + (now - bucket[1]) * limit.rate)
+            buckets.move_to_end(key)
+
+        allowed = tokens >= 1.0
+        if allowed:
+            tokens -= 1.0
+        full_at = now + (limit.burst - tokens) / limit.rate
+        if bucket is None:
+            buckets[key] = [tokens, now, full_at]
+            self._evict(now)
+        else:
+            bucket[0], bucket[1], bucket[2] = tokens, now, full_at
+
+        retry_after = 0.0 if allowed else (1.0 - tokens) / limit.rate
+        return allowed, tokens, retry_after
+
+    def _evict(self, now: float) -> None:
+        """淘汰已补满的空闲条目，并保证条目数不超过上限。"""
+        buckets = self._buckets
+        while buckets:
+            oldest = next(iter(buckets.values()))
+            if oldest[2] > now and len(buckets) <= self.max_entries:
+                break
+            buckets.popitem(last=False)
+
+
+class RateLimitMiddleware:
+    """按客户端身份与路由分组限流的纯 ASGI 中间件。
+
+    请求头 ``key_header`` 中的 API Key 只有在 ``api_keys`` 中或通过 ``key_validator``
+    校验时才作为客户端身份，否则（包括两者都未配置时）取远端地址，避免客户端每次
+    换一个随机 Key 就得到一个新的满桶。
+    路由分组按最长路径前缀匹配，未匹配的路径使用 ``default``（为 None 时不限流）。
+    所有受限请求的响应都带有 ``RateLimit-*`` 响应头；被拒绝时返回统一格式的
+    429 响应并携带 ``Retry-After``。
+
+    示例:
+        >>> app.add_middleware(
+        ...     RateLimitMiddleware,
+        ...     limits={"/api/v1/users": RateLimit(20, 40)},
+        ...     api_keys={"team-a-key"},
+        ... )
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        limits: Optional[dict[str, RateLimit]] = None,
+        default: Optional[RateLimit] = None,
+        key_header: str = "x-api-key",
+        api_keys: Iterable[str] = (),
+        key_validator: Optional[Callable[[str], bool]] = None,
+        store: Optional[TokenBucketStore] = None,
+        exempt_paths: Iterable[str] = ("/api/v1/health",),
+    ):
+        self.app = app
+        self.limits = sorted(
+            (limits or {}).items(), key=lambda item: len(item[0]), reverse=True
+        )
+        self.default = default
+        self.key_header = key_header.lower().encode("latin-1")
+        self.api_keys = frozenset(api_keys)
+        self.key_validator = key_validator
+        self.store = store or TokenBucketStore()
+        self.exempt_paths = frozenset(exempt_paths)
+        self.rejected = 0
+        self._body = json.dumps(
+            {"code": 429, "data": None, "message": "请求过于频繁，请稍后重试"},
+            ensure_ascii=False,
+            separators=(",", ":"),
+        ).encode()
+
+    def _match(self, path: str) -> tuple[str, Optional[RateLimit]]:
+        """返回路径所属的路由分组及其速率。"""
+        for prefix, limit in self.limits:
+            if path.startswith(prefix):
+                return prefix, limit
+        return "*", self.default
+
+    def _client(self, scope: Scope) -> str:
+        """识别客户端身份：已知的 API Key，否则为远端地址。"""
+        if self.api_keys or self.key_validator is not None:
+            for name, value in scope.get("headers", ()):
+                if name == self.key_header:
+                    key = value.decode("latin-1")
+                    if key in self.api_keys or (
+                        self.key_validator is not None and self.key_validator(key)
+                    ):
+                        return "key:" + key
+                    break
+        client = scope.get("client")
+        return "addr:" + (client[0] if client else "unknown")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        group, limit = self._match(scope["path"])
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        allowed, remaining, retry_after = self.store.consume(
+            (self._client(scope), group), limit
+        )
+        headers = [
+            (b"ratelimit-limit", str(limit.burst).encode()),
+            (b"ratelimit-remaining", str(int(remaining)).encode()),
+            (
+                b"ratelimit-reset",
+                str(math.ceil((limit.burst - remaining) / limit.rate)).encode(),
+            ),
+        ]
+
+        if not allowed:
+            self.rejected += 1
+            headers += [
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(self._body)).encode()),
+            ]
+            await send(
+                {"type": "http.response.start", "status": 429, "headers": headers}
+            )
+            await send({"type": "http.response.body", "body": self._body})
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), *headers]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,257 @@
+"""用户数据仓储模块 - 为 API 提供可替换的存储后端。
+
+本模块定义了：
+- 用户记录的数据结构
+- 存储后端的抽象接口 ``UserRepository``
+- 基于内存的默认实现 ``InMemoryUserRepository``
+
+所有仓储方法均为异步方法，便于后续接入需要在线程池中执行阻塞调用的后端。
+"""
+
+from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, replace
+from datetime import datetime
+from itertools import islice
+from typing import Any, AsyncIterator, Optional, Union
+
+
+class RepositoryError(Exception):
+    """仓储操作异常的基类。"""
+
+
+class DuplicateEmailError(RepositoryError):
+    """邮箱地址已被其他用户占用。"""
+
+    def __init__(self, email: str):
+        super().__init__(f"邮箱已存在: {email}")
+        self.email = email
+
+
+@dataclass(frozen=True, slots=True)
+class UserRecord:
+    """存储层的用户记录。
+
+    记录不可变，每次更新都会生成新的记录并递增 ``version``。
+    """
+
+    id: int
+    name: str
+    email: str
+    age: Optional[int]
+    created_at: datetime
+    version: int = 1
+
+    def to_dict(self) -> dict[str, Any]:
+        """转换为对外暴露的字典（不包含内部版本号）。"""
+        return {
+            "id": self.id,
+            "name": self.name,
+            "email": self.email,
+            "age": self.age,
+            "created_at": self.created_at,
+        }
+
+
+class UserRepository(ABC):
+    """用户仓储的抽象接口。
+
+    具体后端需实现全部抽象方法；``open``/``close`` 用于管理连接等资源，
+    默认为空操作。
+    """
+
+    async def open(self) -> None:
+        """初始化后端资源。"""
+        return None
+
+    async def close(self) -> None:
+        """释放后端资源。"""
+        return None
+
+    @abstractmethod
+    async def get(self, user_id: int) -> Optional[UserRecord]:
+        """根据 ID 获取用户，不存在时返回 None。"""
+
+    @abstractmethod
+    async def get_many(self, user_ids: list[int]) -> dict[int, UserRecord]:
+        """一次性获取多个用户，返回 ``id -> 记录`` 映射，不存在的 ID 不出现在结果中。"""
+
+    @abstractmethod
+    async def get_by_email(self, email: str) -> Optional[UserRecord]:
+        """根据邮箱获取用户，不存在时返回 None。"""
+
+    @abstractmethod
+    async def create(
+        self, name: str, email: str, age: Optional[int] = None
+    ) -> UserRecord:
+        """创建用户。
+
+        Raises:
+            DuplicateEmailError: 邮箱已存在时抛出
+        """
+
+    @abstractmethod
+    async def update(
+        self, user_id: int, changes: dict[str, Any]
+    ) -> Optional[UserRecord]:
+        """更新用户字段，用户不存在时返回 None。
+
+        Raises:
+            DuplicateEmailError: 新邮箱已被其他用户占用时抛出
+        """
+
+    @abstractmethod
+    async def delete(self, user_id: int) -> bool:
+        """删除用户，返回是否确实删除了记录。"""
+
+    @abstractmethod
+    async def list_users(self, skip: int = 0, limit: int = 10) -> list[UserRecord]:
+        """按 ID 升序返回一页用户。"""
+
+    @abstractmethod
+    async def list_after(self, after_id: int, limit: int = 10) -> list[UserRecord]:
+        """按 ID 升序返回 ``id > after_id`` 的前 ``limit`` 个用户（键集分页）。"""
+
+    @abstractmethod
+    async def count(self) -> int:
+        """返回用户总数。"""
+
+    async def create_many(
+        self, items: list[dict[str, Any]]
+    ) -> list[Union[UserRecord, DuplicateEmailError]]:
+        """批量创建用户。
+
+        单条失败不影响其他条目，返回值与 ``items`` 一一对应：
+        成功时为新记录，邮箱冲突时为对应的异常实例。
+        后端可覆盖此方法，在单个事务中完成全部写入。
+        """
+        results: list[Union[UserRecord, DuplicateEmailError]] = []
+        for item in items:
+            try:
+                results.append(await self.create(**item))
+            except DuplicateEmailError as exc:
+                results.append(exc)
+        return results
+
+    async def update_many(
+        self, items: list[tuple[int, dict[str, Any]]]
+    ) -> list[Union[UserRecord, DuplicateEmailError, None]]:
+        """批量更新用户。
+
+        ``items`` 为 ``(user_id, changes)`` 列表，返回值与之一一对应：
+        成功时为更新后的记录，用户不存在时为 None，邮箱冲突时为异常实例。
+        """
+        results: list[Union[UserRecord, DuplicateEmailError, None]] = []
+        for user_id, changes in items:
+            try:
+                results.append(await self.update(user_id, changes))
+            except DuplicateEmailError as exc:
+                results.append(exc)
+        return results
+
+    async def delete_many(self, user_ids: list[int]) -> list[bool]:
+        """批量删除用户，返回每个 ID 是否确实删除了记录。"""
+        return [await self.delete(user_id) for user_id in user_ids]
+
+    async def iter_batches(
+        self, batch_size: int = 500, after_id: int = 0
+    ) -> AsyncIterator[list[UserRecord]]:
+        """按 ID 升序分批遍历全部用户。
+
+        基于 ``list_after`` 的键集分页实现，任意时刻只持有一批记录，
+        适合导出等需要遍历全量数据的场景。
+        """
+        while True:
+            batch = await self.list_after(after_id, batch_size)
+            if not batch:
+                return
+            yield batch
+            if len(batch) < batch_size:
+                return
+            after_id = batch[-1].id
+
+
+class InMemoryUserRepository(UserRepository):
+    """基于字典的内存仓储。
+
+    - 主索引：``id -> UserRecord``，ID 单调递增，字典的插入顺序即 ID 顺序
+    - 唯一索引：``email -> id``
+    - 有序 ID 列表：用于键集分页的二分查找定位
+
+    所有操作在事件循环线程内同步完成（中间没有 await），因此无需加锁。
+    """
+
+    def __init__(self) -> None:
+        self._users: dict[int, UserRecord] = {}
+        self._email_index: dict[str, int] = {}
+        # ID 单调递增，追加即保持有序
+        self._ids: list[int] = []
+        self._next_id = 1
+
+    async def get(self, user_id: int) -> Optional[UserRecord]:
+        return self._users.get(user_id)
+
+    async def get_many(self, user_ids: list[int]) -> dict[int, UserRecord]:
+        users = self._users
+        return {user_id: users[user_id] for user_id in user_ids if user_id in users}
+
+    async def get_by_email(self, email: str) -> Optional[UserRecord]:
+        user_id = self._email_index.get(email)
+        return None if user_id is None else self._users[user_id]
+
+    async def create(
+        self, name: str, email: str, age: Optional[int] = None
+    ) -> UserRecord:
+        if email in self._email_index:
+            raise DuplicateEmailError(email)
+
+        record = UserRecord(
+            id=self._next_id,
+            name=name,
+            email=email,
+            age=age,
+            created_at=datetime.now(),
+        )
+        self._next_id += 1
+        self._users[record.id] = record
+        self._email_index[email] = record.id
+        self._ids.append(record.id)
+        return record
+
+    async def update(
+        self, user_id: int, changes: dict[str, Any]
+    ) -> Optional[UserRecord]:
+        current = self._users.get(user_id)
+        if current is None:
+            return None
+
+        new_email = changes.get("email", current.email)
+        if new_email != current.email:
+            owner = self._email_index.get(new_email)
+            if owner is not None and owner != user_id:
+                raise DuplicateEmailError(new_email)
+
+        record = replace(current, **changes, version=current.version + 1)
+        if record.email != current.email:
+            del self._email_index[current.email]
+            self._email_index[record.email] = user_id
+        self._users[user_id] = record
+        return record
+
+    async def delete(self, user_id: int) -> bool:
+        record = self._users.pop(user_id, None)
+        if record is None:
+            return False
+        del self._email_index[record.email]
+        del self._ids[bisect_left(self._ids, user_id)]
+        return True
+
+    async def list_users(self, skip: int = 0, limit: int = 10) -> list[UserRecord]:
+        return list(islice(self._users.values(), skip, skip + limit))
+
+    async def list_after(self, after_id: int, limit: int = 10) -> list[UserRecord]:
+        start = bisect_right(self._ids, after_id)
+        return [self._users[user_id] for user_id in self._ids[start : start + limit]]
+
+    async def count(self) -> int:
+        return len(self._users)
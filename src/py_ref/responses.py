@@ -0,0 +1,59 @@
+"""高性能 JSON 响应模块。
+
+安装了 orjson 时使用 orjson 编码，否则回退到标准库 json（紧凑分隔符、不转义非 ASCII），
+两种编码器的输出在语义上一致。
+"""
+
+import json
+from datetime import date, datetime
+from enum import Enum
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 取决于运行环境
+    orjson = None
+
+# 当前使用的 JSON 编码器名称
+JSON_BACKEND = "orjson" if orjson is not None else "json"
+
+
+def _default(value: Any) -> Any:
+    """标准库 json 编码时处理不支持的类型。"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"无法序列化的类型: {type(value).__name__}")
+
+
+def json_dumps(content: Any) -> bytes:
+    """将内容编码为 UTF-8 JSON 字节串。
+
+    参数:
+        content: 由 dict/list/str/int/float/bool/None/datetime/Enum 组成的数据
+
+    返回:
+        编码后的字节串
+
+    示例:
+        >>> json_dumps({"code": 0, "data": None})
+        b'{"code":0,"data":null}'
+    """
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content, ensure_ascii=False, separators=(",", ":"), default=_default
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """使用 ``json_dumps`` 编码的 JSON 响应。
+
+    内容在构造时只编码一次，不经过 ``jsonable_encoder``。
+    """
+
+    def render(self, content: Any) -> bytes:
+        return json_dumps(content)
@@ -0,0 +1,207 @@
+"""生产环境服务启动器 - 多 worker 运行 API 服务。
+
+应用以导入字符串（如 ``py_ref.api:app``）传给 uvicorn，由每个 worker 进程自行导入，
+主进程只负责管理 worker，不加载应用本身。安装了 uvloop / httptools 时自动选用。
+
+默认的内存存储在每个 worker 进程中各有一份数据，因此只有配置了 SQLite 文件存储
+（``PY_REF_SQLITE_PATH``）时才默认按 CPU 核数启动多个 worker。
+
+``get_user`` 的响应缓存在每个 worker 进程内各有一份，写入只会使处理该请求的进程
+的缓存失效，其他 worker 在缓存过期前仍会返回旧数据。因此多 worker 时
+``PY_REF_USER_CACHE_TTL`` 默认缩短为 1 秒（即跨进程的最大陈旧时间）；显式设置该
+环境变量可以换取更高的命中率，设为 0 则关闭缓存。
+
+用法:
+    python -m py_ref.server --workers 4 --port 8000
+    py-ref-serve --no-access-log
+"""
+
+import argparse
+import importlib.util
+import os
+from typing import Any, Optional, Sequence
+
+from py_ref.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_APP = "py_ref.api:app"
+
+# 多 worker 时 get_user 缓存的默认存活秒数（未设置 PY_REF_USER_CACHE_TTL 时生效）
+MULTI_WORKER_USER_CACHE_TTL = "1"
+
+
+def shared_storage() -> bool:
+    """判断是否配置了可在多个 worker 进程间共享的存储（SQLite 文件）。"""
+    path = os.getenv("PY_REF_SQLITE_PATH")
+    return bool(path) and ":memory:" not in path
+
+
+def default_workers() -> int:
+    """返回默认 worker 数：使用共享存储时为当前进程可用的 CPU 核数，否则为 1。"""
+    if not shared_storage():
+        return 1
+    count = getattr(os, "process_cpu_count", os.cpu_count)()
+    return count or 1
+
+
+def _env_int(name: str, default: Optional[int]) -> Optional[int]:
+    """读取整数环境变量，未设置时返回默认值。"""
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+class ServerConfig:
+    """服务启动配置（命令行参数的默认值，可通过环境变量覆盖）。"""
+
+    APP = os.getenv("PY_REF_APP", DEFAULT_APP)
+    HOST = os.getenv("PY_REF_HOST", "0.0.0.0")
+    PORT = int(os.getenv("PY_REF_PORT", "8000"))
+    # worker 进程数，默认见 default_workers()
+    WORKERS = _env_int("PY_REF_WORKERS", None)
+    # 事件循环与 HTTP 解析器："auto" 表示已安装 uvloop / httptools 时优先使用
+    LOOP = os.getenv("PY_REF_LOOP", "auto")
+    HTTP = os.getenv("PY_REF_HTTP", "auto")
+    # 监听套接字的等待连接队列长度
+    BACKLOG = int(os.getenv("PY_REF_BACKLOG", "2048"))
+    # keep-alive 连接的空闲超时（秒）
+    KEEP_ALIVE = int(os.getenv("PY_REF_KEEP_ALIVE", "5"))
+    # 每个 worker 的最大并发连接数，超出时 uvicorn 直接返回 503；为空时不限制
+    LIMIT_CONCURRENCY = _env_int("PY_REF_LIMIT_CONCURRENCY", None)
+    LOG_LEVEL = os.getenv("PY_REF_LOG_LEVEL", "info")
+    # uvicorn 自带的访问日志；应用自身的访问日志由 RequestTimingMiddleware 输出
+    ACCESS_LOG = os.getenv("PY_REF_UVICORN_ACCESS_LOG", "0") == "1"
+
+
+def resolve_loop(loop: str) -> str:
+    """解析事件循环实现，``auto`` 时已安装 uvloop 则使用 uvloop。"""
+    if loop != "auto":
+        return loop
+    return "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+
+
+def resolve_http(http: str) -> str:
+    """解析 HTTP 协议实现，``auto`` 时已安装 httptools 则使用 httptools。"""
+    if http != "auto":
+        return http
+    return "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """构建命令行参数解析器。"""
+    parser = argparse.ArgumentParser(
+        prog="py-ref-serve", description="以多 worker 方式运行 py_ref API 服务"
+    )
+    parser.add_argument(
+        "app",
+        nargs="?",
+        default=ServerConfig.APP,
+        help="应用导入字符串，格式为 模块:属性（默认 %(default)s）",
+    )
+    parser.add_argument(
+        "--factory",
+        action="store_true",
+        help="将导入字符串视为返回应用的无参工厂函数",
+    )
+    parser.add_argument("--host", default=ServerConfig.HOST)
+    parser.add_argument("--port", type=int, default=ServerConfig.PORT)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=ServerConfig.WORKERS,
+        help=(
+            "worker 进程数（配置了 PY_REF_SQLITE_PATH 时默认为可用 CPU 核数，否则为 1）；"
+            "多于 1 个时 get_user 缓存 TTL 默认为 1 秒"
+        ),
+    )
+    parser.add_argument(
+        "--loop", choices=("auto", "uvloop", "asyncio"), default=ServerConfig.LOOP
+    )
+    parser.add_argument(
+        "--http", choices=("auto", "httptools", "h11"), default=ServerConfig.HTTP
+    )
+    parser.add_argument("--backlog", type=int, default=ServerConfig.BACKLOG)
+    parser.add_argument(
+        "--keep-alive",
+        type=int,
+        default=ServerConfig.KEEP_ALIVE,
+        help="keep-alive 空闲超时秒数",
+    )
+    parser.add_argument(
+        "--limit-concurrency",
+        type=int,
+        default=ServerConfig.LIMIT_CONCURRENCY,
+        help="每个 worker 的最大并发连接数",
+    )
+    parser.add_argument("--log-level", default=ServerConfig.LOG_LEVEL)
+    parser.add_argument(
+        "--access-log",
+        action=argparse.BooleanOptionalAction,
+        default=ServerConfig.ACCESS_LOG,
+        help="是否输出 uvicorn 访问日志",
+    )
+    return parser
+
+
+def build_options(args: argparse.Namespace) -> dict[str, Any]:
+    """将命令行参数转换为 ``uvicorn.run`` 的关键字参数。
+
+    参数:
+        args: ``build_parser()`` 解析得到的参数
+
+    返回:
+        传给 ``uvicorn.run`` 的关键字参数（不含应用导入字符串）
+    """
+    return {
+        "factory": args.factory,
+        "host": args.host,
+        "port": args.port,
+        "workers": args.workers or default_workers(),
+        "loop": resolve_loop(args.loop),
+        "http": resolve_http(args.http),
+        "backlog": args.backlog,
+        "timeout_keep_alive": args.keep_alive,
+        "limit_concurrency": args.limit_concurrency,
+        "log_level": args.log_level,
+        "access_log": args.access_log,
+    }
+
+
+def serve(argv: Optional[Sequence[str]] = None) -> None:
+    """解析命令行参数并启动 uvicorn。
+
+    参数:
+        argv: 命令行参数，为 None 时读取 ``sys.argv``
+    """
+    import uvicorn
+
+    args = build_parser().parse_args(argv)
+    options = build_options(args)
+    logger.info(
+        "启动服务: app=%s workers=%d loop=%s http=%s",
+        args.app,
+        options["workers"],
+        options["loop"],
+        options["http"],
+    )
+    if options["workers"] > 1 and args.app == DEFAULT_APP and not shared_storage():
+        logger.warning(
+            "未配置 PY_REF_SQLITE_PATH：%d 个 worker 各自使用独立的内存存储，"
+            "不同请求可能看到不同的数据",
+            options["workers"],
+        )
+    if options["workers"] > 1:
+        # 各 worker 轮转各自的日志文件，避免多个进程重命名同一文件
+        os.environ.setdefault("PY_REF_LOG_PER_PROCESS", "1")
+        # 缓存只在本进程内失效，缩短 TTL 以限制其他 worker 写入后的陈旧时间
+        os.environ.setdefault("PY_REF_USER_CACHE_TTL", MULTI_WORKER_USER_CACHE_TTL)
+    uvicorn.run(args.app, **options)
+
+
+def main() -> None:
+    """命令行入口。"""
+    serve()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""请求合并模块 - 相同键的并发读取只执行一次。
+
+缓存未命中时，大量并发请求可能同时读取同一条记录（惊群）。``SingleFlight``
+让相同键的并发调用共享同一个进行中的任务：第一个调用者发起读取，其余调用者
+等待同一结果，从而保护后端存储。
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """按键合并并发的异步调用。
+
+    共享的读取在独立的任务中执行，调用者通过 ``asyncio.shield`` 等待：
+    某个调用者被取消只影响它自己，不会中断其他调用者正在等待的读取；
+    读取抛出的异常会传递给所有等待者。任务结束后立即从进行中表移除，
+    之后的调用会重新执行，不缓存结果。
+
+    只能在单个事件循环中使用，无需加锁。
+
+    示例:
+        >>> flight = SingleFlight()
+        >>> record = await flight.do(user_id, lambda: repository.get(user_id))
+    """
+
+    def __init__(self):
+        self._inflight: dict[Hashable, asyncio.Task[T]] = {}
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """执行 ``func``，若相同键的调用正在进行则等待其结果。
+
+        参数:
+            key: 合并键，相同键的并发调用共享一次执行
+            func: 返回可等待对象的无参函数，只在没有进行中的调用时被调用
+
+        返回:
+            ``func`` 的结果
+        """
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is None:
+            self.executions += 1
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def forget(self, key: Hashable) -> None:
+        """移除相同键的进行中调用，之后的调用重新执行 ``func``。
+
+        数据被修改后调用：已在等待的调用者仍得到原任务的结果，但新的调用者
+        不会再加入修改之前开始的读取。
+        """
+        self._inflight.pop(key, None)
+
+    def _forget(self, key: Hashable, task: asyncio.Task[T]) -> None:
+        """任务结束后移除进行中记录。"""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # 所有调用者都已取消时没有人读取异常，这里取出以免出现
+        # "exception was never retrieved" 警告
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict[str, int]:
+        """返回调用统计。"""
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "inflight": len(self._inflight),
+        }
@@ -0,0 +1,361 @@
+"""SQLite 用户仓储 - 基于有界连接池的持久化后端。
+
+设计要点：
+- 固定大小的连接池，每个连接只在线程池的工作线程中使用，
+  阻塞的 SQLite 调用不会占用 asyncio 事件循环
+- WAL 日志模式：读操作不会被写操作阻塞
+- 所有 SQL 均为固定字符串并使用参数绑定，命中 sqlite3 的预编译语句缓存
+- ``email`` 列上的唯一索引保证邮箱唯一
+"""
+
+import asyncio
+import json
+import queue
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional, TypeVar, Union
+
+from py_ref.logger import get_logger
+from py_ref.repository import DuplicateEmailError, UserRecord, UserRepository
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+# 允许通过 update 修改的列，防止拼接任意列名
+_UPDATABLE_COLUMNS = ("name", "email", "age")
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        email TEXT NOT NULL,
+        age INTEGER,
+        created_at TEXT NOT NULL,
+        version INTEGER NOT NULL DEFAULT 1
+    )
+    """,
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_users_email ON users (email)",
+)
+
+_COLUMNS = "id, name, email, age, created_at, version"
+_SELECT_BY_ID = f"SELECT {_COLUMNS} FROM users WHERE id = ?"
+# 通过 json_each 展开 ID 数组，任意数量的 ID 都复用同一条预编译语句
+_SELECT_MANY = (
+    f"SELECT {_COLUMNS} FROM users WHERE id IN (SELECT value FROM json_each(?))"
+)
+_SELECT_BY_EMAIL = f"SELECT {_COLUMNS} FROM users WHERE email = ?"
+_SELECT_PAGE = f"SELECT {_COLUMNS} FROM users ORDER BY id LIMIT ? OFFSET ?"
+_SELECT_AFTER = f"SELECT {_COLUMNS} FROM users WHERE id > ? ORDER BY id LIMIT ?"
+_INSERT = (
+    "INSERT INTO users (name, email, age, created_at) VALUES (?, ?, ?, ?) "
+    f"RETURNING {_COLUMNS}"
+)
+_DELETE = "DELETE FROM users WHERE id = ?"
+_COUNT = "SELECT COUNT(*) FROM users"
+
+
+@contextmanager
+def _transaction(connection: sqlite3.Connection) -> Iterator[None]:
+    """在单个写事务中执行多条语句，异常时整体回滚。
+
+    使用 ``BEGIN IMMEDIATE`` 提前获取写锁，避免读事务升级为写事务时的死锁。
+    """
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        yield
+    except BaseException:
+        connection.execute("ROLLBACK")
+        raise
+    connection.execute("COMMIT")
+
+
+def _to_record(row: tuple) -> UserRecord:
+    """将查询结果行转换为用户记录。"""
+    user_id, name, email, age, created_at, version = row
+    return UserRecord(
+        id=user_id,
+        name=name,
+        email=email,
+        age=age,
+        created_at=datetime.fromisoformat(created_at),
+        version=version,
+    )
+
+
+class SQLiteConnectionPool:
+    """有界的 SQLite 连接池。
+
+    连接数与工作线程数相同，因此工作线程获取连接时永远不会等待；
+    超出池大小的并发请求在线程池队列中排队，而不是阻塞事件循环。
+
+    ``path`` 必须是数据库文件：``:memory:`` 会让每个连接各自打开一个空数据库，
+    因此不被接受。
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        size: int = 8,
+        timeout: float = 5.0,
+        cached_statements: int = 256,
+    ):
+        if size < 1:
+            raise ValueError("连接池大小必须大于 0")
+        if str(path) == ":memory:" or str(path).startswith("file:"):
+            raise ValueError("连接池需要数据库文件路径，不支持内存数据库或 URI")
+        self.path = str(path)
+        self.size = size
+        self.timeout = timeout
+        self.cached_statements = cached_statements
+        self._idle: queue.SimpleQueue[sqlite3.Connection] = queue.SimpleQueue()
+        self._connections: list[sqlite3.Connection] = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def is_open(self) -> bool:
+        """连接池是否已打开。"""
+        return self._executor is not None
+
+    def _connect(self) -> sqlite3.Connection:
+        """创建并配置单个连接。"""
+        connection = sqlite3.connect(
+            self.path,
+            timeout=self.timeout,
+            isolation_level=None,  # 自动提交，写事务显式 BEGIN
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+        )
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.execute("PRAGMA synchronous = NORMAL")
+        connection.execute(f"PRAGMA busy_timeout = {int(self.timeout * 1000)}")
+        return connection
+
+    def open(self) -> None:
+        """创建全部连接并启动工作线程池。"""
+        if self.is_open:
+            return
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        for _ in range(self.size):
+            connection = self._connect()
+            self._connections.append(connection)
+            self._idle.put(connection)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.size, thread_name_prefix="py_ref-sqlite"
+        )
+
+    def close(self) -> None:
+        """等待进行中的操作完成后关闭全部连接。"""
+        if self._executor is None:
+            return
+        self._executor.shutdown(wait=True)
+        self._executor = None
+        for connection in self._connections:
+            connection.close()
+        self._connections.clear()
+        self._idle = queue.SimpleQueue()
+
+    def _call(self, func: Callable[..., T], args: tuple) -> T:
+        """在工作线程中借出连接执行函数。"""
+        connection = self._idle.get()
+        try:
+            return func(connection, *args)
+        finally:
+            self._idle.put(connection)
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        """在线程池中执行 ``func(connection, *args)`` 并等待结果。
+
+        Raises:
+            RuntimeError: 连接池未打开时抛出
+        """
+        if self._executor is None:
+            raise RuntimeError("连接池未打开")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._call, func, args)
+
+
+class SQLiteUserRepository(UserRepository):
+    """基于 SQLite 的用户仓储。
+
+    示例:
+        >>> repository = SQLiteUserRepository("data/users.db", pool_size=8)
+        >>> await repository.open()
+        >>> record = await repository.create("张三", "zhangsan@example.com")
+    """
+
+    def __init__(self, path: Union[str, Path], pool_size: int = 8):
+        self.pool = SQLiteConnectionPool(path, size=pool_size)
+
+    async def open(self) -> None:
+        self.pool.open()
+        await self.pool.run(self._init_schema)
+        logger.info("SQLite 仓储已打开: %s (连接数=%s)", self.pool.path, self.pool.size)
+
+    async def close(self) -> None:
+        await asyncio.to_thread(self.pool.close)
+        logger.info("SQLite 仓储已关闭")
+
+    @staticmethod
+    def _init_schema(connection: sqlite3.Connection) -> None:
+        for statement in _SCHEMA:
+            connection.execute(statement)
+
+    # ---------- 在工作线程中执行的同步实现 ----------
+
+    @staticmethod
+    def _fetch_one(
+        connection: sqlite3.Connection, sql: str, params: tuple
+    ) -> Optional[UserRecord]:
+        row = connection.execute(sql, params).fetchone()
+        return None if row is None else _to_record(row)
+
+    @staticmethod
+    def _fetch_many(
+        connection: sqlite3.Connection, user_ids: list[int]
+    ) -> dict[int, UserRecord]:
+        rows = connection.execute(_SELECT_MANY, (json.dumps(user_ids),)).fetchall()
+        return {row[0]: _to_record(row) for row in rows}
+
+    @staticmethod
+    def _insert(
+        connection: sqlite3.Connection, name: str, email: str, age: Optional[int]
+    ) -> UserRecord:
+        try:
+            row = connection.execute(
+                _INSERT, (name, email, age, datetime.now().isoformat())
+            ).fetchone()
+        except sqlite3.IntegrityError as exc:
+            raise DuplicateEmailError(email) from exc
+        return _to_record(row)
+
+    @staticmethod
+    def _update(
+        connection: sqlite3.Connection, user_id: int, changes: dict[str, Any]
+    ) -> Optional[UserRecord]:
+        columns = [column for column in _UPDATABLE_COLUMNS if column in changes]
+        assignments = "".join(f"{column} = ?, " for column in columns)
+        sql = (
+            f"UPDATE users SET {assignments}version = version + 1 "
+            f"WHERE id = ? RETURNING {_COLUMNS}"
+        )
+        params = (*(changes[column] for column in columns), user_id)
+        try:
+            row = connection.execute(sql, params).fetchone()
+        except sqlite3.IntegrityError as exc:
+            raise DuplicateEmailError(changes.get("email", "")) from exc
+        return None if row is None else _to_record(row)
+
+    @staticmethod
+    def _delete(connection: sqlite3.Connection, user_id: int) -> bool:
+        return connection.execute(_DELETE, (user_id,)).rowcount > 0
+
+    # 批量操作：单条语句违反约束时 SQLite 只回滚该语句，事务继续，
+    # 因此可以在一个事务内逐条返回结果
+
+    @classmethod
+    def _insert_many(
+        cls, connection: sqlite3.Connection, items: list[dict[str, Any]]
+    ) -> list[Union[UserRecord, DuplicateEmailError]]:
+        results: list[Union[UserRecord, DuplicateEmailError]] = []
+        with _transaction(connection):
+            for item in items:
+                try:
+                    results.append(
+                        cls._insert(
+                            connection, item["name"], item["email"], item.get("age")
+                        )
+                    )
+                except DuplicateEmailError as exc:
+                    results.append(exc)
+        return results
+
+    @classmethod
+    def _update_many(
+        cls, connection: sqlite3.Connection, items: list[tuple[int, dict[str, Any]]]
+    ) -> list[Union[UserRecord, DuplicateEmailError, None]]:
+        results: list[Union[UserRecord, DuplicateEmailError, None]] = []
+        with _transaction(connection):
+            for user_id, changes in items:
+                try:
+                    results.append(cls._update(connection, user_id, changes))
+                except DuplicateEmailError as exc:
+                    results.append(exc)
+        return results
+
+    @classmethod
+    def _delete_many(
+        cls, connection: sqlite3.Connection, user_ids: list[int]
+    ) -> list[bool]:
+        with _transaction(connection):
+            return [cls._delete(connection, user_id) for user_id in user_ids]
+
+    @staticmethod
+    def _select_page(
+        connection: sqlite3.Connection, skip: int, limit: int
+    ) -> list[UserRecord]:
+        rows = connection.execute(_SELECT_PAGE, (limit, skip)).fetchall()
+        return [_to_record(row) for row in rows]
+
+    @staticmethod
+    def _select_after(
+        connection: sqlite3.Connection, after_id: int, limit: int
+    ) -> list[UserRecord]:
+        rows = connection.execute(_SELECT_AFTER, (after_id, limit)).fetchall()
+        return [_to_record(row) for row in rows]
+
+    @staticmethod
+    def _count(connection: sqlite3.Connection) -> int:
+        return connection.execute(_COUNT).fetchone()[0]
+
+    # ---------- 异步接口 ----------
+
+    async def get(self, user_id: int) -> Optional[UserRecord]:
+        return await self.pool.run(self._fetch_one, _SELECT_BY_ID, (user_id,))
+
+    async def get_many(self, user_ids: list[int]) -> dict[int, UserRecord]:
+        if not user_ids:
+            return {}
+        return await self.pool.run(self._fetch_many, user_ids)
+
+    async def get_by_email(self, email: str) -> Optional[UserRecord]:
+        return await self.pool.run(self._fetch_one, _SELECT_BY_EMAIL, (email,))
+
+    async def create(
+        self, name: str, email: str, age: Optional[int] = None
+    ) -> UserRecord:
+        return await self.pool.run(self._insert, name, email, age)
+
+    async def update(
+        self, user_id: int, changes: dict[str, Any]
+    ) -> Optional[UserRecord]:
+        return await self.pool.run(self._update, user_id, changes)
+
+    async def delete(self, user_id: int) -> bool:
+        return await self.pool.run(self._delete, user_id)
+
+    async def create_many(
+        self, items: list[dict[str, Any]]
+    ) -> list[Union[UserRecord, DuplicateEmailError]]:
+        return await self.pool.run(self._insert_many, items)
+
+    async def update_many(
+        self, items: list[tuple[int, dict[str, Any]]]
+    ) -> list[Union[UserRecord, DuplicateEmailError, None]]:
+        return await self.pool.run(self._update_many, items)
+
+    async def delete_many(self, user_ids: list[int]) -> list[bool]:
+        return await self.pool.run(self._delete_many, user_ids)
+
+    async def list_users(self, skip: int = 0, limit: int = 10) -> list[UserRecord]:
+        return await self.pool.run(self._select_page, skip, limit)
+
+    async def list_after(self, after_id: int, limit: int = 10) -> list[UserRecord]:
+        return await self.pool.run(self._select_after, after_id, limit)
+
+    async def count(self) -> int:
+        return await self.pool.run(self._count)
@@ -13,3 +13,19 @@ def sample_data():
 def sample_numbers():
     """提供测试用的示例数字列表。"""
     return [1, 2, 3, 4, 5]
+
+
+class FakeClock:
+    """可手动推进的时钟。"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    """提供从 0 开始、可通过 ``clock.now`` 手动推进的时钟。"""
+    return FakeClock()
@@ -1,14 +1,59 @@
 """API 模块的测试用例。"""
 
+import asyncio
+import gc
+import json
+import sys
+
+import httpx
 import pytest
+from fastapi.encoders import jsonable_encoder
 from fastapi.testclient import TestClient
 
-from py_ref.api import app
+from py_ref.api import (
+    ApiConfig,
+    ApiResponse,
+    UserResponse,
+    _export_ndjson,
+    app,
+    encode_user_body,
+    etag_matches,
+    get_user_cache,
+    get_user_repository,
+    prime_user_cache,
+    warm_up,
+)
+from py_ref.cache import LRUCache
+from py_ref.repository import InMemoryUserRepository
 
 # 创建测试客户端
 client = TestClient(app)
 
 
+async def _seed(repository, count):
+    """向仓储写入指定数量的示例用户。"""
+    for i in range(1, count + 1):
+        await repository.create(name=f"用户{i}", email=f"user{i}@example.com", age=20)
+
+
+@pytest.fixture(autouse=True)
+def user_repository(user_cache):
+    """为每个测试提供预置 100 个用户的独立内存仓储。"""
+    repository = InMemoryUserRepository()
+    asyncio.run(_seed(repository, 100))
+    app.dependency_overrides[get_user_repository] = lambda: repository
+    yield repository
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def user_cache():
+    """为每个测试提供独立的用户响应缓存。"""
+    cache = LRUCache(maxsize=16, ttl=60)
+    app.dependency_overrides[get_user_cache] = lambda: cache
+    return cache
+
+
 class TestBasicEndpoints:
     """基础端点的测试用例。"""
 
@@ -20,6 +65,20 @@ class TestBasicEndpoints:
         assert data["code"] == 0
         assert "message" in data["data"]
 
+    def test_metrics(self):
+        """测试指标端点输出 Prometheus 文本格式。"""
+        client.get("/api/v1/users/1")
+        client.get("/no/such/path")
+        response = client.get("/api/v1/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        text = response.text
+        assert "# TYPE py_ref_http_request_duration_seconds histogram" in text
+        assert 'route="/api/v1/users/{user_id}",status="2xx"' in text
+        assert 'route="<unmatched>",status="4xx"' in text
+        assert "py_ref_http_requests_in_flight 1" in text
+        assert 'py_ref_cache_hits_total{cache="user"}' in text
+
     def test_health_check(self):
         """测试健康检查端点。"""
         response = client.get("/api/v1/health")
@@ -87,6 +146,21 @@ class TestUserEndpoints:
         assert data["data"]["age"] == 30
         assert data["message"] == "用户更新成功"
 
+    def test_create_user_duplicate_email(self):
+        """测试使用已存在的邮箱创建用户。"""
+        user_data = {"name": "重复", "email": "user1@example.com"}
+        response = client.post("/api/v1/users", json=user_data)
+        assert response.status_code == 409
+        assert response.json()["code"] == 409
+
+    def test_create_then_get_user(self):
+        """测试创建后的用户可以被读取。"""
+        user_data = {"name": "张三", "email": "zhangsan@example.com", "age": 25}
+        created = client.post("/api/v1/users", json=user_data).json()["data"]
+        response = client.get(f"/api/v1/users/{created['id']}")
+        assert response.status_code == 200
+        assert response.json()["data"]["email"] == "zhangsan@example.com"
+
     def test_update_user_not_found(self):
         """测试更新不存在的用户。"""
         update_data = {"name": "王五"}
@@ -104,6 +178,12 @@ class TestUserEndpoints:
         assert data["code"] == 0
         assert data["message"] == "用户删除成功"
 
+    def test_delete_user_then_get(self):
+        """测试删除后的用户无法再被读取。"""
+        client.delete("/api/v1/users/1")
+        response = client.get("/api/v1/users/1")
+        assert response.status_code == 404
+
     def test_delete_user_not_found(self):
         """测试删除不存在的用户。"""
         response = client.delete("/api/v1/users/999")
@@ -134,6 +214,78 @@ class TestUserEndpoints:
         assert data["data"]["limit"] == 20
         assert len(data["data"]["users"]) == 20
 
+    def test_list_users_cursor_walk(self):
+        """测试使用游标遍历全部用户。"""
+        seen = []
+        cursor = None
+        while True:
+            params = {"limit": 30}
+            if cursor:
+                params["after"] = cursor
+            data = client.get("/api/v1/users", params=params).json()["data"]
+            seen.extend(user["id"] for user in data["users"])
+            cursor = data["next_cursor"]
+            if cursor is None:
+                break
+        assert seen == list(range(1, 101))
+
+    def test_list_users_cursor_skips_deleted(self):
+        """测试游标所指记录被删除后仍能继续翻页。"""
+        first = client.get("/api/v1/users?limit=5").json()["data"]
+        client.delete("/api/v1/users/5")
+        second = client.get(f"/api/v1/users?limit=5&after={first['next_cursor']}")
+        assert [user["id"] for user in second.json()["data"]["users"]] == [
+            6,
+            7,
+            8,
+            9,
+            10,
+        ]
+
+    def test_list_users_cursor_total_opt_in(self, user_repository):
+        """测试游标翻页默认不统计总数，include_total 时才统计。"""
+        counts = 0
+        original_count = user_repository.count
+
+        async def counting_count():
+            nonlocal counts
+            counts += 1
+            return await original_count()
+
+        user_repository.count = counting_count
+        cursor = client.get("/api/v1/users?limit=5").json()["data"]["next_cursor"]
+        assert counts == 1
+
+        data = client.get(f"/api/v1/users?limit=5&after={cursor}").json()["data"]
+        assert data["total"] is None
+        assert counts == 1
+
+        url = f"/api/v1/users?limit=5&after={cursor}&include_total=true"
+        assert client.get(url).json()["data"]["total"] == 100
+        assert (
+            client.get("/api/v1/users?include_total=false").json()["data"]["total"]
+            is None
+        )
+        assert counts == 2
+
+    def test_list_users_invalid_cursor(self):
+        """测试使用无效的游标。"""
+        response = client.get("/api/v1/users?after=not-a-cursor!")
+        assert response.status_code == 400
+        assert response.json()["code"] == 400
+
+    def test_list_users_cursor_with_skip(self):
+        """测试游标与偏移分页不能混用。"""
+        cursor = client.get("/api/v1/users").json()["data"]["next_cursor"]
+        response = client.get(f"/api/v1/users?after={cursor}&skip=5")
+        assert response.status_code == 400
+
+    @pytest.mark.parametrize("limit", [0, 101, 1000000])
+    def test_list_users_limit_bounds(self, limit):
+        """测试单页大小受服务端上限约束。"""
+        response = client.get(f"/api/v1/users?limit={limit}")
+        assert response.status_code == 422
+
     @pytest.mark.parametrize(
         "user_id,expected_status",
         [
@@ -152,6 +304,419 @@ class TestUserEndpoints:
         assert response.status_code == expected_status
 
 
+class TestUserCache:
+    """用户响应缓存与 ETag 的测试用例。"""
+
+    def test_cache_hit(self, user_cache, user_repository):
+        """测试重复读取命中缓存而不访问仓储。"""
+        client.get("/api/v1/users/1")
+        asyncio.run(user_repository.delete(1))  # 绕过 API 修改底层数据
+        response = client.get("/api/v1/users/1")
+        assert response.status_code == 200
+        assert user_cache.hits == 1
+        assert user_cache.misses == 1
+
+    def test_cached_body_is_reused(self, user_cache):
+        """测试命中缓存时直接返回预编码的响应体。"""
+        first = client.get("/api/v1/users/1")
+        etag, body = user_cache.get(1)
+        second = client.get("/api/v1/users/1")
+        assert first.content == body
+        assert second.content == body
+        assert second.headers["content-type"] == "application/json"
+
+    def test_encoded_body_matches_response_model(self, user_repository):
+        """测试预编码响应体与常规响应模型序列化结果一致。"""
+        record = asyncio.run(user_repository.get(1))
+        expected = jsonable_encoder(
+            ApiResponse(data=UserResponse.from_record(record).model_dump())
+        )
+        assert json.loads(encode_user_body(record)) == expected
+
+    def test_etag_and_not_modified(self):
+        """测试 ETag 与 304 响应。"""
+        response = client.get("/api/v1/users/1")
+        etag = response.headers["etag"]
+        assert etag == '"1-1"'
+
+        response = client.get("/api/v1/users/1", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+
+    def test_update_invalidates(self, user_cache):
+        """测试更新后缓存失效且 ETag 变化。"""
+        etag = client.get("/api/v1/users/1").headers["etag"]
+        client.put("/api/v1/users/1", json={"name": "新名字"})
+        response = client.get("/api/v1/users/1", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()["data"]["name"] == "新名字"
+        assert response.headers["etag"] == '"1-2"'
+
+    def test_delete_invalidates(self):
+        """测试删除后缓存失效。"""
+        client.get("/api/v1/users/2")
+        client.delete("/api/v1/users/2")
+        assert client.get("/api/v1/users/2").status_code == 404
+
+    def test_concurrent_misses_coalesced(self, user_repository):
+        """测试缓存未命中时同一用户的并发请求只读取一次仓储。"""
+        calls = 0
+        original_get = user_repository.get
+
+        async def slow_get(user_id):
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return await original_get(user_id)
+
+        user_repository.get = slow_get
+
+        async def scenario():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://test"
+            ) as async_client:
+                return await asyncio.gather(
+                    *(async_client.get("/api/v1/users/5") for _ in range(20))
+                )
+
+        responses = asyncio.run(scenario())
+        assert {response.status_code for response in responses} == {200}
+        assert len({response.content for response in responses}) == 1
+        assert calls == 1
+
+    def test_write_during_slow_read_not_cached(self, user_repository):
+        """测试写入前开始的慢读取不会在写入失效后回填旧响应。"""
+        original_get = user_repository.get
+        started = asyncio.Event()
+
+        async def slow_get(user_id):
+            record = await original_get(user_id)
+            started.set()
+            await asyncio.sleep(0.05)
+            return record
+
+        user_repository.get = slow_get
+
+        async def scenario():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://test"
+            ) as async_client:
+                read = asyncio.ensure_future(async_client.get("/api/v1/users/6"))
+                await started.wait()
+                update = await async_client.put(
+                    "/api/v1/users/6", json={"name": "新名字"}
+                )
+                stale = await read
+                after = await async_client.get("/api/v1/users/6")
+                return update, stale, after
+
+        update, stale, after = asyncio.run(scenario())
+        assert update.json()["data"]["name"] == "新名字"
+        assert stale.json()["data"]["name"] == "用户6"
+        assert after.json()["data"]["name"] == "新名字"
+        assert after.headers["etag"] == '"6-2"'
+
+    def test_read_after_write_not_coalesced_with_older_read(self, user_repository):
+        """测试写入之后到达的请求不会加入写入之前开始的合并读取。"""
+        original_get = user_repository.get
+        started = asyncio.Event()
+
+        async def slow_get(user_id):
+            record = await original_get(user_id)
+            started.set()
+            await asyncio.sleep(0.05)
+            return record
+
+        user_repository.get = slow_get
+
+        async def scenario():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://test"
+            ) as async_client:
+                first = asyncio.ensure_future(async_client.get("/api/v1/users/7"))
+                await started.wait()
+                await async_client.put("/api/v1/users/7", json={"name": "新名字"})
+                second = await async_client.get("/api/v1/users/7")
+                return await first, second
+
+        first, second = asyncio.run(scenario())
+        assert first.json()["data"]["name"] == "用户7"
+        assert second.json()["data"]["name"] == "新名字"
+
+    def test_batch_writes_invalidate(self):
+        """测试批量写入后缓存失效。"""
+        client.get("/api/v1/users/3")
+        client.get("/api/v1/users/4")
+        client.post("/api/v1/users:batchUpdate", json={"items": [{"id": 3, "age": 99}]})
+        client.post("/api/v1/users:batchDelete", json={"ids": [4]})
+        assert client.get("/api/v1/users/3").json()["data"]["age"] == 99
+        assert client.get("/api/v1/users/4").status_code == 404
+
+    @pytest.mark.parametrize(
+        "header,expected",
+        [
+            (None, False),
+            ('"1-1"', True),
+            ('"0-1", "1-1"', True),
+            ('W/"1-1"', True),
+            ('"0-1", W/"1-1"', True),
+            ('W/"1-2"', False),
+            ("*", True),
+            ('"1-2"', False),
+        ],
+    )
+    def test_etag_matches(self, header, expected):
+        """测试 If-None-Match 请求头匹配规则。"""
+        assert etag_matches(header, '"1-1"') is expected
+
+
+class TestExportEndpoint:
+    """用户导出端点的测试用例。"""
+
+    def test_export_all_users(self, monkeypatch):
+        """测试以 NDJSON 流式导出全部用户。"""
+        monkeypatch.setattr(ApiConfig, "EXPORT_BATCH_SIZE", 7)
+        response = client.get("/api/v1/users:export")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert [row["id"] for row in rows] == list(range(1, 101))
+        assert rows[0]["name"] == "用户1"
+        assert "created_at" in rows[0]
+
+    def test_export_empty(self, user_repository):
+        """测试没有用户时导出空内容。"""
+        for i in range(1, 101):
+            asyncio.run(user_repository.delete(i))
+        response = client.get("/api/v1/users:export")
+        assert response.status_code == 200
+        assert response.text == ""
+
+    def test_export_stops_on_disconnect(self, user_repository):
+        """测试客户端断开后停止读取后续批次。"""
+
+        class DisconnectingRequest:
+            def __init__(self):
+                self.checks = 0
+
+            async def is_disconnected(self):
+                self.checks += 1
+                return self.checks > 1
+
+        async def collect():
+            chunks = []
+            stream = _export_ndjson(DisconnectingRequest(), user_repository, 10)
+            async for chunk in stream:
+                chunks.append(chunk)
+            return chunks
+
+        chunks = asyncio.run(collect())
+        assert len(chunks) == 1
+        assert chunks[0].count(b"\n") == 10
+
+
+class TestBatchEndpoints:
+    """批量操作端点的测试用例。"""
+
+    def test_batch_create(self):
+        """测试批量创建，邮箱冲突的条目单独失败。"""
+        items = [
+            {"name": "甲", "email": "a@example.com"},
+            {"name": "乙", "email": "user1@example.com"},
+            {"name": "丙", "email": "c@example.com", "age": 30},
+            {"name": "丁", "email": "a@example.com"},
+        ]
+        response = client.post("/api/v1/users:batchCreate", json={"items": items})
+        assert response.status_code == 200
+        data = response.json()["data"]
+        assert data["succeeded"] == 2
+        assert data["failed"] == 2
+        assert [result["code"] for result in data["results"]] == [0, 409, 0, 409]
+        assert data["results"][2]["data"]["age"] == 30
+        assert client.get("/api/v1/users").json()["data"]["total"] == 102
+
+    def test_batch_create_validates_all_items(self):
+        """测试任一条目校验失败时整批拒绝。"""
+        items = [{"name": "甲", "email": "a@example.com"}, {"name": ""}]
+        response = client.post("/api/v1/users:batchCreate", json={"items": items})
+        assert response.status_code == 422
+        assert client.get("/api/v1/users").json()["data"]["total"] == 100
+
+    def test_batch_create_size_limit(self, monkeypatch):
+        """测试批量大小受上限约束。"""
+        assert (
+            client.post("/api/v1/users:batchCreate", json={"items": []}).status_code
+            == 422
+        )
+        items = [
+            {"name": "甲", "email": f"x{i}@example.com"}
+            for i in range(ApiConfig.MAX_BATCH_SIZE + 1)
+        ]
+        response = client.post("/api/v1/users:batchCreate", json={"items": items})
+        assert response.status_code == 422
+
+    def test_batch_update(self):
+        """测试批量更新。"""
+        items = [
+            {"id": 1, "name": "新名字"},
+            {"id": 999, "name": "不存在"},
+            {"id": 2, "email": "user3@example.com"},
+        ]
+        response = client.post("/api/v1/users:batchUpdate", json={"items": items})
+        data = response.json()["data"]
+        assert [result["code"] for result in data["results"]] == [0, 404, 409]
+        assert data["results"][0]["data"]["name"] == "新名字"
+        assert client.get("/api/v1/users/1").json()["data"]["name"] == "新名字"
+
+    def test_multi_get_query(self):
+        """测试通过查询参数批量获取用户。"""
+        response = client.get("/api/v1/users?ids=3,1,999,3")
+        assert response.status_code == 200
+        data = response.json()["data"]
+        assert [user["id"] for user in data["users"]] == [3, 1]
+        assert data["missing"] == [999]
+
+    @pytest.mark.parametrize("ids", ["a,b", "", ",", "1," * 1001])
+    def test_multi_get_invalid_ids(self, ids):
+        """测试无效或超出上限的 ID 列表。"""
+        response = client.get("/api/v1/users", params={"ids": ids})
+        assert response.status_code == 400
+        assert response.json()["code"] == 400
+
+    def test_multi_get_body(self):
+        """测试通过请求体批量获取用户。"""
+        response = client.post("/api/v1/users:batchGet", json={"ids": [5, 6, 1000]})
+        data = response.json()["data"]
+        assert [user["id"] for user in data["users"]] == [5, 6]
+        assert data["missing"] == [1000]
+
+    def test_batch_delete(self):
+        """测试批量删除。"""
+        response = client.post("/api/v1/users:batchDelete", json={"ids": [1, 2, 999]})
+        data = response.json()["data"]
+        assert [result["code"] for result in data["results"]] == [0, 0, 404]
+        assert data["succeeded"] == 2
+        assert client.get("/api/v1/users/1").status_code == 404
+
+
+class TestFastResponses:
+    """高性能响应模式的测试用例。"""
+
+    @pytest.fixture(autouse=True)
+    def fast_mode(self, monkeypatch):
+        """启用高性能响应模式。"""
+        monkeypatch.setattr(ApiConfig, "FAST_RESPONSES", True)
+
+    def test_success_envelope(self):
+        """测试成功响应保持统一格式。"""
+        response = client.get("/")
+        assert response.status_code == 200
+        assert response.json() == {
+            "code": 0,
+            "data": {"message": "欢迎使用 py_ref API"},
+            "message": "成功",
+        }
+
+    def test_create_status_code(self):
+        """测试创建接口返回 201 且时间字段为 ISO 字符串。"""
+        user_data = {"name": "张三", "email": "zhangsan@example.com", "age": 25}
+        response = client.post("/api/v1/users", json=user_data)
+        assert response.status_code == 201
+        data = response.json()["data"]
+        assert data["name"] == "张三"
+        assert isinstance(data["created_at"], str)
+
+    def test_list_matches_standard_mode(self, monkeypatch):
+        """测试两种模式下列表响应内容一致。"""
+        fast = client.get("/api/v1/users?limit=3").json()
+        monkeypatch.setattr(ApiConfig, "FAST_RESPONSES", False)
+        standard = client.get("/api/v1/users?limit=3").json()
+        assert fast == standard
+
+    def test_error_envelope(self):
+        """测试错误响应保持统一格式。"""
+        response = client.get("/api/v1/users/999")
+        assert response.status_code == 404
+        assert response.json() == {"code": 404, "data": None, "message": "用户不存在"}
+
+    def test_batch_results(self):
+        """测试批量结果中的枚举状态码被编码为整数。"""
+        response = client.post("/api/v1/users:batchDelete", json={"ids": [1, 999]})
+        assert [r["code"] for r in response.json()["data"]["results"]] == [0, 404]
+
+
+class TestWarmUp:
+    """启动预热的测试用例。"""
+
+    def test_warm_up_builds_openapi(self, monkeypatch):
+        """测试预热后 OpenAPI 文档已生成。"""
+        monkeypatch.setattr(app, "openapi_schema", None)
+        warm_up(app)
+        assert app.openapi_schema is not None
+        assert client.get("/openapi.json").json() == app.openapi_schema
+
+    def test_prime_user_cache(self, user_repository):
+        """测试按 ID 升序预载用户缓存，且不超过缓存容量。"""
+        cache = LRUCache(maxsize=8)
+        assert asyncio.run(prime_user_cache(user_repository, cache, 5)) == 5
+        assert sorted(cache._data) == [1, 2, 3, 4, 5]
+        assert asyncio.run(prime_user_cache(user_repository, cache, 50)) == 8
+        etag, body = cache.get(1)
+        assert etag == '"1-1"'
+        assert json.loads(body)["data"]["id"] == 1
+
+    def test_lifespan_warms_up_and_freezes(self, monkeypatch):
+        """测试应用启动时执行预热与 gc.freeze。"""
+        calls = []
+        monkeypatch.setattr(ApiConfig, "PRIME_USER_CACHE", 10)
+        monkeypatch.setattr(gc, "freeze", lambda: calls.append("freeze"))
+        monkeypatch.setattr(gc, "unfreeze", lambda: calls.append("unfreeze"))
+        monkeypatch.setattr(app, "openapi_schema", None)
+        monkeypatch.setattr(app.state, "user_cache", LRUCache(maxsize=16))
+        with TestClient(app):
+            assert app.openapi_schema is not None
+            assert calls == ["freeze"]
+        assert calls == ["freeze", "unfreeze"]
+
+    def test_lifespan_unfreezes_on_shutdown(self):
+        """测试关闭时解除 GC 冻结，重复启动不会累积永久代对象。"""
+        with TestClient(app):
+            assert gc.get_freeze_count() > 0
+        assert gc.get_freeze_count() == 0
+
+    def test_lifespan_closes_repository_when_warm_up_fails(self, monkeypatch):
+        """测试预热失败时仍关闭已打开的仓储。"""
+        closed = []
+
+        async def close():
+            closed.append(True)
+
+        def fail(app):
+            raise RuntimeError("预热失败")
+
+        monkeypatch.setattr(sys.modules["py_ref.api"], "warm_up", fail)
+        monkeypatch.setattr(app.state.user_repository, "close", close)
+        with pytest.raises(RuntimeError, match="预热失败"):
+            with TestClient(app):
+                pass
+        assert closed == [True]
+
+    def test_lifespan_without_warm_up(self, monkeypatch):
+        """测试关闭预热与 GC 冻结。"""
+        calls = []
+        monkeypatch.setattr(ApiConfig, "WARMUP", False)
+        monkeypatch.setattr(ApiConfig, "GC_FREEZE", False)
+        monkeypatch.setattr(gc, "freeze", lambda: calls.append("freeze"))
+        monkeypatch.setattr(app, "openapi_schema", None)
+        with TestClient(app):
+            assert app.openapi_schema is None
+        assert calls == []
+
+
 class TestResponseFormat:
     """响应格式的测试用例。"""
 
@@ -0,0 +1,123 @@
+"""负载基准测试模块的测试用例。"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from py_ref import bench
+from py_ref.api import app
+from py_ref.bench import ENDPOINTS, compare, main, percentile
+from py_ref.cache import LRUCache
+from py_ref.repository import InMemoryUserRepository
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    """为每个测试提供独立的仓储与缓存，避免影响其他测试。"""
+    monkeypatch.setattr(app.state, "user_repository", InMemoryUserRepository())
+    monkeypatch.setattr(app.state, "user_cache", LRUCache(maxsize=64))
+
+
+def test_percentile():
+    """测试最近秩法分位数。"""
+    values = [float(i) for i in range(1, 101)]
+    assert percentile(values, 0.50) == 50.0
+    assert percentile(values, 0.99) == 99.0
+    assert percentile(values, 1.0) == 100.0
+    assert percentile([1.0], 0.5) == 1.0
+    assert percentile([], 0.5) == 0.0
+
+
+def test_compare():
+    """测试吞吐量下降与 p99 上升超过阈值时判定为回归。"""
+    baseline = {
+        "a": {"rps": 1000.0, "p99_ms": 10.0},
+        "b": {"rps": 1000.0, "p99_ms": 10.0},
+    }
+    current = {
+        "a": {"rps": 950.0, "p99_ms": 10.5},
+        "b": {"rps": 800.0, "p99_ms": 12.0},
+        "c": {"rps": 1.0, "p99_ms": 1000.0},
+    }
+    regressions = compare(current, baseline, threshold=0.1)
+    assert [(r.endpoint, r.metric) for r in regressions] == [
+        ("b", "rps"),
+        ("b", "p99_ms"),
+    ]
+    assert regressions[0].change == pytest.approx(-0.2)
+
+
+def test_transport_errors_counted():
+    """测试超时等传输错误计入错误数，不中断基准。"""
+    calls = 0
+
+    def handler(request):
+        nonlocal calls
+        calls += 1
+        if calls % 2 == 0:
+            raise httpx.ReadTimeout("timeout", request=request)
+        return httpx.Response(200)
+
+    async def scenario():
+        transport = httpx.MockTransport(handler)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as client:
+            return await bench.run_endpoint(
+                client, ENDPOINTS["root"], bench.BenchContext(), 10, 2
+            )
+
+    result = asyncio.run(scenario())
+    assert result["errors"] == 5
+    assert calls == 10
+
+
+def test_in_process_all_endpoints(tmp_path):
+    """测试进程内模式运行全部场景且没有非预期状态码。"""
+    output = tmp_path / "bench.json"
+    code = main(
+        [
+            "--requests",
+            "20",
+            "--concurrency",
+            "4",
+            "--endpoint-concurrency",
+            "export=1",
+            "--warmup",
+            "5",
+            "--seed-users",
+            "30",
+            "--output",
+            str(output),
+        ]
+    )
+    assert code == 0
+    report = json.loads(output.read_text())
+    assert list(report["results"]) == list(ENDPOINTS)
+    export = report["results"]["export"]
+    assert export["concurrency"] == 1
+    for result in report["results"].values():
+        assert result["errors"] == 0
+        assert result["rps"] > 0
+        assert result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"]
+
+
+def test_baseline_regression_fails(tmp_path, monkeypatch):
+    """测试相对基线回归时返回非零退出码。"""
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(
+        json.dumps({"results": {"health": {"rps": 1e12, "p99_ms": 1e-9}}})
+    )
+    args = ["--endpoints", "health", "--requests", "10", "--seed-users", "1"]
+    assert main([*args, "--baseline", str(baseline)]) == 1
+    baseline.write_text(json.dumps({"results": {"health": {"rps": 0, "p99_ms": 1e9}}}))
+    assert main([*args, "--baseline", str(baseline)]) == 0
+
+
+def test_unknown_endpoint():
+    """测试未知场景名称。"""
+    assert main(["--endpoints", "nope"]) == 2
+    with pytest.raises(SystemExit):
+        bench.build_parser().parse_args(["--endpoint-concurrency", "nope=1"])
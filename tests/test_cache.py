@@ -0,0 +1,98 @@
+"""缓存模块的测试用例。"""
+
+import pytest
+
+from py_ref.cache import LRUCache
+
+
+class TestLRUCache:
+    """LRUCache 的测试用例。"""
+
+    def test_get_and_set(self):
+        """测试基本读写与统计。"""
+        cache = LRUCache(maxsize=2)
+        assert cache.get("a") is None
+        cache.set("a", 1)
+        assert cache.get("a") == 1
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+        assert cache.hit_ratio == 0.5
+
+    def test_lru_eviction(self):
+        """测试超出容量时淘汰最久未使用的条目。"""
+        cache = LRUCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.evictions == 1
+        assert len(cache) == 2
+
+    def test_ttl_expiration(self, clock):
+        """测试条目过期。"""
+        cache = LRUCache(maxsize=4, ttl=10, clock=clock)
+        cache.set("a", 1)
+        clock.now = 9.9
+        assert cache.get("a") == 1
+        clock.now = 10.0
+        assert cache.get("a") is None
+        assert cache.expirations == 1
+        assert len(cache) == 0
+
+    def test_invalidate_and_clear(self):
+        """测试失效与清空。"""
+        cache = LRUCache()
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.invalidate("a")
+        cache.invalidate("missing")
+        assert cache.get("a") is None
+        cache.clear()
+        assert len(cache) == 0
+
+    def test_set_since_skips_invalidated_key(self):
+        """测试读取期间被失效的键不回填，其他键不受影响。"""
+        cache = LRUCache()
+        since = cache.epoch
+        cache.invalidate("a")
+        cache.set("a", "旧值", since=since)
+        cache.set("b", 2, since=since)
+        assert cache.get("a") is None
+        assert cache.get("b") == 2
+        cache.set("a", "新值", since=cache.epoch)
+        assert cache.get("a") == "新值"
+
+    def test_forgotten_invalidations_are_conservative(self):
+        """测试失效记录被遗忘后，更早开始的读取一律不回填。"""
+        cache = LRUCache(maxsize=2)
+        since = cache.epoch
+        for key in ("a", "b", "c"):
+            cache.invalidate(key)
+        cache.set("a", 1, since=since)
+        cache.set("z", 1, since=since)
+        assert cache.get("a") is None
+        assert cache.get("z") is None
+        cache.set("z", 1, since=cache.epoch)
+        assert cache.get("z") == 1
+
+    def test_clear_blocks_inflight_fills(self):
+        """测试清空后进行中的读取不回填。"""
+        cache = LRUCache()
+        since = cache.epoch
+        cache.clear()
+        cache.set("a", 1, since=since)
+        assert cache.get("a") is None
+
+    def test_zero_size_disables_cache(self):
+        """测试容量为 0 时不缓存。"""
+        cache = LRUCache(maxsize=0)
+        cache.set("a", 1)
+        assert cache.get("a") is None
+
+    def test_negative_size(self):
+        """测试容量不能为负数。"""
+        with pytest.raises(ValueError):
+            LRUCache(maxsize=-1)
@@ -1,10 +1,31 @@
 """日志模块的测试用例。"""
 
+import gzip
+import json
 import logging
+import os
+import sys
+import threading
+import time
 
+import pytest
+
+from py_ref import logger as logger_module
 from py_ref.logger import (
+    ROOT_LOGGER_NAME,
+    BoundedQueueHandler,
+    BufferedFileHandler,
+    JSONFormatter,
+    Lazy,
+    LoggerConfig,
+    RotatingFileHandler,
+    SamplingFilter,
+    SamplingRule,
     console,
+    flush_logging,
     get_logger,
+    parse_level,
+    parse_sampling_rules,
     print_error,
     print_header,
     print_info,
@@ -43,11 +64,24 @@ class TestLoggerSetup:
         assert len(logger.handlers) == 1  # 只有控制台处理器
 
     def test_get_logger(self):
-        """测试获取日志记录器实例。"""
+        """测试获取层级外的日志记录器实例：单独配置处理器。"""
         logger = get_logger("test_get_logger")
         assert logger.name == "test_get_logger"
         assert len(logger.handlers) > 0
 
+    def test_get_logger_child_uses_root_handlers(self):
+        """测试 py_ref 子记录器不创建处理器，而是传播到根记录器。"""
+        logger = get_logger("py_ref.test_child")
+        assert logger.handlers == []
+        assert logger.propagate
+        assert logging.getLogger(ROOT_LOGGER_NAME).handlers
+
+    def test_setup_child_logger_stops_propagation(self):
+        """测试显式配置的子记录器不再传播，避免重复输出。"""
+        logger = setup_logger(name="py_ref.test_configured", log_to_file=False)
+        assert len(logger.handlers) == 1
+        assert not logger.propagate
+
     def test_logger_levels(self, tmp_path, capsys):
         """测试不同的日志级别。"""
         logger = setup_logger(
@@ -72,6 +106,24 @@ class TestLoggerSetup:
         assert "错误消息" in content
         assert "严重消息" in content
 
+    @pytest.mark.parametrize(
+        ("name", "expected"),
+        [
+            ("info", logging.INFO),
+            ("WARNING", logging.WARNING),
+            ("trace", 5),
+            ("15", 15),
+        ],
+    )
+    def test_parse_level(self, name, expected):
+        """测试级别名称解析，包括 uvicorn 的 trace。"""
+        assert parse_level(name) == expected
+
+    def test_parse_level_unknown(self):
+        """测试无法识别的级别名称给出明确的错误。"""
+        with pytest.raises(ValueError, match="无效的日志级别"):
+            parse_level("verbose")
+
 
 class TestConsoleFunctions:
     """Rich 控制台输出函数的测试用例。"""
@@ -136,3 +188,607 @@ class TestLoggerIntegration:
 
         assert "来自 logger1 的消息" in log1_content
         assert "来自 logger2 的消息" in log2_content
+
+
+class CountingStream:
+    """统计 write 调用次数的流包装。"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.writes = 0
+
+    def write(self, data):
+        self.writes += 1
+        return self.stream.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+class TestSharedHandlers:
+    """py_ref 层级共享处理器的测试用例。"""
+
+    @pytest.fixture
+    def root(self, tmp_path):
+        """将 py_ref 根记录器临时指向测试目录，结束后恢复。"""
+        root = logging.getLogger(ROOT_LOGGER_NAME)
+        saved_handlers, saved_level = list(root.handlers), root.level
+        setup_logger(log_dir=tmp_path, log_file="shared.log", async_mode=False)
+        yield root
+        for handler in root.handlers:
+            handler.close()
+        root.handlers[:] = saved_handlers
+        root.setLevel(saved_level)
+
+    def test_one_file_and_one_write_per_record(self, root, tmp_path):
+        """测试多个模块调用 get_logger 时日志文件只打开一次、每条记录只写一次。"""
+        log_path = tmp_path / "shared.log"
+        loggers = [get_logger(f"py_ref.shared_{i}") for i in range(5)] + [
+            get_logger("py_ref.shared_0.sub"),
+            get_logger(ROOT_LOGGER_NAME),
+        ]
+
+        file_handlers = [
+            handler
+            for name in logging.root.manager.loggerDict
+            if name == ROOT_LOGGER_NAME or name.startswith(ROOT_LOGGER_NAME + ".")
+            for handler in logging.getLogger(name).handlers
+            if isinstance(handler, logging.FileHandler)
+            and handler.baseFilename == str(log_path)
+        ]
+        assert len(file_handlers) == 1
+        assert all(not logger.handlers for logger in loggers[:-1])
+        if os.path.isdir("/proc/self/fd"):
+            open_fds = [
+                fd
+                for fd in os.listdir("/proc/self/fd")
+                if os.path.realpath(f"/proc/self/fd/{fd}") == str(log_path)
+            ]
+            assert len(open_fds) == 1
+
+        counter = CountingStream(file_handlers[0].stream)
+        file_handlers[0].stream = counter
+        for i, logger in enumerate(loggers):
+            logger.info("共享记录 %d", i)
+        file_handlers[0].stream = counter.stream
+
+        assert counter.writes == len(loggers)
+        lines = log_path.read_text(encoding="utf-8").splitlines()
+        assert [line.rsplit(" ", 1)[-1] for line in lines] == [
+            str(i) for i in range(len(loggers))
+        ]
+
+
+class TestAsyncLogging:
+    """异步日志模式的测试用例。"""
+
+    @staticmethod
+    def _file_logger(tmp_path, name, **options):
+        """创建只输出到文件的异步日志记录器（去掉控制台处理器）。"""
+        logger = setup_logger(
+            name=name,
+            log_dir=tmp_path,
+            log_file=f"{name}.log",
+            async_mode=True,
+            **options,
+        )
+        handler = logger.handlers[0]
+        handler.listener.handlers = tuple(
+            h for h in handler.listener.handlers if isinstance(h, logging.FileHandler)
+        )
+        return logger, handler
+
+    def test_records_written_by_listener(self, tmp_path):
+        """测试异步模式下日志经后台线程写出，flush_logging 后全部可见。"""
+        logger, handler = self._file_logger(tmp_path, "test_async")
+        assert isinstance(handler, BoundedQueueHandler)
+        assert len(logger.handlers) == 1
+        for i in range(100):
+            logger.info("消息 %d", i)
+        flush_logging()
+        lines = (tmp_path / "test_async.log").read_text(encoding="utf-8").splitlines()
+        assert len(lines) == 100
+        assert lines[-1].endswith("消息 99")
+
+    def test_exception_info_preserved(self, tmp_path):
+        """测试异常信息在后台线程中格式化。"""
+        logger, _ = self._file_logger(tmp_path, "test_async_exc")
+        try:
+            raise ValueError("出错了")
+        except ValueError:
+            logger.exception("处理失败")
+        flush_logging()
+        content = (tmp_path / "test_async_exc.log").read_text(encoding="utf-8")
+        assert "处理失败" in content
+        assert "ValueError: 出错了" in content
+
+    @pytest.mark.parametrize(
+        "policy,expected",
+        [("drop_new", ["0", "1"]), ("drop_oldest", ["3", "4"])],
+    )
+    def test_full_queue_policies(self, policy, expected):
+        """测试队列已满时的丢弃策略与计数。"""
+        handler = BoundedQueueHandler(maxsize=2, policy=policy)
+        logger = logging.getLogger(f"test_policy_{policy}")
+        logger.propagate = False
+        logger.handlers = [handler]
+        for i in range(5):
+            logger.warning("%d", i)
+        assert handler.dropped == 3
+        assert [handler.queue.get_nowait().msg for _ in range(2)] == expected
+
+    def test_close_with_full_queue(self):
+        """测试队列已满时关闭：等待空位放入停止标记，剩余记录全部输出。"""
+        release = threading.Event()
+        received = []
+
+        class SlowHandler(logging.Handler):
+            def emit(self, record):
+                release.wait()
+                received.append(record.getMessage())
+
+        handler = BoundedQueueHandler(maxsize=5)
+        handler.start(SlowHandler())
+        handler.handle(make_record(msg="0", args=()))
+        while not handler.queue.empty():
+            time.sleep(0.001)
+        for i in range(1, 6):
+            handler.handle(make_record(msg=str(i), args=()))
+        assert handler.queue.full()
+
+        timer = threading.Timer(0.05, release.set)
+        timer.start()
+        handler.close()
+        timer.join()
+        assert received == [str(i) for i in range(6)]
+
+    def test_invalid_policy(self):
+        """测试无效的队列策略。"""
+        with pytest.raises(ValueError):
+            BoundedQueueHandler(policy="nope")
+
+    def test_reconfigure_stops_previous_listener(self, tmp_path):
+        """测试重复设置同一日志记录器时停止旧的后台线程。"""
+        _, first = self._file_logger(tmp_path, "test_async_reset")
+        listener = first.listener
+        setup_logger(name="test_async_reset", log_to_file=False, async_mode=False)
+        assert first.listener is None
+        assert listener._thread is None
+
+
+class TestJSONLogging:
+    """JSON Lines 输出格式的测试用例。"""
+
+    def test_format_fields_and_extra(self):
+        """测试固定字段、额外字段与时间戳格式。"""
+        formatter = JSONFormatter()
+        record = logging.LogRecord(
+            "py_ref.api", logging.INFO, __file__, 1, "用户 %s 已创建", ("张三",), None
+        )
+        record.created, record.msecs = 1704110400.123, 123.0
+        record.user_id = 1
+        data = json.loads(formatter.format(record))
+        assert data == {
+            "ts": "2024-01-01T12:00:00.123Z",
+            "level": "INFO",
+            "logger": "py_ref.api",
+            "message": "用户 张三 已创建",
+            "user_id": 1,
+        }
+        assert list(data)[:4] == ["ts", "level", "logger", "message"]
+
+    def test_timestamp_cache(self):
+        """测试同一秒与跨秒的时间戳。"""
+        formatter = JSONFormatter()
+        record = logging.makeLogRecord({})
+        for created, expected in [
+            (0.5, "1970-01-01T00:00:00.500Z"),
+            (0.75, "1970-01-01T00:00:00.750Z"),
+            (61.0, "1970-01-01T00:01:01.000Z"),
+        ]:
+            record.created, record.msecs = created, (created % 1) * 1000
+            assert formatter.format_time(record) == expected
+
+    def test_exception_and_unserializable_extra(self):
+        """测试异常信息与无法直接序列化的额外字段。"""
+        formatter = JSONFormatter()
+        try:
+            raise ValueError("出错了")
+        except ValueError:
+            record = logging.LogRecord(
+                "x", logging.ERROR, __file__, 1, "失败", None, sys.exc_info()
+            )
+        record.payload = object()
+        data = json.loads(formatter.format(record))
+        assert "ValueError: 出错了" in data["exc_info"]
+        assert data["payload"].startswith("<object")
+
+    def test_setup_logger_json(self, tmp_path, capsys):
+        """测试 JSON 格式的控制台与文件输出。"""
+        logger = setup_logger(
+            name="test_json", log_dir=tmp_path, log_file="json.log", log_format="json"
+        )
+        logger.info("请求完成", extra={"status": 200})
+        line = (tmp_path / "json.log").read_text(encoding="utf-8").strip()
+        assert json.loads(line)["status"] == 200
+        assert json.loads(capsys.readouterr().out)["message"] == "请求完成"
+
+    def test_format_from_env_config(self, monkeypatch):
+        """测试通过 LoggerConfig（环境变量）选择格式。"""
+        monkeypatch.setattr(LoggerConfig, "FORMAT", "json")
+        logger = setup_logger(name="test_json_env", log_to_file=False)
+        assert isinstance(logger.handlers[0].formatter, JSONFormatter)
+        with pytest.raises(ValueError):
+            setup_logger(name="test_json_env", log_format="xml")
+
+
+class TestLazyLogging:
+    """延迟格式化与延迟求值字段的测试用例。"""
+
+    def test_lazy_not_evaluated_when_disabled(self, tmp_path):
+        """测试级别被过滤时不求值，输出时求值。"""
+        calls = []
+
+        def expensive():
+            calls.append(1)
+            return "结果"
+
+        logger = setup_logger(
+            name="test_lazy", level=logging.WARNING, log_dir=tmp_path, log_file="l.log"
+        )
+        logger.info("值: %s", Lazy(expensive))
+        assert calls == []
+        logger.warning("值: %s", Lazy(expensive))
+        assert calls == [1]
+        assert "值: 结果" in (tmp_path / "l.log").read_text(encoding="utf-8")
+
+    def test_lazy_extra_field_in_json(self):
+        """测试 JSON 格式下延迟求值的额外字段。"""
+        record = logging.makeLogRecord(
+            {"msg": "完成", "summary": Lazy(lambda: {"ok": 2})}
+        )
+        assert json.loads(JSONFormatter().format(record))["summary"] == {"ok": 2}
+
+    def test_module_helpers_use_percent_args(self, caplog):
+        """测试模块级便捷函数支持 % 风格参数并报告调用方位置。"""
+        with caplog.at_level(logging.DEBUG, logger="py_ref"):
+            logger_module.info("用户 %s", "张三")
+            logger_module.debug("调试 %d", 1)
+        assert [r.getMessage() for r in caplog.records][-2:] == ["用户 张三", "调试 1"]
+        assert caplog.records[-1].filename == "test_logger.py"
+
+
+def make_record(
+    name="py_ref.api", msg="获取用户信息: user_id=%s", level=logging.INFO, args=(1,)
+):
+    """构建一条测试用日志记录。"""
+    return logging.LogRecord(name, level, __file__, 1, msg, args, None)
+
+
+class TestSamplingFilter:
+    """日志抽样过滤器的测试用例。"""
+
+    def test_parse_rules(self):
+        """测试解析抽样规则，模板中可以包含等号。"""
+        assert parse_sampling_rules(
+            "py_ref.access=1%, 获取用户信息: user_id=%s=10/s"
+        ) == {
+            "py_ref.access": SamplingRule(ratio=0.01),
+            "获取用户信息: user_id=%s": SamplingRule(per_second=10),
+        }
+        assert SamplingRule.parse("0.5") == SamplingRule(ratio=0.5)
+        with pytest.raises(ValueError):
+            SamplingRule.parse("150%")
+        with pytest.raises(ValueError):
+            parse_sampling_rules("=1%")
+
+    def test_ratio_sampling(self):
+        """测试按比例确定性抽样。"""
+        sampling = SamplingFilter({"py_ref.api": SamplingRule(ratio=0.1)})
+        kept = [sampling.filter(make_record()) for _ in range(100)]
+        assert sum(kept) == 10
+        assert kept[0] is True
+
+    @pytest.mark.parametrize("ratio", [0.4, 0.6, 0.7, 0.75, 0.9, 0.333])
+    def test_ratio_not_reciprocal(self, ratio):
+        """测试非 1/n 形式的比例保留的记录数。"""
+        sampling = SamplingFilter({"py_ref.api": SamplingRule(ratio=ratio)})
+        kept = [sampling.filter(make_record()) for _ in range(1000)]
+        assert abs(sum(kept) - 1000 * ratio) <= 1
+
+    def test_non_string_message(self):
+        """测试 msg 为不可哈希对象时按记录器名称匹配。"""
+        sampling = SamplingFilter({"py_ref.api": SamplingRule(ratio=0.5)})
+        kept = [
+            sampling.filter(make_record(msg={"user_id": 1}, args=())) for _ in range(10)
+        ]
+        assert sum(kept) == 5
+
+    def test_per_second_limit(self, clock):
+        """测试每秒限流。"""
+        sampling = SamplingFilter(
+            {"获取用户信息: user_id=%s": SamplingRule(per_second=3)}, clock=clock
+        )
+        assert [sampling.filter(make_record()) for _ in range(5)] == [
+            True,
+            True,
+            True,
+            False,
+            False,
+        ]
+        clock.now = 1.0
+        assert sampling.filter(make_record())
+
+    def test_warning_and_unmatched_pass(self):
+        """测试 WARNING 及以上级别与未匹配的记录总是放行。"""
+        sampling = SamplingFilter({"py_ref": SamplingRule(ratio=0.0)})
+        assert sampling.filter(make_record(level=logging.WARNING))
+        assert sampling.filter(make_record(name="other"))
+        assert not sampling.filter(make_record(name="py_ref.access"))
+
+    def test_template_rule_takes_precedence(self):
+        """测试消息模板规则优先于日志记录器规则。"""
+        sampling = SamplingFilter(
+            {
+                "py_ref": SamplingRule(ratio=0.0),
+                "获取用户信息: user_id=%s": SamplingRule(ratio=1.0),
+            }
+        )
+        assert sampling.filter(make_record())
+        assert not sampling.filter(make_record(msg="其他消息 %s"))
+
+    def test_decision_shared_across_handlers(self, tmp_path):
+        """测试同一记录经过多个处理器时只判定一次。"""
+        sampling = SamplingFilter({"py_ref": SamplingRule(ratio=0.5)})
+        record = make_record()
+        assert sampling.filter(record) is sampling.filter(record) is True
+        record = make_record()
+        assert sampling.filter(record) is sampling.filter(record) is False
+
+    def test_summary(self, clock, caplog):
+        """测试按间隔输出抑制统计摘要。"""
+        summary_logger = logging.getLogger("test_sampling_summary")
+        sampling = SamplingFilter(
+            {"py_ref.api": SamplingRule(ratio=0.0)},
+            summary_interval=10,
+            summary_logger=summary_logger,
+            clock=clock,
+        )
+        for _ in range(5):
+            sampling.filter(make_record())
+        with caplog.at_level(logging.INFO, logger="test_sampling_summary"):
+            clock.now = 10.0
+            sampling.filter(make_record())
+            clock.now = 20.0
+            sampling.filter(make_record(level=logging.WARNING))
+        summaries = [r for r in caplog.records if r.name == "test_sampling_summary"]
+        assert [r.suppressed for r in summaries] == [{"py_ref.api": 6}]
+        assert "抑制 6 条记录" in summaries[0].getMessage()
+
+    def test_setup_logger_sampling(self, tmp_path):
+        """测试 setup_logger 挂载抽样过滤器。"""
+        logger = setup_logger(
+            name="test_sampled",
+            log_dir=tmp_path,
+            log_file="s.log",
+            sampling="test_sampled=10%",
+        )
+        logger.handlers = [
+            h for h in logger.handlers if isinstance(h, logging.FileHandler)
+        ]
+        for i in range(50):
+            logger.info("请求 %d", i)
+        logger.warning("告警")
+        lines = (tmp_path / "s.log").read_text(encoding="utf-8").splitlines()
+        assert len(lines) == 6
+        assert lines[-1].endswith("告警")
+
+
+class TestRotatingFileHandler:
+    """日志文件轮转的测试用例。"""
+
+    def make_handler(self, path, clock, **kwargs):
+        handler = RotatingFileHandler(path, clock=clock, **kwargs)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        return handler
+
+    def test_size_rotation_compresses_in_background(self, clock, tmp_path):
+        """测试按大小轮转，历史文件压缩为 gzip。"""
+        path = tmp_path / "app.log"
+        handler = self.make_handler(path, clock, max_bytes=20, backup_count=10)
+        for i in range(4):
+            clock.now += 1
+            handler.emit(make_record(msg="line-%02d-abcdefgh", args=(i,)))
+        handler.close()
+
+        history = handler.history()
+        assert len(history) == 3
+        assert all(p.endswith(".gz") for p in history)
+        contents = [gzip.open(p, "rt", encoding="utf-8").read() for p in history]
+        assert contents == [f"line-{i:02d}-abcdefgh\n" for i in range(3)]
+        assert path.read_text(encoding="utf-8") == "line-03-abcdefgh\n"
+
+    def test_time_rotation_and_retention(self, clock, tmp_path):
+        """测试按时间轮转并只保留 backup_count 个历史文件。"""
+        path = tmp_path / "app.log"
+        handler = self.make_handler(
+            path, clock, interval=3600, backup_count=2, compression="none"
+        )
+        for i in range(5):
+            handler.emit(make_record(msg=str(i), args=()))
+            clock.now += 3600
+        handler.close()
+
+        history = handler.history()
+        assert [open(p, encoding="utf-8").read() for p in history] == ["2\n", "3\n"]
+        assert path.read_text(encoding="utf-8") == "4\n"
+
+    def test_retention_when_rotation_outpaces_compression(self, tmp_path):
+        """测试轮转快于压缩时仍按轮转顺序保留最新的历史文件。"""
+        path = tmp_path / "app.log"
+        handler = RotatingFileHandler(path, max_bytes=200, backup_count=2)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        # 阻塞后台线程，使全部轮转都发生在任何压缩开始之前
+        release = threading.Event()
+        blocker = sys.modules["py_ref.logger"]._submit_background(release.wait)
+        for i in range(400):
+            handler.emit(make_record(msg="record-%04d", args=(i,)))
+        release.set()
+        blocker.result()
+        handler.close()
+
+        history = handler.history()
+        assert len(history) == 2
+        lines = [
+            line
+            for segment in history
+            for line in gzip.open(segment, "rt", encoding="utf-8").read().splitlines()
+        ] + path.read_text(encoding="utf-8").splitlines()
+        assert lines[-1] == "record-0399"
+        assert lines == [f"record-{i:04d}" for i in range(400 - len(lines), 400)]
+
+    def test_per_process_retention_and_orphans(self, clock, tmp_path):
+        """测试按进程区分文件时合计保留数量，并归档已退出进程遗留的文件。"""
+        dead = tmp_path / "app.99999999.log"
+        dead.write_text("遗留\n", encoding="utf-8")
+        os.utime(dead, (0, 0))
+        (tmp_path / "app.99999999.log.19700101-000000.000001.gz").write_bytes(b"")
+        (tmp_path / "other.log").write_text("无关\n", encoding="utf-8")
+
+        handler = self.make_handler(
+            tmp_path / "app.log", clock, interval=10, backup_count=3, per_process=True
+        )
+        assert handler.baseFilename == str(tmp_path / f"app.{os.getpid()}.log")
+        for i in range(4):
+            clock.now += 10
+            handler.emit(make_record(msg=str(i), args=()))
+        handler.close()
+
+        assert not dead.exists()
+        history = [os.path.basename(p) for p in handler.history()]
+        assert len(history) == 3
+        assert all(name.startswith(f"app.{os.getpid()}.log.") for name in history)
+        assert (tmp_path / "other.log").exists()
+
+    def test_invalid_compression(self, tmp_path):
+        """测试无效的压缩方式。"""
+        with pytest.raises(ValueError):
+            RotatingFileHandler(tmp_path / "app.log", compression="zip")
+
+    def test_setup_logger_uses_rotation_config(self, tmp_path, monkeypatch):
+        """测试配置了轮转参数时 setup_logger 使用轮转处理器。"""
+        monkeypatch.setattr(LoggerConfig, "ROTATE_MAX_BYTES", 1024)
+        monkeypatch.setattr(LoggerConfig, "BACKUP_COUNT", 3)
+        logger = setup_logger(name="test_rotating", log_dir=tmp_path, log_file="r.log")
+        handlers = [h for h in logger.handlers if isinstance(h, RotatingFileHandler)]
+        assert len(handlers) == 1
+        assert handlers[0].max_bytes == 1024
+        assert handlers[0].backup_count == 3
+
+    def test_per_process_file(self, tmp_path, monkeypatch):
+        """测试多进程模式下轮转的日志文件名带上进程号。"""
+        monkeypatch.setattr(LoggerConfig, "ROTATE_MAX_BYTES", 1024)
+        monkeypatch.setattr(LoggerConfig, "PER_PROCESS_FILE", True)
+        logger = setup_logger(
+            name="test_per_process", log_dir=tmp_path, log_file="r.log"
+        )
+        (handler,) = [h for h in logger.handlers if isinstance(h, RotatingFileHandler)]
+        assert handler.baseFilename == str(tmp_path / f"r.{os.getpid()}.log")
+        handler.close()
+
+
+class TestBufferedFileHandler:
+    """批量写入文件处理器的测试用例。"""
+
+    def make_handler(self, path, **kwargs):
+        kwargs.setdefault("flush_interval", 0)
+        handler = BufferedFileHandler(path, **kwargs)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        return handler
+
+    def test_flush_on_buffer_size(self, tmp_path):
+        """测试缓冲区达到阈值时合并为一次写入。"""
+        path = tmp_path / "buffered.log"
+        handler = self.make_handler(path, buffer_size=30)
+        counter = CountingStream(handler.stream)
+        handler.stream = counter
+        for i in range(3):
+            handler.handle(make_record(msg="record-%d", args=(i,)))
+        assert counter.writes == 0
+        assert path.read_text(encoding="utf-8") == ""
+
+        handler.handle(make_record(msg="record-%d", args=(3,)))
+        assert counter.writes == 1
+        assert path.read_text(encoding="utf-8").splitlines() == [
+            f"record-{i}" for i in range(4)
+        ]
+        handler.stream = counter.stream
+        handler.close()
+
+    def test_error_flushes_immediately(self, tmp_path):
+        """测试 ERROR 级别的记录立即写出。"""
+        path = tmp_path / "buffered.log"
+        handler = self.make_handler(path)
+        handler.handle(make_record(msg="info", args=()))
+        handler.handle(make_record(msg="boom", level=logging.ERROR, args=()))
+        assert path.read_text(encoding="utf-8") == "info\nboom\n"
+        handler.close()
+
+    def test_flush_interval(self, tmp_path):
+        """测试后台线程按时间间隔写出缓冲区。"""
+        path = tmp_path / "buffered.log"
+        handler = self.make_handler(path, flush_interval=0.01)
+        handler.handle(make_record(msg="later", args=()))
+        for _ in range(200):
+            if path.read_text(encoding="utf-8"):
+                break
+            time.sleep(0.01)
+        assert path.read_text(encoding="utf-8") == "later\n"
+        handler.close()
+
+    def test_close_and_flush_logging_drain(self, tmp_path):
+        """测试 flush_logging 与 close 写出剩余记录。"""
+        first = self.make_handler(tmp_path / "a.log")
+        second = self.make_handler(tmp_path / "b.log")
+        first.handle(make_record(msg="a", args=()))
+        second.handle(make_record(msg="b", args=()))
+        flush_logging()
+        assert (tmp_path / "a.log").read_text(encoding="utf-8") == "a\n"
+        second.handle(make_record(msg="c", args=()))
+        second.close()
+        assert (tmp_path / "b.log").read_text(encoding="utf-8") == "b\nc\n"
+        first.close()
+
+    def test_reconfigure_closes_previous_handlers(self, tmp_path):
+        """测试重复设置日志记录器时关闭旧处理器，不遗留刷新线程。"""
+        threads = threading.active_count()
+        handlers = []
+        for _ in range(5):
+            logger = setup_logger(
+                name="test_buffered_reset",
+                log_dir=tmp_path,
+                log_file="reset.log",
+                buffer_size=4096,
+                async_mode=False,
+            )
+            handlers.append(logger.handlers[-1])
+        assert threading.active_count() == threads + 1
+        assert all(h.stream is None for h in handlers[:-1])
+        handlers[-1].close()
+
+    def test_setup_logger_buffered(self, tmp_path):
+        """测试 setup_logger 的 buffer_size 参数。"""
+        logger = setup_logger(
+            name="test_buffered",
+            log_dir=tmp_path,
+            log_file="buf.log",
+            buffer_size=4096,
+            async_mode=False,
+        )
+        handlers = [h for h in logger.handlers if isinstance(h, BufferedFileHandler)]
+        assert len(handlers) == 1
+        logger.info("缓冲")
+        assert (tmp_path / "buf.log").read_text(encoding="utf-8") == ""
+        flush_logging()
+        assert "缓冲" in (tmp_path / "buf.log").read_text(encoding="utf-8")
+        handlers[0].close()
@@ -0,0 +1,99 @@
+"""指标模块的测试用例。"""
+
+import pytest
+
+from py_ref.cache import LRUCache
+from py_ref.metrics import Histogram, MetricsRegistry
+from py_ref.singleflight import SingleFlight
+
+
+class TestHistogram:
+    """Histogram 的测试用例。"""
+
+    def test_observe_and_cumulative(self):
+        """测试观测值落入正确的桶并生成累积计数。"""
+        histogram = Histogram(buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 5.0):
+            histogram.observe(value)
+        assert histogram.cumulative() == [(0.1, 2), (1.0, 3), (float("inf"), 4)]
+        assert histogram.count == 4
+        assert histogram.sum == pytest.approx(5.65)
+
+    def test_quantile(self):
+        """测试分位数估算。"""
+        histogram = Histogram(buckets=(1.0, 2.0))
+        assert histogram.quantile(0.5) is None
+        for _ in range(50):
+            histogram.observe(0.5)
+        for _ in range(50):
+            histogram.observe(1.5)
+        assert histogram.quantile(0.5) == pytest.approx(1.0)
+        assert histogram.quantile(0.75) == pytest.approx(1.5)
+        histogram.observe(10.0)
+        assert histogram.quantile(1.0) == 2.0
+
+    def test_invalid_arguments(self):
+        """测试非法的桶与分位数参数。"""
+        with pytest.raises(ValueError):
+            Histogram(buckets=(1.0, 0.5))
+        with pytest.raises(ValueError):
+            Histogram().quantile(1.5)
+
+
+class TestMetricsRegistry:
+    """MetricsRegistry 的测试用例。"""
+
+    def test_render_requests(self):
+        """测试请求指标的 Prometheus 文本输出。"""
+        registry = MetricsRegistry(buckets=(0.01, 0.1))
+        registry.request_started()
+        registry.observe_request("GET", "/users/{user_id}", 200, 0.005)
+        registry.observe_request("GET", "/users/{user_id}", 404, 0.05)
+        text = registry.render()
+        assert "py_ref_http_requests_in_flight 1" in text
+        labels = 'method="GET",route="/users/{user_id}",status="2xx"'
+        assert (
+            f'py_ref_http_request_duration_seconds_bucket{{{labels},le="0.01"}} 1'
+            in text
+        )
+        assert (
+            f'py_ref_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 1'
+            in text
+        )
+        assert f"py_ref_http_request_duration_seconds_count{{{labels}}} 1" in text
+        assert 'status="4xx"' in text
+        registry.request_finished()
+        assert "py_ref_http_requests_in_flight 0" in registry.render()
+
+    def test_render_caches(self):
+        """测试缓存统计输出。"""
+        cache = LRUCache(maxsize=1)
+        cache.get("a")
+        cache.set("a", 1)
+        cache.get("a")
+        cache.set("b", 2)
+        registry = MetricsRegistry()
+        registry.register_cache("user", cache)
+        text = registry.render()
+        assert 'py_ref_cache_hits_total{cache="user"} 1' in text
+        assert 'py_ref_cache_misses_total{cache="user"} 1' in text
+        assert 'py_ref_cache_evictions_total{cache="user"} 1' in text
+        assert 'py_ref_cache_size{cache="user"} 1' in text
+        assert 'py_ref_cache_hit_ratio{cache="user"} 0.5' in text
+
+    def test_render_singleflight(self):
+        """测试请求合并统计输出。"""
+        flight = SingleFlight()
+        flight.calls, flight.executions, flight.coalesced = 5, 2, 3
+        registry = MetricsRegistry()
+        registry.register_singleflight("user", flight)
+        text = registry.render()
+        assert 'py_ref_singleflight_calls_total{name="user"} 5' in text
+        assert 'py_ref_singleflight_executions_total{name="user"} 2' in text
+        assert 'py_ref_singleflight_coalesced_total{name="user"} 3' in text
+
+    def test_label_escaping(self):
+        """测试标签值转义。"""
+        registry = MetricsRegistry()
+        registry.observe_request("GET", 'a"b\\c', 200, 0.1)
+        assert 'route="a\\"b\\\\c"' in registry.render()
@@ -0,0 +1,69 @@
+"""微基准测试模块的测试用例。"""
+
+import json
+
+from py_ref.microbench import CASES, main, run_case
+
+
+def test_cases_produce_same_envelope():
+    """测试标准路径与高性能路径编码的内容一致。"""
+    standard = json.loads(CASES["envelope.standard"]())
+    fast = json.loads(CASES["envelope.fast"]())
+    assert standard == fast
+
+
+def test_all_cases_run():
+    """测试全部用例都可以直接调用，且日志用例不向应用日志传播。"""
+    for func in CASES.values():
+        func()
+
+
+def test_run_case():
+    """测试单个用例的统计结果。"""
+    calls = 0
+
+    def func():
+        nonlocal calls
+        calls += 1
+
+    result = run_case(func, number=10, repeat=3, warmup=5)
+    assert calls == 35
+    assert result["ops_per_sec"] > 0
+    assert result["min_us"] <= result["median_us"]
+    assert result["stdev_us"] >= 0
+    assert result["number"] == 10
+
+
+def test_run_case_autorange():
+    """测试未指定调用次数时自动选择。"""
+    result = run_case(lambda: None, repeat=2, warmup=0)
+    assert result["number"] > 1
+
+
+def test_main(monkeypatch, tmp_path):
+    """测试主函数按过滤条件运行用例并写入 JSON。"""
+    ran = []
+    monkeypatch.setattr(
+        "py_ref.microbench.run_case",
+        lambda func, **options: ran.append(func)
+        or {
+            "ops_per_sec": 1.0,
+            "min_us": 1.0,
+            "median_us": 1.0,
+            "mean_us": 1.0,
+            "stdev_us": 0.0,
+        },
+    )
+    output = tmp_path / "micro.json"
+    main(["--filter", "logging", "--output", str(output)])
+    assert len(ran) == 8
+    assert list(json.loads(output.read_text())) == [
+        "logging.rich",
+        "logging.file",
+        "logging.file_buffered",
+        "logging.json",
+        "logging.async",
+        "logging.disabled",
+        "logging.disabled_lazy",
+        "logging.disabled_lazy_fields",
+    ]
@@ -0,0 +1,241 @@
+"""中间件模块的测试用例。"""
+
+import asyncio
+import json
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from py_ref.middleware import (
+    ConcurrencyLimiter,
+    ConcurrencyLimitMiddleware,
+    RequestTimingMiddleware,
+    parse_route_limits,
+    route_template,
+)
+
+
+def make_client(logger, **options):
+    """创建挂载了计时中间件的测试应用。"""
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        return {"id": item_id}
+
+    @app.get("/boom")
+    async def boom():
+        raise RuntimeError("故障")
+
+    app.add_middleware(RequestTimingMiddleware, logger=logger, **options)
+    return TestClient(app, raise_server_exceptions=False)
+
+
+@pytest.fixture
+def access_logger():
+    """提供独立的访问日志记录器。"""
+    logger = logging.getLogger("test_access")
+    logger.setLevel(logging.INFO)
+    return logger
+
+
+class TestRequestTimingMiddleware:
+    """RequestTimingMiddleware 的测试用例。"""
+
+    def test_logs_route_template(self, access_logger, caplog):
+        """测试日志包含方法、路由模板、状态码与耗时。"""
+        client = make_client(access_logger)
+        with caplog.at_level(logging.INFO, logger="test_access"):
+            assert client.get("/items/42").status_code == 200
+        assert len(caplog.records) == 1
+        record = caplog.records[0]
+        assert record.args[:3] == ("GET", "/items/{item_id}", 200)
+        assert record.args[3] >= 0
+
+    def test_sampling_skips_normal_requests(self, access_logger, caplog):
+        """测试抽样比例为 0 时不记录正常请求，但总是记录 5xx。"""
+        client = make_client(access_logger, sample_rate=0.0)
+        with caplog.at_level(logging.INFO, logger="test_access"):
+            client.get("/items/1")
+            client.get("/boom")
+        assert [record.args[2] for record in caplog.records] == [500]
+
+    def test_slow_requests_always_logged(self, access_logger, caplog):
+        """测试慢请求不受抽样影响。"""
+        client = make_client(access_logger, sample_rate=0.0, slow_threshold_ms=0)
+        with caplog.at_level(logging.INFO, logger="test_access"):
+            client.get("/items/1")
+        assert len(caplog.records) == 1
+
+    def test_disabled_level(self, access_logger, caplog):
+        """测试日志级别高于 INFO 时不记录。"""
+        access_logger.setLevel(logging.WARNING)
+        client = make_client(access_logger)
+        with caplog.at_level(logging.WARNING, logger="test_access"):
+            client.get("/items/1")
+        assert caplog.records == []
+
+    def test_unmatched_route_uses_path(self, access_logger, caplog):
+        """测试未匹配路由时使用原始路径。"""
+        client = make_client(access_logger)
+        with caplog.at_level(logging.INFO, logger="test_access"):
+            client.get("/missing")
+        assert caplog.records[0].args[1:3] == ("/missing", 404)
+
+    def test_invalid_sample_rate(self, access_logger):
+        """测试抽样比例必须在 0 到 1 之间。"""
+        with pytest.raises(ValueError):
+            RequestTimingMiddleware(None, logger=access_logger, sample_rate=2)
+
+    def test_route_template_fallback(self):
+        """测试 scope 中没有路由信息时的回退。"""
+        assert route_template({"path": "/raw"}) == "/raw"
+
+
+class BlockingApp:
+    """在事件被设置前一直挂起的 ASGI 应用。"""
+
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.calls = 0
+
+    async def __call__(self, scope, receive, send):
+        self.calls += 1
+        await self.release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+
+async def call(app, path="/api/v1/users"):
+    """调用 ASGI 应用，返回状态码、响应头与响应体。"""
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        messages.append(message)
+
+    await app({"type": "http", "method": "GET", "path": path}, receive, send)
+    start, body = messages
+    return start["status"], dict(start["headers"]), body["body"]
+
+
+class TestConcurrencyLimiter:
+    """ConcurrencyLimiter 的测试用例。"""
+
+    def test_queue_and_timeout(self):
+        """测试排队、队列已满拒绝与排队超时。"""
+
+        async def scenario():
+            limiter = ConcurrencyLimiter(1, max_waiting=1, timeout=0.05)
+            assert await limiter.acquire()
+            waiter = asyncio.create_task(limiter.acquire())
+            await asyncio.sleep(0)
+            assert await limiter.acquire() is False  # 队列已满
+            assert await waiter is False  # 排队超时
+            limiter.release()
+            assert await limiter.acquire()
+            return limiter
+
+        limiter = asyncio.run(scenario())
+        assert limiter.rejected == 1
+        assert limiter.timeouts == 1
+        assert limiter.waiting == 0
+
+    def test_waiter_gets_released_slot(self):
+        """测试名额释放后排队请求被放行。"""
+
+        async def scenario():
+            limiter = ConcurrencyLimiter(1, max_waiting=1, timeout=1)
+            await limiter.acquire()
+            waiter = asyncio.create_task(limiter.acquire())
+            await asyncio.sleep(0)
+            limiter.release()
+            return await waiter
+
+        assert asyncio.run(scenario()) is True
+
+    def test_invalid_limit(self):
+        """测试并发上限必须为正数。"""
+        with pytest.raises(ValueError):
+            ConcurrencyLimiter(0)
+
+
+class TestConcurrencyLimitMiddleware:
+    """ConcurrencyLimitMiddleware 的测试用例。"""
+
+    def test_sheds_when_saturated(self):
+        """测试并发已满时返回带 Retry-After 的 503。"""
+
+        async def scenario():
+            inner = BlockingApp()
+            app = ConcurrencyLimitMiddleware(inner, limit=1, retry_after=3)
+            first = asyncio.create_task(call(app))
+            await asyncio.sleep(0)
+            rejected = await call(app)
+            inner.release.set()
+            return rejected, await first, inner.calls
+
+        (status, headers, body), first, calls = asyncio.run(scenario())
+        assert status == 503
+        assert headers[b"retry-after"] == b"3"
+        assert json.loads(body) == {
+            "code": 503,
+            "data": None,
+            "message": "服务繁忙，请稍后重试",
+        }
+        assert first[0] == 200
+        assert calls == 1
+
+    def test_exempt_path(self):
+        """测试豁免路径不受限制。"""
+
+        async def scenario():
+            inner = BlockingApp()
+            app = ConcurrencyLimitMiddleware(inner, limit=1)
+            first = asyncio.create_task(call(app))
+            await asyncio.sleep(0)
+            health = asyncio.create_task(call(app, "/api/v1/health"))
+            await asyncio.sleep(0)
+            inner.release.set()
+            return await first, await health
+
+        first, health = asyncio.run(scenario())
+        assert first[0] == 200
+        assert health[0] == 200
+
+    def test_route_group_limit(self):
+        """测试路由分组限制只影响匹配的前缀，并释放已获取的名额。"""
+
+        async def scenario():
+            inner = BlockingApp()
+            app = ConcurrencyLimitMiddleware(
+                inner, route_limits={"/api/v1/users:export": 1, "/api": 10}
+            )
+            export = asyncio.create_task(call(app, "/api/v1/users:export"))
+            await asyncio.sleep(0)
+            rejected = await call(app, "/api/v1/users:export")
+            other = asyncio.create_task(call(app, "/api/v1/users"))
+            await asyncio.sleep(0)
+            inner.release.set()
+            results = rejected, await export, await other
+            again = await call(app, "/api/v1/users:export")
+            return (*results, again)
+
+        rejected, export, other, again = asyncio.run(scenario())
+        assert rejected[0] == 503
+        assert export[0] == 200
+        assert other[0] == 200
+        assert again[0] == 200
+
+    def test_parse_route_limits(self):
+        """测试解析路由分组并发配置。"""
+        assert parse_route_limits("") == {}
+        assert parse_route_limits("/a=1, /b:c=2") == {"/a": 1, "/b:c": 2}
+        with pytest.raises(ValueError):
+            parse_route_limits("=3")
+        with pytest.raises(ValueError):
+            parse_route_limits("/a=x")
@@ -0,0 +1,175 @@
+"""限流模块的测试用例。"""
+
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from py_ref.ratelimit import (
+    RateLimit,
+    RateLimitMiddleware,
+    TokenBucketStore,
+    parse_rate_limits,
+)
+
+
+class TestRateLimit:
+    """速率配置解析的测试用例。"""
+
+    def test_parse(self):
+        """测试解析速率与突发容量。"""
+        assert RateLimit.parse("100/s") == RateLimit(100.0, 100)
+        assert RateLimit.parse("600/m:20") == RateLimit(10.0, 20)
+        assert RateLimit.parse("3600/h") == RateLimit(1.0, 3600)
+
+    @pytest.mark.parametrize("spec", ["10", "10/d", "0/s", "x/s"])
+    def test_parse_invalid(self, spec):
+        """测试无效的速率配置。"""
+        with pytest.raises(ValueError):
+            RateLimit.parse(spec)
+
+    def test_parse_rate_limits(self):
+        """测试解析路由限流配置。"""
+        assert parse_rate_limits("") == {}
+        assert parse_rate_limits("/a=1/s, /b=2/s:4") == {
+            "/a": RateLimit(1.0, 1),
+            "/b": RateLimit(2.0, 4),
+        }
+        with pytest.raises(ValueError):
+            parse_rate_limits("=1/s")
+
+
+class TestTokenBucketStore:
+    """TokenBucketStore 的测试用例。"""
+
+    def test_burst_and_refill(self, clock):
+        """测试突发容量耗尽后按速率补充令牌。"""
+        store = TokenBucketStore(clock=clock)
+        limit = RateLimit(rate=2.0, burst=2)
+        assert store.consume(("c", "g"), limit)[0]
+        assert store.consume(("c", "g"), limit)[0]
+        allowed, remaining, retry_after = store.consume(("c", "g"), limit)
+        assert not allowed
+        assert retry_after == pytest.approx(0.5)
+        clock.now = 0.5
+        assert store.consume(("c", "g"), limit)[0]
+
+    def test_clients_are_independent(self, clock):
+        """测试不同客户端使用独立的桶。"""
+        store = TokenBucketStore(clock=clock)
+        limit = RateLimit(rate=1.0, burst=1)
+        assert store.consume(("a", "g"), limit)[0]
+        assert store.consume(("b", "g"), limit)[0]
+        assert not store.consume(("a", "g"), limit)[0]
+
+    def test_idle_entries_evicted(self, clock):
+        """测试已补满的空闲条目被淘汰。"""
+        store = TokenBucketStore(clock=clock)
+        limit = RateLimit(rate=1.0, burst=5)
+        for i in range(100):
+            store.consume((f"client{i}", "g"), limit)
+        assert len(store) == 100
+        clock.now = 10.0
+        store.consume(("new", "g"), limit)
+        assert len(store) == 1
+
+    def test_max_entries(self, clock):
+        """测试条目数不超过上限。"""
+        store = TokenBucketStore(max_entries=10, clock=clock)
+        limit = RateLimit(rate=1.0, burst=5)
+        for i in range(100):
+            store.consume((f"client{i}", "g"), limit)
+        assert len(store) == 10
+
+
+def make_client(**options):
+    """创建挂载了限流中间件的测试应用。"""
+    app = FastAPI()
+
+    @app.get("/api/v1/users")
+    async def users():
+        return {"ok": True}
+
+    @app.get("/api/v1/health")
+    async def health():
+        return {"ok": True}
+
+    @app.get("/other")
+    async def other():
+        return {"ok": True}
+
+    app.add_middleware(RateLimitMiddleware, **options)
+    return TestClient(app)
+
+
+class TestRateLimitMiddleware:
+    """RateLimitMiddleware 的测试用例。"""
+
+    def test_rejects_with_429(self):
+        """测试超出速率时返回统一格式的 429 及限流响应头。"""
+        client = make_client(limits={"/api/v1/users": RateLimit(1.0, 2)})
+        first = client.get("/api/v1/users")
+        assert first.status_code == 200
+        assert first.headers["ratelimit-limit"] == "2"
+        assert first.headers["ratelimit-remaining"] == "1"
+        client.get("/api/v1/users")
+        response = client.get("/api/v1/users")
+        assert response.status_code == 429
+        assert response.headers["retry-after"] == "1"
+        assert response.headers["ratelimit-remaining"] == "0"
+        assert json.loads(response.content)["code"] == 429
+
+    def test_api_key_identity(self):
+        """测试按已知的 API Key 区分客户端。"""
+        client = make_client(
+            limits={"/api/v1/users": RateLimit(1.0, 1)}, api_keys={"a", "b"}
+        )
+        assert (
+            client.get("/api/v1/users", headers={"X-API-Key": "a"}).status_code == 200
+        )
+        assert (
+            client.get("/api/v1/users", headers={"X-API-Key": "b"}).status_code == 200
+        )
+        assert (
+            client.get("/api/v1/users", headers={"X-API-Key": "a"}).status_code == 429
+        )
+
+    @pytest.mark.parametrize(
+        "options",
+        [{}, {"api_keys": {"a"}}, {"key_validator": lambda key: key == "a"}],
+    )
+    def test_unknown_api_keys_use_address(self, options):
+        """测试未知或未配置校验的 API Key 不能绕过按地址的限流。"""
+        client = make_client(limits={"/api/v1/users": RateLimit(1.0, 1)}, **options)
+        for i, expected in enumerate((200, 429, 429)):
+            response = client.get("/api/v1/users", headers={"X-API-Key": f"r{i}"})
+            assert response.status_code == expected
+
+    def test_key_validator(self):
+        """测试通过校验函数识别的 API Key 拥有独立的桶。"""
+        client = make_client(
+            limits={"/api/v1/users": RateLimit(1.0, 1)},
+            key_validator=lambda key: key.startswith("ok-"),
+        )
+        assert client.get("/api/v1/users").status_code == 200
+        assert (
+            client.get("/api/v1/users", headers={"X-API-Key": "ok-1"}).status_code
+            == 200
+        )
+        assert (
+            client.get("/api/v1/users", headers={"X-API-Key": "bad"}).status_code == 429
+        )
+
+    def test_unlimited_and_exempt_paths(self):
+        """测试未配置的路径与豁免路径不受限制。"""
+        client = make_client(limits={"/api": RateLimit(1.0, 1)})
+        for _ in range(3):
+            assert client.get("/other").status_code == 200
+            assert client.get("/api/v1/health").status_code == 200
+
+    def test_default_limit(self):
+        """测试未匹配前缀时使用默认速率。"""
+        middleware_client = make_client(default=RateLimit(1.0, 1))
+        assert middleware_client.get("/other").status_code == 200
+        assert middleware_client.get("/other").status_code == 429
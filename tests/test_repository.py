@@ -0,0 +1,122 @@
+"""仓储模块的测试用例。"""
+
+import asyncio
+
+import pytest
+
+from py_ref.repository import DuplicateEmailError, InMemoryUserRepository
+
+
+@pytest.fixture
+def repository():
+    """提供空的内存仓储。"""
+    return InMemoryUserRepository()
+
+
+class TestInMemoryUserRepository:
+    """内存仓储的测试用例。"""
+
+    def test_create_and_get(self, repository):
+        """测试创建后可按 ID 和邮箱读取。"""
+        record = asyncio.run(repository.create("张三", "zhangsan@example.com", 25))
+        assert record.id == 1
+        assert record.version == 1
+        assert asyncio.run(repository.get(1)) == record
+        assert asyncio.run(repository.get_by_email("zhangsan@example.com")) == record
+        assert asyncio.run(repository.get(2)) is None
+
+    def test_get_many(self, repository):
+        """测试批量获取只返回存在的用户。"""
+        asyncio.run(repository.create("张三", "a@example.com"))
+        asyncio.run(repository.create("李四", "b@example.com"))
+        found = asyncio.run(repository.get_many([2, 3, 1]))
+        assert sorted(found) == [1, 2]
+        assert found[2].name == "李四"
+
+    def test_create_duplicate_email(self, repository):
+        """测试邮箱唯一约束。"""
+        asyncio.run(repository.create("张三", "same@example.com"))
+        with pytest.raises(DuplicateEmailError):
+            asyncio.run(repository.create("李四", "same@example.com"))
+        assert asyncio.run(repository.count()) == 1
+
+    def test_update_reindexes_email(self, repository):
+        """测试更新邮箱会同步维护唯一索引并递增版本号。"""
+        asyncio.run(repository.create("张三", "old@example.com"))
+        record = asyncio.run(repository.update(1, {"email": "new@example.com"}))
+        assert record.version == 2
+        assert asyncio.run(repository.get_by_email("old@example.com")) is None
+        assert asyncio.run(repository.get_by_email("new@example.com")).id == 1
+
+    def test_update_conflicting_email(self, repository):
+        """测试更新为他人邮箱时抛出异常且不修改数据。"""
+        asyncio.run(repository.create("张三", "a@example.com"))
+        asyncio.run(repository.create("李四", "b@example.com"))
+        with pytest.raises(DuplicateEmailError):
+            asyncio.run(repository.update(2, {"email": "a@example.com"}))
+        assert asyncio.run(repository.get(2)).email == "b@example.com"
+
+    def test_update_missing(self, repository):
+        """测试更新不存在的用户。"""
+        assert asyncio.run(repository.update(1, {"name": "无"})) is None
+
+    def test_delete(self, repository):
+        """测试删除会同时移除邮箱索引。"""
+        asyncio.run(repository.create("张三", "zhangsan@example.com"))
+        assert asyncio.run(repository.delete(1)) is True
+        assert asyncio.run(repository.delete(1)) is False
+        assert asyncio.run(repository.get_by_email("zhangsan@example.com")) is None
+
+    def test_list_users_is_ordered(self, repository):
+        """测试分页结果按 ID 有序且跳过已删除的记录。"""
+        for i in range(1, 6):
+            asyncio.run(repository.create(f"用户{i}", f"user{i}@example.com"))
+        asyncio.run(repository.delete(2))
+        records = asyncio.run(repository.list_users(skip=1, limit=2))
+        assert [record.id for record in records] == [3, 4]
+
+    def test_list_after_seeks_by_id(self, repository):
+        """测试键集分页从指定 ID 之后开始返回。"""
+        for i in range(1, 8):
+            asyncio.run(repository.create(f"用户{i}", f"user{i}@example.com"))
+        asyncio.run(repository.delete(4))
+        records = asyncio.run(repository.list_after(3, limit=2))
+        assert [record.id for record in records] == [5, 6]
+        assert asyncio.run(repository.list_after(7, limit=2)) == []
+
+    def test_iter_batches(self, repository):
+        """测试分批遍历全部用户。"""
+        for i in range(1, 8):
+            asyncio.run(repository.create(f"用户{i}", f"user{i}@example.com"))
+
+        async def collect():
+            return [
+                [record.id for record in batch]
+                async for batch in repository.iter_batches(batch_size=3)
+            ]
+
+        assert asyncio.run(collect()) == [[1, 2, 3], [4, 5, 6], [7]]
+
+    def test_batch_operations(self, repository):
+        """测试批量操作逐条返回结果。"""
+        created = asyncio.run(
+            repository.create_many(
+                [
+                    {"name": "甲", "email": "a@example.com"},
+                    {"name": "乙", "email": "a@example.com"},
+                ]
+            )
+        )
+        assert created[0].id == 1
+        assert isinstance(created[1], DuplicateEmailError)
+
+        asyncio.run(repository.create("丙", "c@example.com"))
+        updated = asyncio.run(
+            repository.update_many(
+                [(1, {"age": 30}), (9, {"age": 1}), (1, {"email": "c@example.com"})]
+            )
+        )
+        assert updated[0].age == 30
+        assert updated[1] is None
+        assert isinstance(updated[2], DuplicateEmailError)
+        assert asyncio.run(repository.delete_many([1, 9])) == [True, False]
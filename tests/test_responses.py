@@ -0,0 +1,60 @@
+"""响应模块的测试用例。"""
+
+import json
+from datetime import datetime
+
+import pytest
+
+from py_ref import responses
+from py_ref.api import ResponseCode
+from py_ref.responses import FastJSONResponse, json_dumps
+
+SAMPLE = {
+    "code": ResponseCode.SUCCESS,
+    "data": {"name": "张三", "created_at": datetime(2024, 1, 1, 12, 0, 0, 123456)},
+    "message": "成功",
+}
+EXPECTED = {
+    "code": 0,
+    "data": {"name": "张三", "created_at": "2024-01-01T12:00:00.123456"},
+    "message": "成功",
+}
+
+
+@pytest.fixture(params=["orjson", "json"])
+def backend(request, monkeypatch):
+    """分别使用 orjson 与标准库 json 编码。"""
+    if request.param == "json":
+        monkeypatch.setattr(responses, "orjson", None)
+    elif responses.orjson is None:
+        pytest.skip("未安装 orjson")
+    return request.param
+
+
+class TestJsonDumps:
+    """json_dumps 的测试用例。"""
+
+    def test_encodes_envelope(self, backend):
+        """测试编码结果与预期一致。"""
+        assert json.loads(json_dumps(SAMPLE)) == EXPECTED
+
+    def test_compact_and_utf8(self, backend):
+        """测试输出紧凑且不转义非 ASCII 字符。"""
+        body = json_dumps({"a": "中文", "b": [1, 2]})
+        assert body == '{"a":"中文","b":[1,2]}'.encode()
+
+    def test_unsupported_type(self, backend):
+        """测试不支持的类型抛出 TypeError。"""
+        with pytest.raises(TypeError):
+            json_dumps({"value": object()})
+
+
+class TestFastJSONResponse:
+    """FastJSONResponse 的测试用例。"""
+
+    def test_render(self, backend):
+        """测试响应体与状态码。"""
+        response = FastJSONResponse(SAMPLE, status_code=201)
+        assert response.status_code == 201
+        assert response.headers["content-type"] == "application/json"
+        assert json.loads(response.body) == EXPECTED
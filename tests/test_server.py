@@ -0,0 +1,160 @@
+"""服务启动器的测试用例。"""
+
+import importlib.util
+import os
+
+import pytest
+
+from py_ref import server
+from py_ref.server import (
+    DEFAULT_APP,
+    build_options,
+    build_parser,
+    default_workers,
+    resolve_http,
+    resolve_loop,
+)
+
+
+@pytest.fixture(autouse=True)
+def launcher_env(monkeypatch):
+    """serve() 会为 worker 进程设置环境变量，测试结束后恢复。"""
+    for name in ("PY_REF_LOG_PER_PROCESS", "PY_REF_USER_CACHE_TTL"):
+        monkeypatch.setenv(name, "")
+        monkeypatch.delenv(name)
+
+
+def parse(*argv):
+    """解析命令行参数。"""
+    return build_parser().parse_args(list(argv))
+
+
+class TestServerOptions:
+    """启动参数的测试用例。"""
+
+    def test_defaults(self):
+        """测试默认参数。"""
+        args = parse()
+        options = build_options(args)
+        assert args.app == DEFAULT_APP
+        assert options["workers"] == default_workers() >= 1
+        assert options["backlog"] == 2048
+        assert options["timeout_keep_alive"] == 5
+        assert options["limit_concurrency"] is None
+        assert options["access_log"] is False
+        assert options["factory"] is False
+
+    @pytest.mark.parametrize(
+        "path,shared",
+        [(None, False), (":memory:", False), ("data/users.db", True)],
+    )
+    def test_default_workers_follow_storage(self, monkeypatch, path, shared):
+        """测试只有共享的 SQLite 文件存储才默认启动多个 worker。"""
+        if path is None:
+            monkeypatch.delenv("PY_REF_SQLITE_PATH", raising=False)
+        else:
+            monkeypatch.setenv("PY_REF_SQLITE_PATH", path)
+        monkeypatch.setattr(os, "cpu_count", lambda: 4)
+        monkeypatch.setattr(os, "process_cpu_count", lambda: 4, raising=False)
+        assert server.shared_storage() is shared
+        assert default_workers() == (4 if shared else 1)
+
+    def test_warns_for_memory_storage_with_workers(self, monkeypatch, caplog):
+        """测试内存存储下启动多个 worker 时输出警告。"""
+        import uvicorn
+
+        monkeypatch.delenv("PY_REF_SQLITE_PATH", raising=False)
+        monkeypatch.setattr(uvicorn, "run", lambda app, **options: None)
+        server.serve(["--workers", "2"])
+        assert "独立的内存存储" in caplog.text
+
+    def test_overrides(self):
+        """测试命令行参数覆盖默认值。"""
+        options = build_options(
+            parse(
+                "myapp:create",
+                "--factory",
+                "--workers",
+                "3",
+                "--loop",
+                "asyncio",
+                "--http",
+                "h11",
+                "--backlog",
+                "128",
+                "--keep-alive",
+                "30",
+                "--limit-concurrency",
+                "500",
+                "--access-log",
+            )
+        )
+        assert options == {
+            "factory": True,
+            "host": "0.0.0.0",
+            "port": 8000,
+            "workers": 3,
+            "loop": "asyncio",
+            "http": "h11",
+            "backlog": 128,
+            "timeout_keep_alive": 30,
+            "limit_concurrency": 500,
+            "log_level": "info",
+            "access_log": True,
+        }
+
+    @pytest.mark.parametrize(
+        "resolve,module,fast,fallback",
+        [
+            (resolve_loop, "uvloop", "uvloop", "asyncio"),
+            (resolve_http, "httptools", "httptools", "h11"),
+        ],
+    )
+    def test_auto_selection(self, monkeypatch, resolve, module, fast, fallback):
+        """测试 auto 时根据是否安装选择实现。"""
+        monkeypatch.setattr(importlib.util, "find_spec", lambda name: object())
+        assert resolve("auto") == fast
+        monkeypatch.setattr(importlib.util, "find_spec", lambda name: None)
+        assert resolve("auto") == fallback
+        assert resolve(fast) == fast
+
+    def test_serve_uses_import_string(self, monkeypatch):
+        """测试以导入字符串启动 uvicorn，使 worker 进程各自加载应用。"""
+        import uvicorn
+
+        calls = []
+        monkeypatch.setattr(
+            uvicorn, "run", lambda app, **options: calls.append((app, options))
+        )
+        server.serve(["--workers", "2", "--no-access-log"])
+        ((app, options),) = calls
+        assert app == DEFAULT_APP
+        assert options["workers"] == 2
+        assert options["access_log"] is False
+
+    @pytest.mark.parametrize("workers,expected", [("1", None), ("2", "1")])
+    def test_serve_per_process_log_files(self, monkeypatch, workers, expected):
+        """测试多 worker 时为轮转日志启用按进程区分的文件名。"""
+        import uvicorn
+
+        monkeypatch.setattr(uvicorn, "run", lambda app, **options: None)
+        server.serve(["--workers", workers])
+        assert os.environ.get("PY_REF_LOG_PER_PROCESS") == expected
+
+    @pytest.mark.parametrize("workers,expected", [("1", None), ("2", "1")])
+    def test_serve_shortens_user_cache_ttl(self, monkeypatch, workers, expected):
+        """测试多 worker 时缩短进程内 get_user 缓存的 TTL。"""
+        import uvicorn
+
+        monkeypatch.setattr(uvicorn, "run", lambda app, **options: None)
+        server.serve(["--workers", workers])
+        assert os.environ.get("PY_REF_USER_CACHE_TTL") == expected
+
+    def test_serve_keeps_explicit_user_cache_ttl(self, monkeypatch):
+        """测试显式设置的缓存 TTL 不被覆盖。"""
+        import uvicorn
+
+        monkeypatch.setenv("PY_REF_USER_CACHE_TTL", "30")
+        monkeypatch.setattr(uvicorn, "run", lambda app, **options: None)
+        server.serve(["--workers", "2"])
+        assert os.environ["PY_REF_USER_CACHE_TTL"] == "30"
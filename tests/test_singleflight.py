@@ -0,0 +1,127 @@
+"""请求合并模块的测试用例。"""
+
+import asyncio
+
+import pytest
+
+from py_ref.singleflight import SingleFlight
+
+
+class TestSingleFlight:
+    """SingleFlight 的测试用例。"""
+
+    def test_concurrent_calls_coalesced(self):
+        """测试相同键的并发调用只执行一次。"""
+        flight = SingleFlight()
+        calls = 0
+
+        async def load():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "value"
+
+        async def scenario():
+            return await asyncio.gather(*(flight.do("key", load) for _ in range(10)))
+
+        assert asyncio.run(scenario()) == ["value"] * 10
+        assert calls == 1
+        assert flight.stats() == {
+            "calls": 10,
+            "executions": 1,
+            "coalesced": 9,
+            "inflight": 0,
+        }
+
+    def test_different_keys_not_coalesced(self):
+        """测试不同键互不合并。"""
+        flight = SingleFlight()
+
+        async def scenario():
+            return await asyncio.gather(
+                flight.do(1, lambda: asyncio.sleep(0, "a")),
+                flight.do(2, lambda: asyncio.sleep(0, "b")),
+            )
+
+        assert asyncio.run(scenario()) == ["a", "b"]
+        assert flight.executions == 2
+        assert flight.coalesced == 0
+
+    def test_sequential_calls_not_cached(self):
+        """测试调用完成后不缓存结果。"""
+        flight = SingleFlight()
+
+        async def scenario():
+            await flight.do("key", lambda: asyncio.sleep(0, 1))
+            await flight.do("key", lambda: asyncio.sleep(0, 2))
+
+        asyncio.run(scenario())
+        assert flight.executions == 2
+        assert len(flight) == 0
+
+    def test_error_propagates_to_all_waiters(self):
+        """测试异常传递给所有等待者且之后可以重试。"""
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("boom")
+
+        async def scenario():
+            results = await asyncio.gather(
+                *(flight.do("key", fail) for _ in range(3)), return_exceptions=True
+            )
+            retry = await flight.do("key", lambda: asyncio.sleep(0, "ok"))
+            return results, retry
+
+        results, retry = asyncio.run(scenario())
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert retry == "ok"
+
+    def test_cancelled_caller_does_not_cancel_others(self):
+        """测试发起读取的调用者被取消时，其他等待者仍得到结果。"""
+        flight = SingleFlight()
+        release = None
+
+        async def load():
+            await release.wait()
+            return "value"
+
+        async def scenario():
+            nonlocal release
+            release = asyncio.Event()
+            leader = asyncio.create_task(flight.do("key", load))
+            follower = asyncio.create_task(flight.do("key", load))
+            await asyncio.sleep(0)
+            leader.cancel()
+            await asyncio.sleep(0)
+            release.set()
+            with pytest.raises(asyncio.CancelledError):
+                await leader
+            return await follower
+
+        assert asyncio.run(scenario()) == "value"
+        assert flight.executions == 1
+        assert len(flight) == 0
+
+    def test_forget_starts_fresh_execution(self):
+        """测试 forget 后新的调用重新执行，已在等待的调用者仍得到原结果。"""
+        flight = SingleFlight()
+        versions = iter(["旧值", "新值"])
+
+        async def load():
+            value = next(versions)
+            await asyncio.sleep(0.01)
+            return value
+
+        async def scenario():
+            first = asyncio.ensure_future(flight.do("key", load))
+            await asyncio.sleep(0)
+            flight.forget("key")
+            flight.forget("missing")
+            second = await flight.do("key", load)
+            return await first, second
+
+        assert asyncio.run(scenario()) == ("旧值", "新值")
+        assert flight.executions == 2
+        assert len(flight) == 0
@@ -0,0 +1,222 @@
+"""SQLite 仓储模块的测试用例。"""
+
+import asyncio
+import sqlite3
+
+import pytest
+from fastapi.testclient import TestClient
+
+from py_ref.api import ApiConfig, app
+from py_ref.repository import DuplicateEmailError
+from py_ref.sqlite_repository import SQLiteConnectionPool, SQLiteUserRepository
+
+
+def run_with_repository(path, scenario, pool_size=4):
+    """打开仓储执行异步场景，结束后关闭仓储。"""
+
+    async def runner():
+        repository = SQLiteUserRepository(path, pool_size=pool_size)
+        await repository.open()
+        try:
+            return await scenario(repository)
+        finally:
+            await repository.close()
+
+    return asyncio.run(runner())
+
+
+class TestSQLiteConnectionPool:
+    """连接池的测试用例。"""
+
+    def test_invalid_size(self, tmp_path):
+        """测试连接池大小必须为正数。"""
+        with pytest.raises(ValueError):
+            SQLiteConnectionPool(tmp_path / "users.db", size=0)
+
+    @pytest.mark.parametrize("path", [":memory:", "file::memory:?cache=shared"])
+    def test_rejects_memory_database(self, path):
+        """测试拒绝内存数据库：每个连接会各自打开一个空数据库。"""
+        with pytest.raises(ValueError):
+            SQLiteConnectionPool(path)
+
+    def test_run_requires_open(self, tmp_path):
+        """测试未打开的连接池拒绝执行。"""
+        pool = SQLiteConnectionPool(tmp_path / "users.db")
+        with pytest.raises(RuntimeError):
+            asyncio.run(pool.run(lambda connection: None))
+
+    def test_wal_mode_enabled(self, tmp_path):
+        """测试连接使用 WAL 日志模式。"""
+        pool = SQLiteConnectionPool(tmp_path / "users.db", size=2)
+        pool.open()
+        try:
+            mode = asyncio.run(
+                pool.run(
+                    lambda connection: connection.execute(
+                        "PRAGMA journal_mode"
+                    ).fetchone()[0]
+                )
+            )
+        finally:
+            pool.close()
+        assert mode == "wal"
+        assert not pool.is_open
+
+
+class TestSQLiteUserRepository:
+    """SQLite 仓储的测试用例。"""
+
+    def test_crud_roundtrip(self, tmp_path):
+        """测试增删改查完整流程。"""
+
+        async def scenario(repository):
+            created = await repository.create("张三", "zhangsan@example.com", 25)
+            fetched = await repository.get(created.id)
+            by_email = await repository.get_by_email("zhangsan@example.com")
+            updated = await repository.update(created.id, {"name": "李四", "age": 30})
+            deleted = await repository.delete(created.id)
+            missing = await repository.get(created.id)
+            return created, fetched, by_email, updated, deleted, missing
+
+        created, fetched, by_email, updated, deleted, missing = run_with_repository(
+            tmp_path / "users.db", scenario
+        )
+        assert fetched == created
+        assert by_email == created
+        assert updated.name == "李四"
+        assert updated.age == 30
+        assert updated.version == created.version + 1
+        assert deleted is True
+        assert missing is None
+
+    def test_get_many(self, tmp_path):
+        """测试批量获取。"""
+
+        async def scenario(repository):
+            for i in range(1, 4):
+                await repository.create(f"用户{i}", f"user{i}@example.com")
+            return await repository.get_many([3, 1, 42]), await repository.get_many([])
+
+        found, empty = run_with_repository(tmp_path / "users.db", scenario)
+        assert sorted(found) == [1, 3]
+        assert found[3].name == "用户3"
+        assert empty == {}
+
+    def test_unique_email(self, tmp_path):
+        """测试邮箱唯一索引。"""
+
+        async def scenario(repository):
+            await repository.create("张三", "a@example.com")
+            second = await repository.create("李四", "b@example.com")
+            with pytest.raises(DuplicateEmailError):
+                await repository.create("王五", "a@example.com")
+            with pytest.raises(DuplicateEmailError):
+                await repository.update(second.id, {"email": "a@example.com"})
+            return await repository.count()
+
+        assert run_with_repository(tmp_path / "users.db", scenario) == 2
+
+    def test_update_and_delete_missing(self, tmp_path):
+        """测试更新和删除不存在的用户。"""
+
+        async def scenario(repository):
+            return (
+                await repository.update(42, {"name": "无"}),
+                await repository.delete(42),
+            )
+
+        assert run_with_repository(tmp_path / "users.db", scenario) == (None, False)
+
+    def test_list_users_and_persistence(self, tmp_path):
+        """测试分页查询及数据在重新打开后仍然存在。"""
+        path = tmp_path / "users.db"
+
+        async def populate(repository):
+            for i in range(1, 6):
+                await repository.create(f"用户{i}", f"user{i}@example.com")
+
+        async def read(repository):
+            return await repository.list_users(skip=1, limit=2)
+
+        run_with_repository(path, populate)
+        records = run_with_repository(path, read)
+        assert [record.id for record in records] == [2, 3]
+
+    def test_list_after(self, tmp_path):
+        """测试键集分页。"""
+
+        async def scenario(repository):
+            for i in range(1, 6):
+                await repository.create(f"用户{i}", f"user{i}@example.com")
+            await repository.delete(3)
+            return await repository.list_after(2, limit=2)
+
+        records = run_with_repository(tmp_path / "users.db", scenario)
+        assert [record.id for record in records] == [4, 5]
+
+    def test_batch_operations(self, tmp_path):
+        """测试批量操作在单个事务中执行并逐条返回结果。"""
+
+        async def scenario(repository):
+            created = await repository.create_many(
+                [
+                    {"name": "甲", "email": "a@example.com", "age": None},
+                    {"name": "乙", "email": "a@example.com", "age": None},
+                    {"name": "丙", "email": "c@example.com", "age": 20},
+                ]
+            )
+            updated = await repository.update_many(
+                [
+                    (1, {"name": "甲2"}),
+                    (42, {"name": "无"}),
+                    (2, {"email": "a@example.com"}),
+                ]
+            )
+            deleted = await repository.delete_many([1, 42])
+            return created, updated, deleted, await repository.count()
+
+        created, updated, deleted, count = run_with_repository(
+            tmp_path / "users.db", scenario
+        )
+        assert isinstance(created[1], DuplicateEmailError)
+        assert created[2].age == 20
+        assert updated[0].name == "甲2"
+        assert updated[1] is None
+        assert isinstance(updated[2], DuplicateEmailError)
+        assert deleted == [True, False]
+        assert count == 1
+
+    def test_concurrent_reads(self, tmp_path):
+        """测试并发请求超过连接数时仍能全部完成。"""
+
+        async def scenario(repository):
+            record = await repository.create("张三", "zhangsan@example.com")
+            results = await asyncio.gather(
+                *(repository.get(record.id) for _ in range(100))
+            )
+            return record, results
+
+        record, results = run_with_repository(
+            tmp_path / "users.db", scenario, pool_size=2
+        )
+        assert all(result == record for result in results)
+
+    def test_lifespan_uses_sqlite(self, tmp_path, monkeypatch):
+        """测试配置 SQLite 路径后应用生命周期会打开并关闭连接池。"""
+        path = tmp_path / "api.db"
+        monkeypatch.setattr(ApiConfig, "SQLITE_PATH", str(path))
+        monkeypatch.setattr(app.state, "user_repository", app.state.user_repository)
+
+        with TestClient(app) as client:
+            response = client.post(
+                "/api/v1/users", json={"name": "张三", "email": "z@example.com"}
+            )
+            assert response.status_code == 201
+            repository = app.state.user_repository
+            assert isinstance(repository, SQLiteUserRepository)
+            assert repository.pool.is_open
+
+        assert not repository.pool.is_open
+        with sqlite3.connect(path) as connection:
+            count = connection.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+        assert count == 1